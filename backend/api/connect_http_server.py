@@ -1,14 +1,18 @@
 import hashlib
 import json
 import logging
-import zipfile
+import os
+import struct
 from datetime import datetime, timezone
 from functools import wraps
-from typing import TypeVar
+from itertools import islice
+from pathlib import Path
+from typing import Collection, TypeVar
 from uuid import uuid4
 
-from flask import Flask, Response, request
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
+from google.protobuf.field_mask_pb2 import FieldMask
 from google.protobuf.json_format import MessageToDict, ParseDict, ParseError
 from google.protobuf.message import Message
 from google.protobuf.timestamp_pb2 import Timestamp
@@ -18,16 +22,45 @@ from taxos.bucket.create.command import CreateBucket
 from taxos.bucket.delete.command import DeleteBucket
 from taxos.bucket.entity import BucketRef
 from taxos.bucket.load.query import LoadBucket
+from taxos.bucket.merge.command import MergeBuckets
 from taxos.bucket.update.command import UpdateBucket
+from taxos.change.get.query import GetChanges
+from taxos.change.watch.query import WatchChanges
 from taxos.context.entity import Context
-from taxos.context.tools import require_tenant, set_context
+from taxos.context.tools import (
+  require_context,
+  require_tenant,
+  set_context,
+  unit_of_work,
+)
+from taxos.idempotency.claim.command import ClaimIdempotencyKey
+from taxos.idempotency.complete.command import CompleteIdempotencyKey
+from taxos.idempotency.entity import IdempotencyKey
+from taxos.idempotency.release.command import ReleaseIdempotencyKey
+from taxos.job.enqueue.command import EnqueueJob
+from taxos.job.entity import Job
+from taxos.job.load.query import LoadJob
+from taxos.job.worker.entity import WorkerPool
+from taxos.receipt.compress_file.command import CompressFile
 from taxos.receipt.create.command import CreateReceipt
 from taxos.receipt.delete.command import DeleteReceipt
 from taxos.receipt.download_file import DownloadFile
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.receipt.tools import get_file_archive, get_pending_file_dir
 from taxos.receipt.update.command import UpdateReceipt
+from taxos.tenant.aggregate_receipts.query import AggregateReceipts
 from taxos.tenant.dashboard.get.query import GetDashboard
-from taxos.tenant.list_receipts.query import ListReceipts
-from taxos.tenant.tools import get_files_dir
+from taxos.tenant.list_receipts_by_date.query import ListReceiptsByDate
+from taxos.tenant.list_unallocated_receipts.query import ListUnallocatedReceipts
+from taxos.tenant.page_receipts.query import PageReceipts
+from taxos.tenant.search_receipts.query import SearchReceipts
+from taxos.tenant.stream_receipts.query import StreamReceipts
+from taxos.tenant.warm_up.entity import WarmUp
+from taxos.vendor.find_duplicates.query import FindDuplicateVendors
+from taxos.vendor.list.query import ListVendors
+from taxos.vendor.merge.command import MergeVendors
+from taxos.vendor.summary.get.query import GetVendorSummary
 
 from api.v1 import taxos_service_pb2 as messages
 
@@ -36,6 +69,14 @@ logger = logging.getLogger("api")
 app = Flask(__name__)
 CORS(app)
 T = TypeVar("T", bound=Message)
+worker_pool = WorkerPool()
+warm_up = WarmUp()
+
+CONNECT_STREAM_CONTENT_TYPE = "application/connect+json"
+CONNECT_COMPRESSED_FLAG = 0x01
+CONNECT_END_STREAM_FLAG = 0x02
+STREAM_CHUNK_SIZE = 100  # receipts per streamed frame
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
 
 
 def get_request_data() -> dict:
@@ -55,26 +96,92 @@ def get_request_message(message_type: type[T], ignore_unknown_fields=False) -> T
   return message
 
 
-def message_to_success_response(message: Message) -> Response:
-  message_dict = MessageToDict(
+def message_to_dict(message: Message, print_defaults: bool = True) -> dict:
+  return MessageToDict(
     message,
     preserving_proto_field_name=False,  # frontend uses camelCase
-    always_print_fields_with_no_presence=True,
+    always_print_fields_with_no_presence=print_defaults,
   )
-  text = json.dumps(message_dict)
+
+
+def message_to_success_response(message: Message, print_defaults: bool = True) -> Response:
+  text = json.dumps(message_to_dict(message, print_defaults))
   return Response(text, content_type="application/json")
 
 
+def has_read_mask(req: Message) -> bool:
+  """Responses to masked requests leave out unset fields, so fields outside the mask aren't sent as defaults."""
+  return "read_mask" in req.DESCRIPTOR.fields_by_name and bool(req.read_mask.paths)
+
+
+def get_read_mask_fields(read_mask: FieldMask, message_type: type[Message]) -> dict[str, set[str]]:
+  """Maps each top-level field selected by a read mask to the subfields selected beneath it
+  (empty for the whole field). Paths may pass through repeated fields, applying to every element."""
+  fields: dict[str, set[str]] = {}
+  for path in read_mask.paths:
+    descriptor = message_type.DESCRIPTOR
+    for name in path.split("."):
+      if not descriptor or name not in descriptor.fields_by_name:
+        raise ValueError(f"Invalid read_mask path for {message_type.__name__}: {path}")
+      descriptor = descriptor.fields_by_name[name].message_type
+    name, _, subpath = path.partition(".")
+    subfields = fields.setdefault(name, set())
+    if subpath:
+      subfields.add(subpath.partition(".")[0])
+  for path in read_mask.paths:
+    if "." not in path:
+      fields[path].clear()
+  return fields
+
+
+def encode_envelope(data: dict, end_stream: bool = False) -> bytes:
+  """Frames one message of a Connect stream: flags byte, big-endian length, JSON payload."""
+  payload = json.dumps(data).encode("utf-8")
+  flags = CONNECT_END_STREAM_FLAG if end_stream else 0
+  return struct.pack(">BI", flags, len(payload)) + payload
+
+
+def get_stream_request_message(message_type: type[T]) -> T:
+  """Hydrates a protobuf message from an enveloped streaming request (or a plain JSON body)."""
+  body = request.get_data()
+  if len(body) >= 5 and body[0] in (0, CONNECT_COMPRESSED_FLAG):
+    flags, length = struct.unpack(">BI", body[:5])
+    if length == len(body) - 5:
+      if flags & CONNECT_COMPRESSED_FLAG:
+        raise ValueError("Compressed stream requests are not supported")
+      body = body[5:]
+  data = json.loads(body or b"{}")
+  if not isinstance(data, dict):
+    raise ValueError("Request data is not a dict")
+  message = message_type()
+  ParseDict(data, message, ignore_unknown_fields=True)
+  return message
+
+
+# The Connect error code sent with each HTTP status, unless a more specific one is given
+ERROR_CODES = {
+  400: "invalid_argument",
+  401: "unauthenticated",
+  404: "not_found",
+  409: "already_exists",
+  500: "internal",
+  503: "unavailable",
+}
+
+
 def error_response(
   status: int = 500,
   message: str = "An unexpected error occurred",
   exception: Exception | None = None,
+  code: str | None = None,
 ) -> Response:
   if exception:
     logger.error("Request to %s raised %s: %s", request.path, type(exception).__name__, exception)
   else:
     logger.warning("Request to %s failed %s: %s", request.path, status, message)
-  return Response(json.dumps({"error": message}), status=status, content_type="application/json")
+  # A Connect error, so clients see its code rather than one guessed from the status
+  body = {"code": code or ERROR_CODES.get(status, "unknown"), "message": message}
+  return Response(json.dumps(body), status=status, content_type="application/json")
 
 
 def make_timestamp(value: datetime) -> Timestamp:
@@ -83,24 +190,29 @@ def make_timestamp(value: datetime) -> Timestamp:
   return ts
 
 
-def make_receipt_message(receipt) -> messages.Receipt:
-  return messages.Receipt(
-    guid=receipt.guid.hex,
-    vendor=receipt.vendor,
-    total=receipt.total,
-    date=make_timestamp(receipt.date),
-    timezone=receipt.timezone,
-    allocations=[
-      messages.ReceiptAllocation(
-        bucket=allocation.bucket.guid.hex,
-        amount=allocation.amount,
-      )
-      for allocation in receipt.allocations
-    ],
-    vendor_ref=receipt.vendor_ref,
-    notes=receipt.notes,
-    hash=receipt.hash,
-  )
+RECEIPT_FIELDS = {
+  "guid": lambda receipt: receipt.guid.hex,
+  "vendor": lambda receipt: receipt.vendor,
+  "total": lambda receipt: receipt.total,
+  "date": lambda receipt: make_timestamp(receipt.date),
+  "timezone": lambda receipt: receipt.timezone,
+  "allocations": lambda receipt: [
+    messages.ReceiptAllocation(
+      bucket=allocation.bucket.guid.hex,
+      amount=allocation.amount,
+    )
+    for allocation in receipt.allocations
+  ],
+  "vendor_ref": lambda receipt: receipt.vendor_ref,
+  "notes": lambda receipt: receipt.notes,
+  "hash": lambda receipt: receipt.hash,
+  "version": lambda receipt: receipt.version,
+}
+
+
+def make_receipt_message(receipt, fields: Collection[str] | None = None) -> messages.Receipt:
+  """Builds a Receipt message with only the given fields (all when empty)."""
+  return messages.Receipt(**{name: RECEIPT_FIELDS[name](receipt) for name in fields or RECEIPT_FIELDS})
 
 
 def get_text(data, *keys, default: str = ""):
@@ -154,14 +266,18 @@ def rpc_endpoint(request_message_type: type[T]):
     def decorated_function(*args, **kwargs):
       try:
         req = get_request_message(request_message_type, True)
-        response_message = f(req, *args, **kwargs)
+        # Repo and change log writes are made once, after the handler, instead of per command
+        with unit_of_work():
+          response_message = f(req, *args, **kwargs)
         if isinstance(response_message, Response):
           return response_message
-        return message_to_success_response(response_message)
+        return message_to_success_response(response_message, print_defaults=not has_read_mask(req))
       except (ParseError, ValueError, TypeError) as e:
         return error_response(400, str(e))
       except FileNotFoundError as e:
         return error_response(404, str(e))
+      except (FileExistsError, Receipt.VersionConflict) as e:
+        return error_response(409, str(e), code=get_error_code(e))
       except Exception as e:
         return error_response(exception=e)
 
@@ -170,6 +286,85 @@ def rpc_endpoint(request_message_type: type[T]):
   return decorator
 
 
+def idempotent(f):
+  """Decorator for create-style RPCs: a retry sending the same Idempotency-Key header gets the original response,
+  instead of doing the writes again. Apply it inside require_auth, since keys are kept per tenant."""
+
+  @wraps(f)
+  def decorated_function(*args, **kwargs):
+    if not (key := request.headers.get(IDEMPOTENCY_KEY_HEADER, "").strip()):
+      return f(*args, **kwargs)
+
+    request_hash = hashlib.sha256(request.path.encode() + b"\0" + request.get_data()).hexdigest()
+    try:
+      claimed = ClaimIdempotencyKey(key, request_hash).execute()
+    except ValueError as e:
+      return error_response(400, str(e))
+    except IdempotencyKey.InProgress as e:
+      return error_response(409, str(e), code="aborted")
+    if claimed.response is not None:
+      logger.info(f"Replaying response to {request.path} for idempotency key {key!r}")
+      return Response(claimed.response, status=200, content_type="application/json")
+
+    try:
+      response = f(*args, **kwargs)
+    except BaseException:
+      ReleaseIdempotencyKey(key).execute()
+      raise
+    if response.status_code == 200:
+      CompleteIdempotencyKey(key, response.get_data(as_text=True)).execute()
+    else:
+      ReleaseIdempotencyKey(key).execute()  # let a retry try again
+    return response
+
+  return decorated_function
+
+
+def get_error_code(exception: Exception) -> str:
+  if isinstance(exception, (ParseError, ValueError, TypeError)):
+    return "invalid_argument"
+  if isinstance(exception, FileNotFoundError):
+    return "not_found"
+  if isinstance(exception, FileExistsError):
+    return "already_exists"
+  if isinstance(exception, Receipt.VersionConflict):
+    return "aborted"
+  return "internal"
+
+
+def stream_endpoint(request_message_type: type[T]):
+  """Decorator for server-streaming RPC endpoints; the wrapped generator yields response messages,
+  which are encoded and sent one frame at a time."""
+
+  def decorator(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+      try:
+        req = get_stream_request_message(request_message_type)
+      except (ParseError, ValueError, TypeError) as e:
+        return error_response(400, str(e))
+      # The body is generated after this function returns, so carry the tenant along.
+      context = require_context()
+      print_defaults = not has_read_mask(req)
+
+      def generate():
+        set_context(context)
+        try:
+          for message in f(req, *args, **kwargs):
+            yield encode_envelope(message_to_dict(message, print_defaults))
+          yield encode_envelope({}, end_stream=True)
+        except Exception as e:
+          logger.error("Stream from %s raised %s: %s", request.path, type(e).__name__, e)
+          error = {"code": get_error_code(e), "message": str(e)}
+          yield encode_envelope({"error": error}, end_stream=True)
+
+      return Response(stream_with_context(generate()), content_type=CONNECT_STREAM_CONTENT_TYPE)
+
+    return decorated_function
+
+  return decorator
+
+
 def _parse_allocations(values: list[dict]) -> set:
   """Converts API allocation dicts to domain Allocation objects."""
 
@@ -185,11 +380,21 @@ def _parse_allocations(values: list[dict]) -> set:
   return allocations
 
 
+DASHBOARD_SECTIONS = {
+  "buckets": "buckets",
+  "unallocated_receipts": "unallocated",
+  "unallocated_count": "unallocated",
+  "unallocated_amount": "unallocated",
+}
+
+
 @app.route("/taxos.v1.TaxosApi/GetDashboard", methods=["POST"])
 @require_auth
 @rpc_endpoint(messages.GetDashboardRequest)
 def get_dashboard(req: messages.GetDashboardRequest):
-  dashboard = GetDashboard(list(req.months)).execute()
+  mask = get_read_mask_fields(req.read_mask, messages.GetDashboardResponse)
+  sections = sorted({DASHBOARD_SECTIONS[name] for name in mask if name in DASHBOARD_SECTIONS})
+  dashboard = GetDashboard(list(req.months), sections, req.unallocated_limit).execute()
   bucket_summaries = []
   for bs in dashboard.buckets:
     bucket_summaries.append(
@@ -201,16 +406,24 @@ def get_dashboard(req: messages.GetDashboardRequest):
       )
     )
 
-  unallocated_receipt_messages = [make_receipt_message(r) for r in dashboard.unallocated]
-  return messages.GetDashboardResponse(
+  receipt_fields = mask.get("unallocated_receipts")
+  unallocated_receipt_messages = [make_receipt_message(r, receipt_fields) for r in dashboard.unallocated]
+  response = messages.GetDashboardResponse(
     buckets=bucket_summaries,
     unallocated_receipts=unallocated_receipt_messages,
-    vendor_names=dashboard.vendor_names,
+    unallocated_count=dashboard.unallocated_count,
+    unallocated_amount=dashboard.unallocated_amount,
+    change_seq=dashboard.change_seq,
   )
+  # Sections are computed whole, so drop any of their fields the mask leaves out.
+  for name in set(DASHBOARD_SECTIONS) - set(mask or DASHBOARD_SECTIONS):
+    response.ClearField(name)
+  return response
 
 
 @app.route("/taxos.v1.TaxosApi/CreateBucket", methods=["POST"])
 @require_auth
+@idempotent
 @rpc_endpoint(messages.CreateBucketRequest)
 def create_bucket(req: messages.CreateBucketRequest):
   bucket = CreateBucket(
@@ -224,22 +437,28 @@ def create_bucket(req: messages.CreateBucketRequest):
 
 @app.route("/taxos.v1.TaxosApi/CreateReceipt", methods=["POST"])
 @require_auth
+@idempotent
 @rpc_endpoint(messages.CreateReceiptRequest)
 def create_receipt(req: messages.CreateReceiptRequest):
   allocations = _parse_allocations([MessageToDict(a) for a in req.allocations])
 
-  receipt = CreateReceipt(
+  command = CreateReceipt(
     vendor=req.vendor,
     total=req.total,
-    date=req.date.ToDatetime(),
+    date=req.date.ToDatetime(tzinfo=timezone.utc),
     timezone=req.timezone,
     allocations=allocations,
     vendor_ref=req.vendor_ref,
     notes=req.notes,
     hash=req.hash,
-  ).execute()
+    reject_duplicates=req.reject_duplicates,
+  )
+  receipt = command.execute()
 
-  return make_receipt_message(receipt)
+  return messages.CreateReceiptResponse(
+    receipt=make_receipt_message(receipt),
+    duplicate_guids=[r.guid.hex for r in command.duplicates],
+  )
 
 
 @app.route("/taxos.v1.TaxosApi/GetBucket", methods=["POST"])
@@ -272,13 +491,69 @@ def update_bucket(req: messages.UpdateBucketRequest):
 @require_auth
 @rpc_endpoint(messages.ListReceiptsRequest)
 def list_receipts(req: messages.ListReceiptsRequest):
-  months = list(req.months)
-  receipts = ListReceipts(months=months, bucket=req.bucket).execute()
-  receipt_messages = [make_receipt_message(r) for r in receipts]
+  receipt_fields = get_read_mask_fields(req.read_mask, messages.Receipt)
+  page = PageReceipts(
+    bucket=req.bucket or None,
+    months=list(req.months),
+    order_by=req.order_by,
+    page_size=req.page_size,
+    page_token=req.page_token,
+  ).execute()
+  receipt_messages = [make_receipt_message(r, receipt_fields) for r in page.receipts]
   logger.info(f"Returning {len(receipt_messages)} receipts for bucket {req.bucket}")
+  return messages.ListReceiptsResponse(receipts=receipt_messages, next_page_token=page.next_page_token)
+
+
+@app.route("/taxos.v1.TaxosApi/StreamReceipts", methods=["POST"])
+@require_auth
+@stream_endpoint(messages.ListReceiptsRequest)
+def stream_receipts(req: messages.ListReceiptsRequest):
+  receipt_fields = get_read_mask_fields(req.read_mask, messages.Receipt)
+  receipts = StreamReceipts(bucket=req.bucket or None, months=list(req.months)).execute()
+  while chunk := list(islice(receipts, STREAM_CHUNK_SIZE)):
+    yield messages.ListReceiptsResponse(receipts=[make_receipt_message(r, receipt_fields) for r in chunk])
+
+
+@app.route("/taxos.v1.TaxosApi/ListReceiptsByDate", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.ListReceiptsByDateRequest)
+def list_receipts_by_date(req: messages.ListReceiptsByDateRequest):
+  receipt_fields = get_read_mask_fields(req.read_mask, messages.Receipt)
+  receipts = ListReceiptsByDate(
+    start=req.start.ToDatetime(tzinfo=timezone.utc) if req.HasField("start") else None,
+    end=req.end.ToDatetime(tzinfo=timezone.utc) if req.HasField("end") else None,
+    bucket=req.bucket or None,
+  ).execute()
+  receipt_messages = [make_receipt_message(r, receipt_fields) for r in receipts]
+  logger.info(f"Returning {len(receipt_messages)} receipts dated {req.start.ToJsonString()} to {req.end.ToJsonString()}")
   return messages.ListReceiptsResponse(receipts=receipt_messages)
 
 
+@app.route("/taxos.v1.TaxosApi/ListUnallocatedReceipts", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.ListUnallocatedReceiptsRequest)
+def list_unallocated_receipts(req: messages.ListUnallocatedReceiptsRequest):
+  receipt_fields = get_read_mask_fields(req.read_mask, messages.Receipt)
+  page = ListUnallocatedReceipts(
+    months=list(req.months),
+    order_by=req.order_by,
+    page_size=req.page_size,
+    page_token=req.page_token,
+  ).execute()
+  receipt_messages = [make_receipt_message(r, receipt_fields) for r in page.receipts]
+  return messages.ListReceiptsResponse(receipts=receipt_messages, next_page_token=page.next_page_token)
+
+
+@app.route("/taxos.v1.TaxosApi/SearchReceipts", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.SearchReceiptsRequest)
+def search_receipts(req: messages.SearchReceiptsRequest):
+  receipt_fields = get_read_mask_fields(req.read_mask, messages.Receipt)
+  page = SearchReceipts(text=req.text, page_size=req.page_size, page_token=req.page_token).execute()
+  receipt_messages = [make_receipt_message(r, receipt_fields) for r in page.receipts]
+  return messages.ListReceiptsResponse(receipts=receipt_messages, next_page_token=page.next_page_token)
+
+
 @app.route("/taxos.v1.TaxosApi/DeleteBucket", methods=["POST"])
 @require_auth
 @rpc_endpoint(messages.DeleteBucketRequest)
@@ -287,6 +562,18 @@ def delete_bucket(req: messages.DeleteBucketRequest):
   return messages.DeleteBucketResponse(success=success)
 
 
+@app.route("/taxos.v1.TaxosApi/MergeBuckets", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.MergeBucketsRequest)
+def merge_buckets(req: messages.MergeBucketsRequest):
+  bucket = MergeBuckets(source=req.source, target=req.target).execute()
+
+  return messages.Bucket(
+    guid=bucket.guid.hex,
+    name=bucket.name,
+  )
+
+
 @app.route("/taxos.v1.TaxosApi/UpdateReceipt", methods=["POST"])
 @require_auth
 @rpc_endpoint(messages.UpdateReceiptRequest)
@@ -297,12 +584,13 @@ def update_receipt(req: messages.UpdateReceiptRequest):
     ref=req.guid,
     vendor=req.vendor,
     total=req.total,
-    date=req.date.ToDatetime(),
+    date=req.date.ToDatetime(tzinfo=timezone.utc),
     timezone=req.timezone,
     allocations=allocations,
     vendor_ref=req.vendor_ref,
     notes=req.notes,
     hash=req.hash,
+    expected_version=req.expected_version,
   ).execute()
 
   return make_receipt_message(receipt)
@@ -323,6 +611,7 @@ def _calculate_file_hash(file_data: bytes) -> str:
 
 @app.route("/taxos.v1.TaxosApi/UploadReceiptFile", methods=["POST"])
 @require_auth
+@idempotent
 @rpc_endpoint(messages.UploadReceiptFileRequest)
 def upload_receipt_file(req: messages.UploadReceiptFileRequest):
   client_hash = req.file_hash
@@ -335,26 +624,28 @@ def upload_receipt_file(req: messages.UploadReceiptFileRequest):
   if not filename:
     return Response(json.dumps({"error": "filename is required"}), status=400, content_type="application/json")
 
-  # Get tenant's files directory
+  # Get tenant's file locations
   tenant = require_tenant()
-  files_dir = get_files_dir(tenant.guid)
-  zip_path = files_dir / f"{client_hash}.zip"
+  zip_path = get_file_archive(tenant.guid, client_hash)
+  pending_dir = get_pending_file_dir(tenant.guid, client_hash)
 
-  # Check if file already exists
-  if zip_path.exists():
+  # Check if file already exists (possibly still waiting to be compressed)
+  existing_path = zip_path if zip_path.exists() else next(pending_dir.glob("*"), None)
+  if existing_path:
     logger.info(f"File with hash {client_hash} already exists, returning existing info")
-    file_size = zip_path.stat().st_size
+    file_size = existing_path.stat().st_size
 
     # Get upload timestamp from file modification time
-    upload_timestamp = datetime.fromtimestamp(zip_path.stat().st_mtime, tz=timezone.utc)
+    upload_timestamp = datetime.fromtimestamp(existing_path.stat().st_mtime, tz=timezone.utc)
     ts = Timestamp()
     ts.FromDatetime(upload_timestamp)
 
     file_info = messages.UploadReceiptFileInfo(
-      file_hash=client_hash, filename=filename, file_path=str(zip_path), file_size=file_size, uploaded_at=ts
+      file_hash=client_hash, filename=filename, file_path=str(existing_path), file_size=file_size, uploaded_at=ts
     )
 
-    return messages.UploadReceiptFileResponse(already_exists=True, file_info=file_info)
+    receipt_guids = [r.guid.hex for r in LoadReceiptRepo().execute().iter_by_hash(client_hash)]
+    return messages.UploadReceiptFileResponse(already_exists=True, file_info=file_info, receipt_guids=receipt_guids)
 
   # Decode file data is handled by protobuf already (bytes field)
   if not file_data:
@@ -368,13 +659,14 @@ def upload_receipt_file(req: messages.UploadReceiptFileRequest):
     logger.warning(f"Hash mismatch: client={client_hash}, calculated={calculated_hash}")
     return Response(json.dumps({"error": "File hash validation failed"}), status=400, content_type="application/json")
 
-  # Ensure files directory exists and save file as zip
-  files_dir.mkdir(parents=True, exist_ok=True)
-  with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-    zipf.writestr(filename, file_data)
+  # Stage the raw file; compressing it into the archive happens in the background
+  pending_dir.mkdir(parents=True, exist_ok=True)
+  pending_file = pending_dir / Path(filename).name
+  pending_file.write_bytes(file_data)
+  EnqueueJob(CompressFile(client_hash)).execute()
 
-  file_size = zip_path.stat().st_size
-  logger.info(f"Saved file {filename} with hash {client_hash} as {zip_path}")
+  file_size = len(file_data)
+  logger.info(f"Staged file {filename} with hash {client_hash} as {pending_file}")
 
   # Create response
   upload_timestamp = datetime.now(timezone.utc)
@@ -382,7 +674,7 @@ def upload_receipt_file(req: messages.UploadReceiptFileRequest):
   ts.FromDatetime(upload_timestamp)
 
   file_info = messages.UploadReceiptFileInfo(
-    file_hash=client_hash, filename=filename, file_path=str(zip_path), file_size=file_size, uploaded_at=ts
+    file_hash=client_hash, filename=filename, file_path=str(pending_file), file_size=file_size, uploaded_at=ts
   )
 
   return messages.UploadReceiptFileResponse(already_exists=False, file_info=file_info)
@@ -398,6 +690,140 @@ def download_receipt_file(req):
   )
 
 
+@app.route("/taxos.v1.TaxosApi/ListVendors", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.ListVendorsRequest)
+def list_vendors(req: messages.ListVendorsRequest):
+  vendors = ListVendors(prefix=req.prefix, limit=req.limit).execute()
+  return messages.ListVendorsResponse(
+    vendors=[messages.Vendor(guid=vendor.guid.hex, name=vendor.name) for vendor in vendors],
+  )
+
+
+@app.route("/taxos.v1.TaxosApi/FindDuplicateVendors", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.FindDuplicateVendorsRequest)
+def find_duplicate_vendors(req: messages.FindDuplicateVendorsRequest):
+  query = FindDuplicateVendors(min_score=req.min_score) if req.min_score else FindDuplicateVendors()
+  return messages.FindDuplicateVendorsResponse(
+    duplicates=[
+      messages.VendorDuplicate(
+        vendor=messages.Vendor(guid=d.vendor.guid.hex, name=d.vendor.name),
+        duplicate=messages.Vendor(guid=d.duplicate.guid.hex, name=d.duplicate.name),
+        score=d.score,
+      )
+      for d in query.execute()
+    ],
+  )
+
+
+@app.route("/taxos.v1.TaxosApi/MergeVendors", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.MergeVendorsRequest)
+def merge_vendors(req: messages.MergeVendorsRequest):
+  vendor = MergeVendors(source=req.source, target=req.target).execute()
+  return messages.Vendor(guid=vendor.guid.hex, name=vendor.name)
+
+
+@app.route("/taxos.v1.TaxosApi/GetVendorSummary", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.GetVendorSummaryRequest)
+def get_vendor_summary(req: messages.GetVendorSummaryRequest):
+  summaries = GetVendorSummary(
+    vendor=req.vendor or None,
+    start=req.start.ToDatetime(tzinfo=timezone.utc) if req.HasField("start") else None,
+    end=req.end.ToDatetime(tzinfo=timezone.utc) if req.HasField("end") else None,
+  ).execute()
+  return messages.GetVendorSummaryResponse(
+    summaries=[
+      messages.VendorSummary(
+        vendor=messages.Vendor(guid=s.vendor.guid.hex, name=s.vendor.name),
+        total_amount=s.total_amount,
+        receipt_count=s.receipt_count,
+        unallocated_amount=s.unallocated_amount,
+        buckets=[
+          messages.BucketSummary(
+            guid=b.guid,
+            name=b.name,
+            total_amount=b.total_amount,
+            receipt_count=b.receipt_count,
+          )
+          for b in s.buckets
+        ],
+      )
+      for s in summaries
+    ],
+  )
+
+
+@app.route("/taxos.v1.TaxosApi/AggregateReceipts", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.AggregateReceiptsRequest)
+def aggregate_receipts(req: messages.AggregateReceiptsRequest):
+  result = AggregateReceipts(
+    group_by=list(req.group_by),
+    start=req.start.ToDatetime(tzinfo=timezone.utc) if req.HasField("start") else None,
+    end=req.end.ToDatetime(tzinfo=timezone.utc) if req.HasField("end") else None,
+    buckets=list(req.buckets),
+    vendors=list(req.vendors),
+  ).execute()
+  return messages.AggregateReceiptsResponse(
+    group_by=result.group_by,
+    rows=[
+      messages.AggregateRow(keys=row.keys, total_amount=row.total_amount, receipt_count=row.receipt_count)
+      for row in result.rows
+    ],
+  )
+
+
+@app.route("/taxos.v1.TaxosApi/GetChanges", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.GetChangesRequest)
+def get_changes(req: messages.GetChangesRequest):
+  changes = GetChanges(since_seq=req.since_seq).execute()
+  return messages.GetChangesResponse(
+    seq=changes.seq,
+    resync=changes.resync,
+    receipts=[make_receipt_message(r) for r in changes.receipts],
+    buckets=[messages.Bucket(guid=b.guid.hex, name=b.name) for b in changes.buckets],
+    vendors=[messages.Vendor(guid=v.guid.hex, name=v.name) for v in changes.vendors],
+    deleted_receipts=[guid.hex for guid in changes.deleted_receipts],
+    deleted_buckets=[guid.hex for guid in changes.deleted_buckets],
+    deleted_vendors=[guid.hex for guid in changes.deleted_vendors],
+  )
+
+
+@app.route("/taxos.v1.TaxosApi/WatchChanges", methods=["POST"])
+@require_auth
+@stream_endpoint(messages.WatchChangesRequest)
+def watch_changes(req: messages.WatchChangesRequest):
+  batches = WatchChanges(since_seq=req.since_seq if req.HasField("since_seq") else None).execute()
+  for batch in batches:
+    yield messages.WatchChangesResponse(
+      changes=[
+        messages.ChangeNotice(seq=c.seq, kind=c.kind, guid=c.guid.hex, deleted=c.deleted) for c in batch.changes
+      ],
+      resync=batch.resync,
+    )
+
+
+@app.route("/taxos.v1.TaxosApi/GetJob", methods=["POST"])
+@require_auth
+@rpc_endpoint(messages.GetJobRequest)
+def get_job(req: messages.GetJobRequest):
+  job: Job = LoadJob(req.guid).execute()
+  return messages.Job(
+    guid=job.guid.hex,
+    kind=job.kind,
+    status=job.status,
+    attempts=job.attempts,
+    max_attempts=job.max_attempts,
+    error=job.error,
+    created_at=make_timestamp(job.created_at) if job.created_at else None,
+    updated_at=make_timestamp(job.updated_at) if job.updated_at else None,
+  )
+
+
 @app.route("/taxos.v1.TaxosApi/Authenticate", methods=["POST"])
 @rpc_endpoint(messages.AuthenticateRequest)
 def authenticate(req: messages.AuthenticateRequest):
@@ -408,7 +834,34 @@ def authenticate(req: messages.AuthenticateRequest):
   return messages.AuthenticateResponse(name=tenant.name)
 
 
+@app.before_request
+def start_background_work():
+  """Starts the job workers and warm-up in whichever process serves requests, however the app was launched.
+  The Werkzeug reloader's watcher process never serves any, so it never starts a second pool or warm-up.
+  A readiness probe is a request too, so the first one starts warm-up where nothing else has."""
+  worker_pool.start()
+  warm_up.start()
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+  """Readiness probe: 503 until recently active tenants have been preloaded, so traffic can wait for warm-up."""
+  body = {
+    "started": warm_up.started,
+    "ready": warm_up.ready,
+    "tenants": warm_up.total,
+    "preloaded": warm_up.done,
+    "failed": warm_up.failed,
+  }
+  return Response(json.dumps(body), status=200 if warm_up.ready else 503, content_type="application/json")
+
+
 if __name__ == "__main__":
   logging.basicConfig(level=logging.DEBUG)
+  if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    # Only the reloader's serving process drains jobs queued before the restart and warms up,
+    # without waiting for a request
+    worker_pool.start()
+    warm_up.start()
   logger.info("Starting ConnectRPC HTTP server on port 50051...")
   app.run(host="0.0.0.0", port=50051, debug=True)
@@ -5,3 +5,6 @@ DATA_DIR = ROOT_DIR / "data"
 TENANTS_DIR = DATA_DIR / "tenants"
 BUCKETS_DIR = DATA_DIR / "buckets"
 ACCESS_TOKENS_DIR = DATA_DIR / "access_tokens"
+TRASH_DIR = DATA_DIR / "trash"
+JOBS_DB_FILE = DATA_DIR / "jobs.sqlite3"
+ACCESS_LOG_FILE = DATA_DIR / "access.sqlite3"
@@ -2,6 +2,7 @@ import json
 import logging
 
 from taxos.access.authenticate_tenant.command import AuthenticateTenant
+from taxos.access.log.record.command import RecordAccess
 from taxos.access.token.tools import get_token_file
 from taxos.tenant.entity import Tenant, TenantRef
 
@@ -18,5 +19,9 @@ def handle(command: AuthenticateTenant) -> Tenant:
   token_data = json.loads(token_file.read_text())
   tenant_ref = TenantRef(token_data.get("tenant", ""))
   if tenant := tenant_ref.hydrate():
+    try:
+      RecordAccess(tenant.guid).execute()
+    except Exception as e:
+      logger.warning(f"Failed to record access for tenant {tenant.guid}: {e}")
     return tenant
   raise RuntimeError(f"Tenant not found for token: {command.token}")
@@ -0,0 +1,19 @@
+import logging
+import time
+from uuid import UUID
+
+from taxos.access.log.list.query import ListActiveTenants
+from taxos.access.log.tools import connect
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: ListActiveTenants) -> list[UUID]:
+  logger.debug(f"{query=}")
+  since = time.time() - query.since_days * 24 * 3600
+  with connect() as conn:
+    rows = conn.execute(
+      "SELECT tenant FROM tenants WHERE accessed_at >= ? ORDER BY accessed_at DESC LIMIT ?",
+      (since, query.limit),
+    ).fetchall()
+  return [UUID(row["tenant"]) for row in rows]
@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from uuid import UUID
+
+
+@dataclass
+class ListActiveTenants:
+  """List the tenants most recently active, most recent first."""
+
+  since_days: float = field(default=14, metadata={"help": "Include only tenants active within this many days."})
+  limit: int = 100
+
+  def __post_init__(self):
+    if self.since_days <= 0:
+      raise ValueError("since_days must be positive.")
+    if self.limit < 1:
+      raise ValueError("limit must be at least 1.")
+
+  def execute(self) -> list[UUID]:
+    from taxos.access.log.list.handler import handle
+
+    return handle(self)
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from uuid import UUID
+
+
+@dataclass
+class RecordAccess:
+  """Note that a tenant was active, so its data can be preloaded when the server next starts."""
+
+  tenant_guid: UUID
+
+  def __post_init__(self):
+    if not isinstance(self.tenant_guid, UUID):
+      self.tenant_guid = UUID(str(self.tenant_guid))
+
+  def execute(self) -> bool:
+    from taxos.access.log.record.handler import handle
+
+    return handle(self)
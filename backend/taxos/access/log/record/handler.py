@@ -0,0 +1,24 @@
+import logging
+import time
+
+from taxos.access.log.record.command import RecordAccess
+from taxos.access.log.tools import RETENTION, claim_record, connect
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: RecordAccess) -> bool:
+  """Returns False if the access was recorded recently enough to skip."""
+  now = time.time()
+  if not claim_record(command.tenant_guid, now):
+    return False
+
+  logger.debug(f"{command=}")
+  with connect() as conn:
+    conn.execute(
+      "INSERT INTO tenants (tenant, accessed_at) VALUES (?, ?) "
+      "ON CONFLICT (tenant) DO UPDATE SET accessed_at = excluded.accessed_at",
+      (command.tenant_guid.hex, now),
+    )
+    conn.execute("DELETE FROM tenants WHERE accessed_at < ?", (now - RETENTION,))
+  return True
@@ -0,0 +1,47 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from uuid import UUID
+
+from taxos import ACCESS_LOG_FILE
+
+# A tenant's access is written at most this often by each process, so busy tenants don't write on every request
+RECORD_INTERVAL = 300.0
+# Tenants not seen for this long are dropped from the log
+RETENTION = 90 * 24 * 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenants (
+  tenant TEXT PRIMARY KEY,
+  accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tenants_by_accessed_at ON tenants (accessed_at);
+"""
+
+# When each tenant's access was last written by this process
+_recorded: dict[UUID, float] = {}
+_recorded_lock = threading.Lock()
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+  """Opens a connection to the access log, creating the schema on first use."""
+  ACCESS_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+  conn = sqlite3.connect(ACCESS_LOG_FILE, timeout=30, isolation_level=None)
+  conn.row_factory = sqlite3.Row
+  try:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    yield conn
+  finally:
+    conn.close()
+
+
+def claim_record(tenant_guid: UUID, now: float) -> bool:
+  """Whether this process should write the tenant's access now, marking it written if so."""
+  with _recorded_lock:
+    if now - _recorded.get(tenant_guid, float("-inf")) < RECORD_INTERVAL:
+      return False
+    _recorded[tenant_guid] = now
+    return True
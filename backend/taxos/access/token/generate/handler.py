@@ -6,7 +6,7 @@ from uuid import UUID
 from taxos.access.token.entity import AccessToken
 from taxos.access.token.generate.command import GenerateAccessToken
 from taxos.access.token.tools import get_token_file
-from taxos.context.tools import require_tenant
+from taxos.context.tools import require_tenant, set_identity
 from taxos.tools import json
 
 logger = logging.getLogger(__name__)
@@ -38,6 +38,7 @@ def handle(command: GenerateAccessToken) -> AccessToken:
 
   json.dump({"tenant": tenant.guid.hex}, token_file)
   json.dump(tenant, tenant.state_file)
+  set_identity(tenant)
 
   if new_token_count > 1:
     delete_old_token(tenant.guid, new_token_count)
@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from taxos.bucket.entity import Bucket, BucketRef
+
+
+@dataclass
+class MoveAllocations:
+  """Re-point every allocation to one bucket at another, or drop them.
+  Raises Receipt.YearClosed, changing nothing, if any is on a receipt of a closed tax year."""
+
+  source: Union[Bucket, BucketRef, str]
+  target: Optional[Union[Bucket, BucketRef, str]] = field(
+    default=None,
+    metadata={"help": "Bucket to receive the allocated amounts. Default: drop the allocations."},
+  )
+
+  def __post_init__(self):
+    if not isinstance(self.source, (Bucket, BucketRef)):
+      self.source = BucketRef(self.source)
+    if self.target and not isinstance(self.target, (Bucket, BucketRef)):
+      self.target = BucketRef(self.target)
+    if self.target and self.target.guid == self.source.guid:
+      raise ValueError("Cannot move allocations to the same bucket.")
+
+  def execute(self) -> int:
+    from taxos.allocation.move.handler import handle
+
+    return handle(self)
@@ -0,0 +1,50 @@
+import dataclasses
+import logging
+
+from taxos.allocation.entity import Allocation
+from taxos.allocation.move.command import MoveAllocations
+from taxos.bucket.entity import BucketRef
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import require_tenant, set_identity
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.receipt.repo.save.command import SaveReceiptRepo
+from taxos.receipt.tools import get_state_file, lock_receipts, write_state
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: MoveAllocations) -> int:
+  """Returns the number of receipts that were changed."""
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  with lock_receipts(tenant.guid):
+    repo: ReceiptRepo = LoadReceiptRepo(for_update=True).execute()
+    source_guid = command.source.guid
+    target_guid = command.target.guid if command.target else None
+
+    # Only receipts allocated to the source bucket are read or written.
+    # Those of closed years keep the allocations they were filed with, so the bucket must stay for them.
+    receipts = list(repo.iter_by_bucket(source_guid))
+    if closed := sorted({r.date.year for r in receipts if r.date.year in repo.segments}):
+      years = ", ".join(map(str, closed))
+      raise Receipt.YearClosed(f"Bucket {source_guid.hex} has receipts in closed tax years ({years}); it must be kept.")
+    for receipt in receipts:
+      amounts = {a.bucket.guid: a.amount for a in receipt.allocations}
+      amount = amounts.pop(source_guid, 0)
+      if target_guid:
+        amounts[target_guid] = amounts.get(target_guid, 0) + amount
+
+      allocations = {Allocation(BucketRef(guid.hex), amount) for guid, amount in amounts.items()}
+      updated = dataclasses.replace(receipt, allocations=allocations)
+      write_state(updated, get_state_file(updated.guid, tenant.guid))
+      set_identity(updated)
+      repo.add(updated)
+
+    if receipts:
+      SaveReceiptRepo(repo).execute()
+      RecordChanges(ChangeKind.RECEIPT, [r.guid for r in receipts]).execute()
+  logger.info(f"Moved allocations of {len(receipts)} receipts from bucket {source_guid} to {target_guid}")
+  return len(receipts)
@@ -4,7 +4,9 @@ import os
 from taxos.bucket.create.command import CreateBucket
 from taxos.bucket.entity import Bucket
 from taxos.bucket.tools import get_state_file
-from taxos.context.tools import require_tenant
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import require_tenant, set_identity
 from taxos.tools import guid, json
 
 logger = logging.getLogger(__name__)
@@ -23,5 +25,7 @@ def handle(command: CreateBucket) -> Bucket:
   os.makedirs(state_file.parent, exist_ok=True)
 
   json.dump(bucket, state_file)
+  set_identity(bucket)
+  RecordChanges(ChangeKind.BUCKET, [bucket.guid]).execute()
 
   return bucket
@@ -1,10 +1,13 @@
 import logging
 import shutil
 
+from taxos.allocation.move.command import MoveAllocations
 from taxos.bucket.delete.command import DeleteBucket
+from taxos.bucket.entity import Bucket
 from taxos.bucket.tools import get_state_file
-from taxos.context.tools import require_bucket, require_tenant
-from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import clear_identity, require_bucket, require_tenant
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +20,10 @@ def handle(command: DeleteBucket):
     state_file = get_state_file(bucket.guid, tenant.guid)
     content_dir = state_file.parent
     if content_dir.exists():
+      MoveAllocations(bucket).execute()
       shutil.rmtree(content_dir)
-      LoadReceiptRepo(force_rebuild=True).execute()
+      clear_identity(Bucket, bucket.guid)
+      RecordChanges(ChangeKind.BUCKET, [bucket.guid], deleted=True).execute()
       return True
   except RuntimeError:
     pass  # probably does not exist
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Union
+
+from taxos.bucket.entity import Bucket, BucketRef
+
+
+@dataclass
+class MergeBuckets:
+  """Move all allocations from the source bucket into the target bucket, then delete the source."""
+
+  source: Union[Bucket, BucketRef, str]
+  target: Union[Bucket, BucketRef, str]
+
+  def __post_init__(self):
+    if not isinstance(self.source, (Bucket, BucketRef)):
+      self.source = BucketRef(self.source)
+    if not isinstance(self.target, (Bucket, BucketRef)):
+      self.target = BucketRef(self.target)
+    if self.source.guid == self.target.guid:
+      raise ValueError("Cannot merge a bucket into itself.")
+
+  def execute(self) -> Bucket:
+    from taxos.bucket.merge.handler import handle
+
+    return handle(self)
@@ -0,0 +1,29 @@
+import logging
+import shutil
+
+from taxos.allocation.move.command import MoveAllocations
+from taxos.bucket.entity import Bucket
+from taxos.bucket.merge.command import MergeBuckets
+from taxos.bucket.tools import get_content_dir
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import clear_identity, require_bucket, require_tenant
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: MergeBuckets) -> Bucket:
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  source = require_bucket(command.source)
+  target = require_bucket(command.target)
+
+  MoveAllocations(source, target).execute()
+
+  content_dir = get_content_dir(source.guid, tenant.guid)
+  if content_dir.exists():
+    shutil.rmtree(content_dir)
+    clear_identity(Bucket, source.guid)
+    RecordChanges(ChangeKind.BUCKET, [source.guid], deleted=True).execute()
+  logger.info(f"Merged bucket {source.name} into {target.name}")
+  return target
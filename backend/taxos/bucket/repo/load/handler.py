@@ -5,7 +5,9 @@ from taxos.bucket.repo.entity import BucketRepo
 from taxos.bucket.repo.load.query import LoadBucketRepo
 from taxos.bucket.tools import get_buckets_dir
 from taxos.context.tools import require_bucket, require_tenant
+from taxos.tenant.entity import Tenant
 from taxos.tools.guid import parse_guid
+from taxos.tools.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,12 @@ logger = logging.getLogger(__name__)
 def handle(query: LoadBucketRepo) -> BucketRepo:
   logger.debug(f"{query=}")
   tenant = require_tenant()
+  # Concurrent loads for the tenant share one scan of the buckets directory
+  repo, _ = single_flight((LoadBucketRepo, tenant.guid), lambda: load(tenant))
+  return repo
+
+
+def load(tenant: Tenant) -> BucketRepo:
   repo = BucketRepo()
 
   buckets_dir = get_buckets_dir(tenant.guid)
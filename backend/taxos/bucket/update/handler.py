@@ -1,10 +1,13 @@
+import dataclasses
 import logging
 import os
 
 from taxos.bucket.entity import Bucket
 from taxos.bucket.tools import get_state_file
 from taxos.bucket.update.command import UpdateBucket
-from taxos.context.tools import require_bucket, require_tenant
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import require_bucket, require_tenant, set_identity
 from taxos.tools import json
 
 logger = logging.getLogger(__name__)
@@ -13,13 +16,13 @@ logger = logging.getLogger(__name__)
 def handle(command: UpdateBucket) -> Bucket:
   logger.debug(f"{command=}")
   tenant = require_tenant()
-  bucket = require_bucket(command.ref)
-
-  bucket.name = command.name
+  bucket = dataclasses.replace(require_bucket(command.ref), name=command.name)
 
   state_file = get_state_file(bucket.guid, tenant.guid)
   os.makedirs(state_file.parent, exist_ok=True)
 
   json.dump(bucket, state_file)
+  set_identity(bucket)
+  RecordChanges(ChangeKind.BUCKET, [bucket.guid]).execute()
 
   return bucket
@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import StrEnum
+from uuid import UUID
+
+from taxos.bucket.entity import Bucket
+from taxos.receipt.entity import Receipt
+from taxos.vendor.entity import Vendor
+
+
+class ChangeKind(StrEnum):
+  RECEIPT = "receipt"
+  BUCKET = "bucket"
+  VENDOR = "vendor"
+
+
+@dataclass
+class Change:
+  seq: int
+  kind: ChangeKind
+  guid: UUID
+  deleted: bool = False
+  changed_at: datetime | None = None
+
+  def __post_init__(self):
+    if not isinstance(self.guid, UUID):
+      self.guid = UUID(self.guid)
+    self.kind = ChangeKind(self.kind)
+    self.deleted = bool(self.deleted)
+
+
+@dataclass
+class ChangeSet:
+  seq: int = field(metadata={"help": "The latest change reflected here; pass it back as since_seq."})
+  resync: bool = field(
+    default=False,
+    metadata={"help": "The changes since since_seq are no longer known, so reload everything instead."},
+  )
+  receipts: list[Receipt] = field(default_factory=list, metadata={"help": "Created or updated receipts."})
+  buckets: list[Bucket] = field(default_factory=list, metadata={"help": "Created or updated buckets."})
+  vendors: list[Vendor] = field(default_factory=list, metadata={"help": "Created or updated vendors."})
+  deleted_receipts: list[UUID] = field(default_factory=list)
+  deleted_buckets: list[UUID] = field(default_factory=list)
+  deleted_vendors: list[UUID] = field(default_factory=list)
+
+
+@dataclass
+class ChangeBatch:
+  changes: list[Change] = field(default_factory=list, metadata={"help": "In seq order; empty for a heartbeat."})
+  resync: bool = field(
+    default=False,
+    metadata={"help": "Changes were missed, so reload everything before following these."},
+  )
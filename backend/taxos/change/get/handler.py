@@ -0,0 +1,66 @@
+import logging
+from uuid import UUID
+
+from taxos.bucket.entity import Bucket, BucketRef
+from taxos.bucket.load.query import LoadBucket
+from taxos.change.entity import ChangeKind, ChangeSet
+from taxos.change.get.query import GetChanges
+from taxos.change.tools import connect, get_compacted_seq, get_latest_seq, row_to_change
+from taxos.context.tools import require_tenant
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.vendor.entity import Vendor
+from taxos.vendor.load.query import LoadVendor
+
+logger = logging.getLogger(__name__)
+
+
+def load_bucket(guid: UUID) -> Bucket | None:
+  try:
+    return LoadBucket(BucketRef(guid.hex)).execute()
+  except Bucket.DoesNotExist:
+    return None
+
+
+def load_vendor(guid: UUID) -> Vendor | None:
+  try:
+    return LoadVendor(guid.hex).execute()
+  except Vendor.DoesNotExist:
+    return None
+
+
+def handle(query: GetChanges) -> ChangeSet:
+  logger.debug(f"{query=}")
+  tenant = require_tenant()
+
+  with connect(tenant.guid) as conn:
+    seq = get_latest_seq(conn)
+    # A cursor ahead of the log means the log was reset, so it can't be trusted either
+    if query.since_seq < get_compacted_seq(conn) or query.since_seq > seq:
+      logger.info(f"Changes since {query.since_seq} are unknown, latest is {seq}")
+      return ChangeSet(seq, resync=True)
+    rows = conn.execute("SELECT * FROM changes WHERE seq > ? ORDER BY seq", (query.since_seq,)).fetchall()
+
+  # Only the latest change to each entity matters, and entities are read as they are now
+  latest: dict[tuple[ChangeKind, UUID], bool] = {}
+  for change in map(row_to_change, rows):
+    latest[change.kind, change.guid] = change.deleted
+
+  changes = ChangeSet(rows[-1]["seq"] if rows else query.since_seq)
+  repo = LoadReceiptRepo().execute() if any(kind == ChangeKind.RECEIPT for kind, _ in latest) else None
+  for (kind, guid), deleted in latest.items():
+    if kind == ChangeKind.RECEIPT:
+      if not deleted and (receipt := repo.get_by_ref(guid)):
+        changes.receipts.append(receipt)
+      else:
+        changes.deleted_receipts.append(guid)
+    elif kind == ChangeKind.BUCKET:
+      if not deleted and (bucket := load_bucket(guid)):
+        changes.buckets.append(bucket)
+      else:
+        changes.deleted_buckets.append(guid)
+    elif kind == ChangeKind.VENDOR:
+      if not deleted and (vendor := load_vendor(guid)):
+        changes.vendors.append(vendor)
+      else:
+        changes.deleted_vendors.append(guid)
+  return changes
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+
+from taxos.change.entity import ChangeSet
+
+
+@dataclass
+class GetChanges:
+  """Get the receipts, buckets and vendors created, updated or deleted since a point in the change log."""
+
+  since_seq: int = field(
+    default=0,
+    metadata={"help": "seq of the last change the caller has seen, e.g. from GetDashboard. Default: all."},
+  )
+
+  def __post_init__(self):
+    self.since_seq = int(self.since_seq)
+    if self.since_seq < 0:
+      raise ValueError("since_seq cannot be negative.")
+
+  def execute(self) -> ChangeSet:
+    from taxos.change.get.handler import handle
+
+    return handle(self)
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+from uuid import UUID
+
+from taxos.change.entity import ChangeKind
+
+
+@dataclass
+class RecordChanges:
+  """Append entities of one kind to the tenant's change log, so clients can fetch just what changed."""
+
+  kind: ChangeKind
+  guids: Iterable[UUID] = field(metadata={"help": "Entities that were created, updated or deleted."})
+  deleted: bool = False
+
+  def __post_init__(self):
+    self.kind = ChangeKind(self.kind)
+    self.guids = [guid if isinstance(guid, UUID) else UUID(guid) for guid in self.guids]
+
+  def execute(self) -> int | None:
+    from taxos.change.record.handler import handle
+
+    return handle(self)
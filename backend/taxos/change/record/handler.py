@@ -0,0 +1,42 @@
+import logging
+from datetime import datetime, timezone
+
+from taxos.change.entity import Change
+from taxos.change.record.command import RecordChanges
+from taxos.change.tools import MAX_CHANGES, connect, get_latest_seq, publish
+from taxos.context.tools import get_unit_of_work, require_tenant
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: RecordChanges) -> int | None:
+  """Returns the seq of the last recorded change, or None if recording was deferred to the unit of work."""
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  if work := get_unit_of_work():
+    work.changes.setdefault((command.kind, command.deleted), []).extend(command.guids)
+    return None
+
+  with connect(tenant.guid) as conn:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      timestamp = datetime.now(timezone.utc).timestamp()
+      conn.executemany(
+        "INSERT INTO changes (kind, guid, deleted, changed_at) VALUES (?, ?, ?, ?)",
+        [(command.kind, guid.hex, command.deleted, timestamp) for guid in command.guids],
+      )
+      seq = get_latest_seq(conn)
+      conn.execute("DELETE FROM changes WHERE seq <= ?", (seq - MAX_CHANGES,))
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+
+  # Seqs of one insert are consecutive, ending at the latest
+  first_seq = seq - len(command.guids) + 1
+  changed_at = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+  if changes := [
+    Change(first_seq + i, command.kind, guid, command.deleted, changed_at) for i, guid in enumerate(command.guids)
+  ]:
+    publish(tenant.guid, changes)
+  return seq
@@ -0,0 +1,92 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+from uuid import UUID
+
+from taxos.change.entity import Change
+from taxos.tenant.tools import get_content_dir
+
+# Older changes are dropped; clients further behind than this must resync
+MAX_CHANGES = 10_000
+
+# Queues of the change batches recorded in this process, by tenant
+_subscribers: dict[UUID, set[queue.SimpleQueue]] = {}
+_subscribers_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,
+  guid TEXT NOT NULL,
+  deleted INTEGER NOT NULL DEFAULT 0,
+  changed_at REAL NOT NULL
+);
+"""
+
+
+def get_changes_file(tenant_guid: UUID) -> Path:
+  return get_content_dir(tenant_guid) / "changes.sqlite3"
+
+
+@contextmanager
+def connect(tenant_guid: UUID) -> Iterator[sqlite3.Connection]:
+  """Opens a connection to the tenant's change log, creating the schema on first use."""
+  changes_file = get_changes_file(tenant_guid)
+  changes_file.parent.mkdir(parents=True, exist_ok=True)
+  conn = sqlite3.connect(changes_file, timeout=30, isolation_level=None)
+  conn.row_factory = sqlite3.Row
+  try:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    yield conn
+  finally:
+    conn.close()
+
+
+def get_latest_seq(conn: sqlite3.Connection) -> int:
+  """The seq of the last change ever recorded, even if it has since been compacted away."""
+  row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+  return row["seq"] if row else 0
+
+
+def get_compacted_seq(conn: sqlite3.Connection) -> int:
+  """The seq of the last change dropped from the log, or 0 if none were."""
+  first = conn.execute("SELECT MIN(seq) AS seq FROM changes").fetchone()["seq"]
+  return get_latest_seq(conn) if first is None else first - 1
+
+
+def row_to_change(row: sqlite3.Row) -> Change:
+  return Change(
+    row["seq"],
+    kind=row["kind"],
+    guid=row["guid"],
+    deleted=row["deleted"],
+    changed_at=datetime.fromtimestamp(row["changed_at"], tz=timezone.utc),
+  )
+
+
+@contextmanager
+def subscribe(tenant_guid: UUID) -> Iterator[queue.SimpleQueue]:
+  """Receives each batch of the tenant's changes recorded by this process, until the block exits."""
+  changes: queue.SimpleQueue[list[Change]] = queue.SimpleQueue()
+  with _subscribers_lock:
+    _subscribers.setdefault(tenant_guid, set()).add(changes)
+  try:
+    yield changes
+  finally:
+    with _subscribers_lock:
+      subscribers = _subscribers.get(tenant_guid, set())
+      subscribers.discard(changes)
+      if not subscribers:
+        _subscribers.pop(tenant_guid, None)
+
+
+def publish(tenant_guid: UUID, changes: list[Change]):
+  with _subscribers_lock:
+    subscribers = list(_subscribers.get(tenant_guid, ()))
+  for subscriber in subscribers:
+    subscriber.put(changes)
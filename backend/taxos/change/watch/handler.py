@@ -0,0 +1,47 @@
+import logging
+import queue
+from typing import Iterator
+
+from taxos.change.entity import ChangeBatch
+from taxos.change.tools import (
+  connect,
+  get_compacted_seq,
+  get_latest_seq,
+  row_to_change,
+  subscribe,
+)
+from taxos.change.watch.query import WatchChanges
+from taxos.context.tools import require_tenant
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: WatchChanges) -> Iterator[ChangeBatch]:
+  logger.debug(f"{query=}")
+  tenant = require_tenant()
+
+  # Subscribe before reading the log, so nothing recorded in between is lost
+  with subscribe(tenant.guid) as subscription:
+    replayed_seq = 0
+    if query.since_seq is not None:
+      with connect(tenant.guid) as conn:
+        latest_seq = get_latest_seq(conn)
+        resync = query.since_seq < get_compacted_seq(conn) or query.since_seq > latest_seq
+        rows = []
+        if not resync:
+          rows = conn.execute("SELECT * FROM changes WHERE seq > ? ORDER BY seq", (query.since_seq,)).fetchall()
+      replayed_seq = latest_seq if resync else max([query.since_seq, *(row["seq"] for row in rows)])
+      if resync:
+        yield ChangeBatch(resync=True)
+      elif rows:
+        yield ChangeBatch([row_to_change(row) for row in rows])
+
+    while True:
+      try:
+        changes = subscription.get(timeout=query.heartbeat)
+      except queue.Empty:
+        yield ChangeBatch()
+        continue
+      # Concurrent writers may publish out of order, so only skip what the replay covered
+      if changes := [change for change in changes if change.seq > replayed_seq]:
+        yield ChangeBatch(changes)
@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from taxos.change.entity import ChangeBatch
+
+
+@dataclass
+class WatchChanges:
+  """Follow the tenant's changes as this process records them, until the caller stops iterating."""
+
+  since_seq: Optional[int] = field(
+    default=None,
+    metadata={"help": "Replay logged changes after this seq first, so none are missed. Default: only new ones."},
+  )
+  heartbeat: float = field(
+    default=15.0,
+    metadata={"help": "Seconds without changes before yielding an empty batch, so dead clients are noticed."},
+  )
+
+  def __post_init__(self):
+    if self.since_seq is not None and self.since_seq < 0:
+      raise ValueError("since_seq cannot be negative.")
+    if self.heartbeat <= 0:
+      raise ValueError("heartbeat must be positive.")
+
+  def execute(self) -> Iterator[ChangeBatch]:
+    from taxos.change.watch.handler import handle
+
+    return handle(self)
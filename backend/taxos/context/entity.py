@@ -1,10 +1,29 @@
 from dataclasses import dataclass, field
-from uuid import uuid4
+from typing import Any, Hashable
+from uuid import UUID, uuid4
 
 from taxos.access.token.entity import AccessToken
 from taxos.tenant.entity import Tenant
 
 
+@dataclass
+class UnitOfWork:
+  """Writes deferred to the end of a request, so each is made once however many commands touch it."""
+
+  writes: dict[Hashable, Any] = field(
+    default_factory=dict,
+    metadata={"help": "Commands to execute on commit, by what they write; a later one replaces an earlier one."},
+  )
+  changes: dict[tuple[str, bool], list[UUID]] = field(
+    default_factory=dict,
+    metadata={"help": "Guids to append to the change log on commit, by kind and whether they were deleted."},
+  )
+  locks: list[Any] = field(
+    default_factory=list,
+    metadata={"help": "Locks taken during the work, released once it is committed; one entry per acquire."},
+  )
+
+
 @dataclass
 class Context:
   """Context for executing commands and queries, containing tenant information."""
@@ -17,6 +36,12 @@ class Context:
       "help": "A unique identifier for the current request, used for tracing and logging.",
     },
   )
+  identity_map: dict[tuple[type, UUID], Any] = field(
+    default_factory=dict,
+    repr=False,
+    metadata={"help": "Entities already loaded or saved by the current request, by type and guid."},
+  )
+  unit_of_work: UnitOfWork | None = field(default=None, repr=False)
 
   def __post_init__(self):
     if self.tenant and not isinstance(self.tenant, Tenant):
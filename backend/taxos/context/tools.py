@@ -1,12 +1,14 @@
 import contextvars
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, TypeVar
+from uuid import UUID
 
 from taxos import DATA_DIR
 from taxos.bucket.entity import Bucket, BucketRef
 from taxos.bucket.load.query import LoadBucket
-from taxos.context.entity import Context
+from taxos.context.entity import Context, UnitOfWork
 from taxos.receipt.entity import Receipt, ReceiptRef
 from taxos.receipt.load.query import LoadReceipt
 from taxos.tenant.entity import Tenant, TenantRef
@@ -19,6 +21,8 @@ logger = logging.getLogger(__name__)
 # Context variables for request-scoped data
 _context_var: contextvars.ContextVar[Optional[Context]] = contextvars.ContextVar("context", default=None)
 
+E = TypeVar("E")
+
 
 def get_default_context_file() -> Path:
   context_file = DATA_DIR / "default_context.json"
@@ -64,8 +68,12 @@ def require_context() -> Context:
 
 def require_tenant(tenant: Tenant | TenantRef | None = None) -> Tenant:
   """Get the current tenant, raising an error if none is set."""
+  if isinstance(tenant, Tenant):
+    return tenant
   if tenant:
-    return tenant.hydrate()
+    if not (found := get_identity(Tenant, tenant.guid)):
+      set_identity(found := tenant.hydrate())
+    return found
   context = require_context()
   if tenant := context.tenant:
     return tenant
@@ -100,12 +108,86 @@ def with_context(context: Context):
   return decorator
 
 
+def get_identity(cls: type[E], guid: UUID) -> E | None:
+  """The entity of the given type already loaded or saved by the current request, if any."""
+  if context := _context_var.get():
+    return context.identity_map.get((cls, guid))
+  return None
+
+
+def set_identity(entity, guid: UUID | None = None) -> None:
+  """Remember an entity for the rest of the request. Call it whenever one is written, to keep reads consistent."""
+  if context := _context_var.get():
+    context.identity_map[(type(entity), guid or entity.guid)] = entity
+
+
+def clear_identity(cls: type, guid: UUID) -> None:
+  """Forget an entity, e.g. because it was deleted."""
+  if context := _context_var.get():
+    context.identity_map.pop((cls, guid), None)
+
+
+def get_unit_of_work() -> UnitOfWork | None:
+  if context := _context_var.get():
+    return context.unit_of_work
+  return None
+
+
+def commit(work: UnitOfWork) -> None:
+  from taxos.change.record.command import RecordChanges
+
+  try:
+    for command in work.writes.values():
+      command.execute()
+    # Record only once the data is written, so clients that are notified can read it
+    for (kind, deleted), guids in work.changes.items():
+      RecordChanges(kind, dict.fromkeys(guids), deleted).execute()
+  finally:
+    while work.locks:
+      work.locks.pop().release()
+
+
+@contextmanager
+def hold_until_commit(lock) -> Iterator[None]:
+  """Acquires the reentrant lock for the block or, within a unit of work, until the work is committed,
+  so that others waiting on it only start once the deferred writes made under it are visible."""
+  lock.acquire()
+  if work := get_unit_of_work():
+    work.locks.append(lock)
+    yield
+    return
+  try:
+    yield
+  finally:
+    lock.release()
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork | None]:
+  """Defer the receipt repo and change log writes of commands executed in the block until it exits.
+  State files are still written as they change, so the deferred writes are committed even if the block raises.
+  Nested blocks join the outermost one; without a context, writes are not deferred."""
+  context = _context_var.get()
+  if context is None or context.unit_of_work is not None:
+    yield context and context.unit_of_work
+    return
+
+  work = context.unit_of_work = UnitOfWork()
+  try:
+    yield work
+  finally:
+    context.unit_of_work = None
+    commit(work)
+
+
 def require_bucket(value) -> Bucket:
   if isinstance(value, Bucket):
     return value
   elif not isinstance(value, BucketRef):
     value = BucketRef(value)
-  return LoadBucket(value).execute()
+  if not (bucket := get_identity(Bucket, value.guid)):
+    set_identity(bucket := LoadBucket(value).execute())
+  return bucket
 
 
 def require_receipt(value) -> Receipt:
@@ -115,7 +197,9 @@ def require_receipt(value) -> Receipt:
     return value
   elif not isinstance(value, ReceiptRef):
     value = ReceiptRef(value)
-  return LoadReceipt(value).execute()
+  if not (receipt := get_identity(Receipt, value.guid)):
+    set_identity(receipt := LoadReceipt(value).execute())
+  return receipt
 
 
 def require_vendor(value) -> Vendor:
@@ -125,4 +209,6 @@ def require_vendor(value) -> Vendor:
     return value
   elif not isinstance(value, VendorRef):
     value = VendorRef(value)
-  return LoadVendor(value).execute()
+  if not (vendor := get_identity(Vendor, value.guid)):
+    set_identity(vendor := LoadVendor(value).execute())
+  return vendor
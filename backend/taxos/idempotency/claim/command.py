@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+
+from taxos.idempotency.entity import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class ClaimIdempotencyKey:
+  """Claim a key for a request about to run, or get the response of the request that already used it.
+  Raises IdempotencyKey.InProgress while that request is still running,
+  and IdempotencyKey.Mismatch if the key was used for a different request."""
+
+  key: str = field(metadata={"help": "Chosen by the client, and sent again with each retry."})
+  request_hash: str = field(metadata={"help": "Digest identifying the request, e.g. of its method and body."})
+
+  def __post_init__(self):
+    self.key = str(self.key).strip()
+    if not self.key:
+      raise ValueError("Idempotency key cannot be empty.")
+    if len(self.key) > MAX_KEY_LENGTH:
+      raise ValueError(f"Idempotency key cannot be longer than {MAX_KEY_LENGTH} characters.")
+    if not self.request_hash:
+      raise ValueError("request_hash is required.")
+
+  def execute(self) -> IdempotencyKey:
+    from taxos.idempotency.claim.handler import handle
+
+    return handle(self)
@@ -0,0 +1,43 @@
+import logging
+import time
+
+from taxos.context.tools import require_tenant
+from taxos.idempotency.claim.command import ClaimIdempotencyKey
+from taxos.idempotency.entity import IdempotencyKey
+from taxos.idempotency.tools import CLAIM_TIMEOUT, MAX_KEYS, connect, row_to_key
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: ClaimIdempotencyKey) -> IdempotencyKey:
+  """Returns the key's record; if its response is None, the caller has claimed it and must complete or release it."""
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  now = time.time()
+
+  with connect(tenant.guid) as conn:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      row = conn.execute("SELECT * FROM keys WHERE key = ?", (command.key,)).fetchone()
+      if row and row["request_hash"] != command.request_hash:
+        raise IdempotencyKey.Mismatch(f"Idempotency key {command.key!r} was already used for a different request.")
+      if row and row["response"] is None and row["created_at"] > now - CLAIM_TIMEOUT:
+        raise IdempotencyKey.InProgress(f"A request with idempotency key {command.key!r} is still in progress.")
+      if row and row["response"] is not None:
+        conn.execute("COMMIT")
+        return row_to_key(row)
+
+      conn.execute(
+        "INSERT OR REPLACE INTO keys (key, request_hash, response, created_at) VALUES (?, ?, NULL, ?)",
+        (command.key, command.request_hash, now),
+      )
+      conn.execute(
+        "DELETE FROM keys WHERE key IN (SELECT key FROM keys ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+        (MAX_KEYS,),
+      )
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+
+  return IdempotencyKey(command.key, command.request_hash)
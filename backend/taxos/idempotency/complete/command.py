@@ -0,0 +1,14 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CompleteIdempotencyKey:
+  """Store the response to a request whose key was claimed, for retries to get instead of running it again."""
+
+  key: str
+  response: str = field(metadata={"help": "The serialized response."})
+
+  def execute(self) -> bool:
+    from taxos.idempotency.complete.handler import handle
+
+    return handle(self)
@@ -0,0 +1,19 @@
+import logging
+
+from taxos.context.tools import require_tenant
+from taxos.idempotency.complete.command import CompleteIdempotencyKey
+from taxos.idempotency.tools import connect
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: CompleteIdempotencyKey) -> bool:
+  """Returns False if the key was no longer claimed, e.g. because it was dropped to make room for newer ones."""
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  with connect(tenant.guid) as conn:
+    cursor = conn.execute(
+      "UPDATE keys SET response = ? WHERE key = ? AND response IS NULL",
+      (command.response, command.key),
+    )
+  return cursor.rowcount > 0
@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+@dataclass
+class IdempotencyKey:
+  """A client-chosen key for one logical request, and the response it got, so retries can be answered the same way."""
+
+  class InProgress(RuntimeError):
+    pass
+
+  class Mismatch(ValueError):
+    pass
+
+  key: str
+  request_hash: str = field(metadata={"help": "Digest of the request the key was first used with."})
+  response: str | None = field(default=None, metadata={"help": "The serialized response, once the request completed."})
+  created_at: datetime | None = None
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ReleaseIdempotencyKey:
+  """Give up a claimed key without a response, e.g. because the request failed, so a retry runs it again."""
+
+  key: str
+
+  def execute(self) -> bool:
+    from taxos.idempotency.release.handler import handle
+
+    return handle(self)
@@ -0,0 +1,15 @@
+import logging
+
+from taxos.context.tools import require_tenant
+from taxos.idempotency.release.command import ReleaseIdempotencyKey
+from taxos.idempotency.tools import connect
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: ReleaseIdempotencyKey) -> bool:
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  with connect(tenant.guid) as conn:
+    cursor = conn.execute("DELETE FROM keys WHERE key = ? AND response IS NULL", (command.key,))
+  return cursor.rowcount > 0
@@ -0,0 +1,52 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+from uuid import UUID
+
+from taxos.idempotency.entity import IdempotencyKey
+from taxos.tenant.tools import get_content_dir
+
+# Only the most recent keys are remembered; a retry after that many newer requests runs again
+MAX_KEYS = 1000
+# A claim whose request hasn't completed after this long is assumed abandoned, and may be taken over
+CLAIM_TIMEOUT = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+  key TEXT PRIMARY KEY,
+  request_hash TEXT NOT NULL,
+  response TEXT,
+  created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keys_by_created_at ON keys (created_at);
+"""
+
+
+def get_keys_file(tenant_guid: UUID) -> Path:
+  return get_content_dir(tenant_guid) / "idempotency.sqlite3"
+
+
+@contextmanager
+def connect(tenant_guid: UUID) -> Iterator[sqlite3.Connection]:
+  """Opens a connection to the tenant's idempotency keys, creating the schema on first use."""
+  keys_file = get_keys_file(tenant_guid)
+  keys_file.parent.mkdir(parents=True, exist_ok=True)
+  conn = sqlite3.connect(keys_file, timeout=30, isolation_level=None)
+  conn.row_factory = sqlite3.Row
+  try:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    yield conn
+  finally:
+    conn.close()
+
+
+def row_to_key(row: sqlite3.Row) -> IdempotencyKey:
+  return IdempotencyKey(
+    row["key"],
+    request_hash=row["request_hash"],
+    response=row["response"],
+    created_at=datetime.fromtimestamp(row["created_at"], tz=timezone.utc),
+  )
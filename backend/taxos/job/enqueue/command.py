@@ -0,0 +1,31 @@
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Any
+
+from taxos.job.entity import Job
+
+
+@dataclass
+class EnqueueJob:
+  """Queue a command to be executed in the background by the worker pool."""
+
+  command: Any = field(metadata={"help": "A command instance; its fields must be JSON-serializable."})
+  scoped: bool = field(
+    default=True,
+    metadata={"help": "If True, run the job in the current tenant's context."},
+  )
+  max_attempts: int = field(
+    default=3,
+    metadata={"help": "How many times to try the job before marking it failed."},
+  )
+
+  def __post_init__(self):
+    if not dataclasses.is_dataclass(self.command) or not callable(getattr(self.command, "execute", None)):
+      raise ValueError("command must be a dataclass with an execute method.")
+    if self.max_attempts < 1:
+      raise ValueError("max_attempts must be at least 1.")
+
+  def execute(self) -> Job:
+    from taxos.job.enqueue.handler import handle
+
+    return handle(self)
@@ -0,0 +1,39 @@
+import logging
+
+from taxos.context.tools import require_tenant
+from taxos.job.enqueue.command import EnqueueJob
+from taxos.job.entity import Job, JobStatus
+from taxos.job.tools import connect, get_kind, notify_workers, now, row_to_job
+from taxos.tools import guid, json
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: EnqueueJob) -> Job:
+  logger.debug(f"{command=}")
+  tenant_guid = require_tenant().guid.hex if command.scoped else None
+  kind = get_kind(command.command)
+  payload = json.dumps(command.command)
+
+  with connect() as conn:
+    # Identical work that has not started yet will cover this request too.
+    row = conn.execute(
+      "SELECT * FROM jobs WHERE status = ? AND kind = ? AND payload = ? AND tenant IS ?",
+      (JobStatus.PENDING, kind, payload, tenant_guid),
+    ).fetchone()
+    if row:
+      logger.info(f"Job {row['guid']} is already queued for {kind}")
+      return row_to_job(row)
+
+    timestamp = now()
+    job_guid = guid.uuid7().hex
+    conn.execute(
+      "INSERT INTO jobs (guid, kind, payload, tenant, status, max_attempts, run_after, created_at, updated_at)"
+      " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+      (job_guid, kind, payload, tenant_guid, JobStatus.PENDING, command.max_attempts, timestamp, timestamp, timestamp),
+    )
+    row = conn.execute("SELECT * FROM jobs WHERE guid = ?", (job_guid,)).fetchone()
+
+  logger.info(f"Queued job {job_guid} for {kind}")
+  notify_workers()
+  return row_to_job(row)
@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import StrEnum
+from uuid import UUID
+
+
+class JobStatus(StrEnum):
+  PENDING = "pending"
+  RUNNING = "running"
+  SUCCEEDED = "succeeded"
+  FAILED = "failed"
+
+
+@dataclass
+class Job:
+  class DoesNotExist(FileNotFoundError):
+    pass
+
+  guid: UUID
+  kind: str = field(metadata={"help": "Import path of the command class to execute."})
+  payload: dict = field(default_factory=dict, metadata={"help": "Fields used to re-create the command."})
+  tenant: UUID | None = field(default=None, metadata={"help": "Tenant whose context the job runs in, if any."})
+  status: JobStatus = JobStatus.PENDING
+  attempts: int = 0
+  max_attempts: int = 3
+  error: str = ""
+  run_after: datetime | None = None
+  created_at: datetime | None = None
+  updated_at: datetime | None = None
+
+  def __post_init__(self):
+    if not isinstance(self.guid, UUID):
+      self.guid = UUID(self.guid)
+    if self.tenant and not isinstance(self.tenant, UUID):
+      self.tenant = UUID(self.tenant)
+    self.status = JobStatus(self.status)
+
+  def __hash__(self) -> int:
+    return hash(self.guid)
+
+  @property
+  def is_finished(self) -> bool:
+    return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
@@ -0,0 +1,23 @@
+import logging
+
+from taxos.context.tools import require_tenant
+from taxos.job.entity import Job
+from taxos.job.list.query import ListJobs
+from taxos.job.tools import connect, row_to_job
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: ListJobs) -> list[Job]:
+  logger.debug(f"{query=}")
+  tenant = require_tenant()
+  sql = "SELECT * FROM jobs WHERE tenant = ?"
+  params: list = [tenant.guid.hex]
+  if query.status:
+    sql += " AND status = ?"
+    params.append(query.status)
+  sql += " ORDER BY created_at DESC LIMIT ?"
+  params.append(query.limit)
+
+  with connect() as conn:
+    return [row_to_job(row) for row in conn.execute(sql, params)]
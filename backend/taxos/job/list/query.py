@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+
+from taxos.job.entity import Job, JobStatus
+
+
+@dataclass
+class ListJobs:
+  """List the current tenant's jobs, newest first."""
+
+  status: JobStatus | str | None = field(
+    default=None,
+    metadata={"help": "Include only jobs with this status. Default: all."},
+  )
+  limit: int = 100
+
+  def __post_init__(self):
+    if self.status:
+      self.status = JobStatus(self.status)
+    if self.limit < 1:
+      raise ValueError("limit must be at least 1.")
+
+  def execute(self) -> list[Job]:
+    from taxos.job.list.handler import handle
+
+    return handle(self)
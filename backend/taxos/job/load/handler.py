@@ -0,0 +1,18 @@
+from taxos.context.tools import require_tenant
+from taxos.job.entity import Job
+from taxos.job.load.query import LoadJob
+from taxos.job.tools import connect, row_to_job
+
+
+def handle(query: LoadJob) -> Job:
+  tenant = require_tenant()
+
+  with connect() as conn:
+    row = conn.execute(
+      "SELECT * FROM jobs WHERE guid = ? AND tenant = ?",
+      (query.guid.hex, tenant.guid.hex),
+    ).fetchone()
+
+  if row:
+    return row_to_job(row)
+  raise Job.DoesNotExist(query.guid)
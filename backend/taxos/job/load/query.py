@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from uuid import UUID
+
+from taxos.job.entity import Job
+from taxos.tools.guid import parse_guid
+
+
+@dataclass
+class LoadJob:
+  """Load a job belonging to the current tenant by its GUID."""
+
+  guid: UUID
+
+  def __post_init__(self):
+    if not isinstance(self.guid, UUID):
+      if not (guid := parse_guid(str(self.guid))):
+        raise ValueError("guid must be a valid GUID.")
+      self.guid = guid
+
+  def execute(self) -> Job:
+    from taxos.job.load.handler import handle
+
+    return handle(self)
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+
+from taxos.job.entity import Job
+
+
+@dataclass
+class RunNextJob:
+  """Claim the next due job from the queue and execute it."""
+
+  worker: str = field(default="", metadata={"help": "Name of the worker claiming the job, for logging."})
+  lease_seconds: float = field(
+    default=300,
+    metadata={"help": "How long the job is reserved before another worker may retry it."},
+  )
+  retry_delay: float = field(
+    default=5,
+    metadata={"help": "Seconds to wait before the first retry; doubles on each further attempt."},
+  )
+
+  def execute(self) -> Job | None:
+    from taxos.job.run_next.handler import handle
+
+    return handle(self)
@@ -0,0 +1,82 @@
+import logging
+
+from taxos.context.entity import Context
+from taxos.context.tools import clear_context, set_context, unit_of_work
+from taxos.job.entity import Job, JobStatus
+from taxos.job.run_next.command import RunNextJob
+from taxos.job.tools import build_command, connect, now, row_to_job
+from taxos.tenant.entity import TenantRef
+
+logger = logging.getLogger(__name__)
+
+
+def claim(command: RunNextJob) -> Job | None:
+  timestamp = now()
+  with connect() as conn:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      # Running jobs whose lease expired belong to a worker that died mid-job.
+      row = conn.execute(
+        "SELECT guid FROM jobs"
+        " WHERE (status = ? AND run_after <= ?) OR (status = ? AND lease_until <= ?)"
+        " ORDER BY run_after LIMIT 1",
+        (JobStatus.PENDING, timestamp, JobStatus.RUNNING, timestamp),
+      ).fetchone()
+      if not row:
+        conn.execute("COMMIT")
+        return None
+      conn.execute(
+        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE guid = ?",
+        (JobStatus.RUNNING, timestamp + command.lease_seconds, timestamp, row["guid"]),
+      )
+      row = conn.execute("SELECT * FROM jobs WHERE guid = ?", (row["guid"],)).fetchone()
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+  return row_to_job(row)
+
+
+def finish(job: Job, command: RunNextJob, error: Exception | None = None) -> Job:
+  timestamp = now()
+  run_after = timestamp
+  if error is None:
+    status = JobStatus.SUCCEEDED
+  elif job.attempts < job.max_attempts:
+    status = JobStatus.PENDING
+    run_after += command.retry_delay * 2 ** (job.attempts - 1)
+  else:
+    status = JobStatus.FAILED
+  message = f"{type(error).__name__}: {error}" if error else ""
+
+  with connect() as conn:
+    conn.execute(
+      "UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_until = NULL, updated_at = ? WHERE guid = ?",
+      (status, message, run_after, timestamp, job.guid.hex),
+    )
+    row = conn.execute("SELECT * FROM jobs WHERE guid = ?", (job.guid.hex,)).fetchone()
+  return row_to_job(row)
+
+
+def run(job: Job):
+  job_command = build_command(job)
+  tenant = TenantRef(job.tenant.hex).hydrate() if job.tenant else None
+  set_context(Context(tenant=tenant))
+  try:
+    with unit_of_work():
+      job_command.execute()
+  finally:
+    clear_context()
+
+
+def handle(command: RunNextJob) -> Job | None:
+  if not (job := claim(command)):
+    return None
+
+  logger.info(f"Worker {command.worker!r} running job {job.guid} ({job.kind}), attempt {job.attempts}")
+  try:
+    run(job)
+  except Exception as e:
+    logger.exception(f"Job {job.guid} failed on attempt {job.attempts}: {e}")
+    return finish(job, command, e)
+  return finish(job, command)
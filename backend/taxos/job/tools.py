@@ -0,0 +1,97 @@
+import dataclasses
+import importlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator
+
+from taxos import JOBS_DB_FILE
+from taxos.job.entity import Job
+from taxos.tools import json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  guid TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  payload TEXT NOT NULL,
+  tenant TEXT,
+  status TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL,
+  error TEXT NOT NULL DEFAULT '',
+  run_after REAL NOT NULL,
+  lease_until REAL,
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS jobs_by_tenant ON jobs (tenant, created_at);
+"""
+
+# Set whenever a job is queued so idle workers pick it up without waiting for the next poll.
+_wakeup = threading.Event()
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+  """Opens a connection to the job queue, creating the schema on first use."""
+  JOBS_DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+  conn = sqlite3.connect(JOBS_DB_FILE, timeout=30, isolation_level=None)
+  conn.row_factory = sqlite3.Row
+  try:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    yield conn
+  finally:
+    conn.close()
+
+
+def now() -> float:
+  return datetime.now(timezone.utc).timestamp()
+
+
+def to_datetime(value: float | None) -> datetime | None:
+  if value is None:
+    return None
+  return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def row_to_job(row: sqlite3.Row) -> Job:
+  return Job(
+    row["guid"],
+    kind=row["kind"],
+    payload=json.loads(row["payload"]),
+    tenant=row["tenant"],
+    status=row["status"],
+    attempts=row["attempts"],
+    max_attempts=row["max_attempts"],
+    error=row["error"],
+    run_after=to_datetime(row["run_after"]),
+    created_at=to_datetime(row["created_at"]),
+    updated_at=to_datetime(row["updated_at"]),
+  )
+
+
+def get_kind(command) -> str:
+  cls = type(command)
+  return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def build_command(job: Job):
+  """Re-creates the command a job was queued with."""
+  module_name, _, class_name = job.kind.rpartition(".")
+  if not module_name.startswith("taxos."):
+    raise ValueError(f"Refusing to run job of unknown kind: {job.kind}")
+  cls = getattr(importlib.import_module(module_name), class_name)
+  init_fields = {f.name for f in dataclasses.fields(cls) if f.init}
+  return cls(**{k: v for k, v in job.payload.items() if k in init_fields})
+
+
+def notify_workers():
+  _wakeup.set()
+
+
+def wait_for_work(timeout: float) -> None:
+  if _wakeup.wait(timeout):
+    _wakeup.clear()
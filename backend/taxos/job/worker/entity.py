@@ -0,0 +1,50 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from taxos.job.run_next.command import RunNextJob
+from taxos.job.tools import notify_workers, wait_for_work
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkerPool:
+  """Background threads that drain the job queue."""
+
+  size: int = 2
+  poll_interval: float = field(
+    default=5,
+    metadata={"help": "Seconds an idle worker waits before checking for due retries."},
+  )
+  _threads: list[threading.Thread] = field(default_factory=list, init=False, repr=False)
+  _stopping: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+  _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+  def start(self):
+    with self._lock:
+      if self._threads:
+        return
+      self._stopping.clear()
+      for i in range(self.size):
+        thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+    logger.info(f"Started {self.size} job workers")
+
+  def stop(self, timeout: float | None = None):
+    self._stopping.set()
+    notify_workers()
+    for thread in self._threads:
+      thread.join(timeout)
+    self._threads.clear()
+
+  def _work(self):
+    name = threading.current_thread().name
+    while not self._stopping.is_set():
+      try:
+        if RunNextJob(worker=name).execute():
+          continue
+      except Exception as e:
+        logger.exception(f"Worker {name} failed to run a job: {e}")
+      wait_for_work(self.poll_interval)
@@ -0,0 +1,25 @@
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+
+class Dimension(StrEnum):
+  BUCKET = "bucket"
+  VENDOR = "vendor"
+  MONTH = "month"
+  QUARTER = "quarter"
+  YEAR = "year"
+
+
+@dataclass
+class AggregateRow:
+  keys: list[str] = field(
+    metadata={"help": "One label per group-by dimension; the bucket label of unallocated amounts is empty."},
+  )
+  total_amount: float = 0.0
+  receipt_count: int = 0
+
+
+@dataclass
+class ReceiptAggregate:
+  group_by: list[Dimension] = field(default_factory=list)
+  rows: list[AggregateRow] = field(default_factory=list)
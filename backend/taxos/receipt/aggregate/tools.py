@@ -0,0 +1,96 @@
+from array import array
+from datetime import datetime
+from itertools import repeat
+from typing import Iterable
+from uuid import UUID
+
+from taxos.receipt.aggregate.entity import AggregateRow, Dimension
+from taxos.receipt.columns.entity import NO_BUCKET, ReceiptColumns
+from taxos.vendor.tools import normalize_vendor_name
+
+
+def get_dimension_column(columns: ReceiptColumns, dimension: Dimension) -> array:
+  match dimension:
+    case Dimension.BUCKET:
+      return columns.bucket
+    case Dimension.VENDOR:
+      return columns.vendor
+    case Dimension.MONTH:
+      return columns.month
+    case Dimension.QUARTER:
+      return array("i", [month // 3 for month in columns.month])
+    case Dimension.YEAR:
+      return array("i", [month // 12 for month in columns.month])
+
+
+def get_dimension_label(columns: ReceiptColumns, dimension: Dimension, code: int) -> str:
+  match dimension:
+    case Dimension.BUCKET:
+      return "" if code == NO_BUCKET else columns.bucket_guids[code].hex
+    case Dimension.VENDOR:
+      return columns.vendor_labels[code]
+    case Dimension.MONTH:
+      return f"{code // 12:04d}-{code % 12 + 1:02d}"
+    case Dimension.QUARTER:
+      return f"{code // 4:04d}-Q{code % 4 + 1}"
+    case Dimension.YEAR:
+      return f"{code:04d}"
+
+
+def aggregate(
+  columns: ReceiptColumns,
+  group_by: list[Dimension],
+  start: datetime | None = None,
+  end: datetime | None = None,
+  buckets: Iterable[UUID] | None = None,
+  vendors: Iterable[str] | None = None,
+) -> list[AggregateRow]:
+  """Sums amounts and counts distinct receipts per group, in one pass over the columns.
+  Rows are sorted by their keys."""
+  start_ts = start.timestamp() if start else float("-inf")
+  end_ts = end.timestamp() if end else float("inf")
+  bucket_codes = None if buckets is None else {columns.bucket_codes.get(guid) for guid in buckets}
+  vendor_codes = None
+  if vendors is not None:
+    vendor_codes = {columns.vendor_codes.get(normalize_vendor_name(name)) for name in vendors}
+
+  # Rows of a receipt are contiguous, so remembering the last receipt seen per group is enough to
+  # count each receipt once.
+  totals: dict[tuple, list] = {}
+  keys = zip(*(get_dimension_column(columns, d) for d in group_by)) if group_by else repeat(())
+  rows = zip(keys, columns.receipt, columns.bucket, columns.vendor, columns.timestamp, columns.amount, columns.alive)
+  for key, receipt, bucket, vendor, timestamp, amount, alive in rows:
+    if not alive or timestamp < start_ts or timestamp >= end_ts:
+      continue
+    if bucket_codes is not None and bucket not in bucket_codes:
+      continue
+    if vendor_codes is not None and vendor not in vendor_codes:
+      continue
+    if (total := totals.get(key)) is None:
+      total = totals[key] = [0.0, 0, None]
+    total[0] += amount
+    if total[2] != receipt:
+      total[1] += 1
+      total[2] = receipt
+
+  result = [
+    AggregateRow([get_dimension_label(columns, d, code) for d, code in zip(group_by, key)], amount, count)
+    for key, (amount, count, _) in totals.items()
+  ]
+  return sorted(result, key=lambda row: row.keys)
+
+
+def aggregate_tiers(tiers: Iterable[ReceiptColumns], group_by: list[Dimension], **filters) -> list[AggregateRow]:
+  """Like aggregate, over the columns of a repo and of each of its segments.
+  Each receipt is in one tier only, so the groups of each tier add up."""
+  merged: dict[tuple, AggregateRow] = {}
+  for columns in tiers:
+    for row in aggregate(columns, group_by, **filters):
+      # Tiers label a vendor as they first saw it
+      key = tuple(normalize_vendor_name(k) if d == Dimension.VENDOR else k for d, k in zip(group_by, row.keys))
+      if (total := merged.get(key)) is None:
+        merged[key] = row
+      else:
+        total.total_amount += row.total_amount
+        total.receipt_count += row.receipt_count
+  return sorted(merged.values(), key=lambda row: row.keys)
@@ -7,6 +7,7 @@ from taxos.context.tools import require_receipt, require_tenant
 from taxos.receipt.attach_file.command import AttachFile
 from taxos.receipt.entity import Receipt
 from taxos.receipt.save.command import SaveReceipt
+from taxos.receipt.tools import lock_receipts
 from taxos.tenant.tools import get_files_dir
 
 logger = logging.getLogger(__name__)
@@ -15,30 +16,32 @@ logger = logging.getLogger(__name__)
 def handle(command: AttachFile) -> Receipt:
   logger.info(f"Attaching file {command.filepath} to receipt {command.receipt_ref}")
   tenant = require_tenant()
-  receipt = require_receipt(command.receipt_ref)
+  # Held from reading the receipt until it is saved, so no other write to it is undone
+  with lock_receipts(tenant.guid):
+    receipt = require_receipt(command.receipt_ref)
 
-  if receipt.hash:
-    raise FileExistsError(f"Receipt {receipt.guid} already has an attached file with hash {receipt.hash}")
+    if receipt.hash:
+      raise FileExistsError(f"Receipt {receipt.guid} already has an attached file with hash {receipt.hash}")
 
-  filepath = Path(command.filepath)
-  if not filepath.exists():
-    raise FileNotFoundError(f"File {filepath} does not exist")
+    filepath = Path(command.filepath)
+    if not filepath.exists():
+      raise FileNotFoundError(f"File {filepath} does not exist")
 
-  # 1. Calculate SHA-256 hash
-  file_content = filepath.read_bytes()
-  file_hash = hashlib.sha256(file_content).hexdigest()
+    # 1. Calculate SHA-256 hash
+    file_content = filepath.read_bytes()
+    file_hash = hashlib.sha256(file_content).hexdigest()
 
-  # 2. Create zip archive
-  files_dir = get_files_dir(tenant.guid)
-  files_dir.mkdir(parents=True, exist_ok=True)
-  zip_path = files_dir / f"{file_hash}.zip"
+    # 2. Create zip archive
+    files_dir = get_files_dir(tenant.guid)
+    files_dir.mkdir(parents=True, exist_ok=True)
+    zip_path = files_dir / f"{file_hash}.zip"
 
-  with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-    zipf.writestr(filepath.name, file_content)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+      zipf.writestr(filepath.name, file_content)
 
-  logger.info(f"Saved file {filepath.name} with hash {file_hash} to {zip_path}")
+    logger.info(f"Saved file {filepath.name} with hash {file_hash} to {zip_path}")
 
-  # 3. Update receipt hash
-  receipt.hash = file_hash
+    # 3. Update receipt hash
+    receipt.hash = file_hash
 
-  return SaveReceipt(receipt).execute()
+    return SaveReceipt(receipt).execute()
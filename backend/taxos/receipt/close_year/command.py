@@ -0,0 +1,20 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+
+@dataclass
+class CloseYear:
+  """Move a filed tax year's receipts out of the receipt repo into a read-only segment.
+  They can still be read as before, but no longer changed, so writes only pay for the open years."""
+
+  year: int = field(metadata={"help": "The tax year to close, in receipts' own timezones; must be in the past."})
+
+  def __post_init__(self):
+    self.year = int(self.year)
+    if self.year >= date.today().year:
+      raise ValueError("Only past tax years can be closed.")
+
+  def execute(self):
+    from taxos.receipt.close_year.handler import handle
+
+    return handle(self)
@@ -0,0 +1,34 @@
+import logging
+
+from taxos.context.tools import require_tenant
+from taxos.receipt.close_year.command import CloseYear
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.receipt.repo.save.command import SaveReceiptRepo
+from taxos.receipt.segment.entity import ReceiptSegment
+from taxos.receipt.segment.tools import build_segment, load_segments, write_segment
+from taxos.receipt.tools import get_segment_file, lock_receipts
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: CloseYear) -> ReceiptSegment:
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+
+  with lock_receipts(tenant.guid):
+    repo: ReceiptRepo = LoadReceiptRepo(for_update=True).execute()
+    if command.year in repo.segments:
+      raise ValueError(f"Tax year {command.year} is already closed.")
+
+    receipts = [r for month in range(1, 13) for r in repo.iter_by_month(f"{command.year:04d}-{month:02d}")]
+    # Written before the repo is saved without the year; a repo still holding it is rebuilt when next loaded
+    write_segment(get_segment_file(tenant.guid, command.year), build_segment(command.year, receipts))
+    for receipt in receipts:
+      repo.remove(receipt)
+    repo.columns.compact()
+    repo.segments = load_segments(tenant.guid)
+    SaveReceiptRepo(repo).execute()
+
+  logger.info(f"Closed tax year {command.year} for tenant {tenant.guid}, with {len(receipts)} receipts")
+  return repo.segments[command.year]
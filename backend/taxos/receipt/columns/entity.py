@@ -0,0 +1,103 @@
+from array import array
+from dataclasses import dataclass, field
+from datetime import date
+from uuid import UUID
+
+from taxos.receipt.entity import Receipt
+from taxos.vendor.tools import normalize_vendor_name
+
+NO_BUCKET = -1  # bucket code of the row holding a receipt's unallocated remainder
+COMPACT_MIN_ROWS = 1024
+
+
+def get_month_index(date: date) -> int:
+  return date.year * 12 + date.month - 1
+
+
+@dataclass
+class ReceiptColumns:
+  """Allocation-level rows of every receipt in flat typed arrays, so aggregates are one pass over
+  numbers instead of a loop over Receipt objects. Each receipt has a row per allocation, plus one
+  for any unallocated remainder. Removed receipts leave dead rows until the arrays are compacted."""
+
+  receipt: array = field(default_factory=lambda: array("i"), metadata={"help": "Receipt code."})
+  bucket: array = field(default_factory=lambda: array("i"), metadata={"help": "Bucket code, or NO_BUCKET."})
+  vendor: array = field(default_factory=lambda: array("i"), metadata={"help": "Vendor code."})
+  month: array = field(
+    default_factory=lambda: array("i"),
+    metadata={"help": "year * 12 + month - 1, in the receipt's own timezone."},
+  )
+  timestamp: array = field(default_factory=lambda: array("d"))
+  amount: array = field(default_factory=lambda: array("d"))
+  alive: bytearray = field(default_factory=bytearray)
+  rows_by_guid: dict[UUID, tuple[int, int, int]] = field(
+    default_factory=dict,
+    metadata={"help": "Receipt guid -> (receipt code, first row, row after the last)."},
+  )
+  bucket_guids: list[UUID] = field(default_factory=list, metadata={"help": "Bucket code -> guid."})
+  bucket_codes: dict[UUID, int] = field(default_factory=dict)
+  vendor_labels: list[str] = field(default_factory=list, metadata={"help": "Vendor code -> name as first seen."})
+  vendor_codes: dict[str, int] = field(default_factory=dict, metadata={"help": "Normalized vendor name -> code."})
+  next_receipt: int = 0
+  dead_rows: int = 0
+
+  def get_bucket_code(self, bucket_guid: UUID) -> int:
+    if (code := self.bucket_codes.get(bucket_guid)) is None:
+      code = self.bucket_codes[bucket_guid] = len(self.bucket_guids)
+      self.bucket_guids.append(bucket_guid)
+    return code
+
+  def get_vendor_code(self, vendor: str) -> int:
+    name = normalize_vendor_name(vendor)
+    if (code := self.vendor_codes.get(name)) is None:
+      code = self.vendor_codes[name] = len(self.vendor_labels)
+      self.vendor_labels.append(vendor.strip())
+    return code
+
+  def add(self, receipt: Receipt):
+    """Appends the receipt's rows; remove any previous version first."""
+    code, start = self.next_receipt, len(self.amount)
+    self.next_receipt += 1
+    rows = [(self.get_bucket_code(a.bucket.guid), a.amount) for a in receipt.allocations]
+    if (remainder := receipt.unallocated_amount) > 0 or not rows:
+      rows.append((NO_BUCKET, max(remainder, 0)))
+
+    vendor = self.get_vendor_code(receipt.vendor)
+    month = get_month_index(receipt.date)
+    timestamp = receipt.date.timestamp()
+    for bucket, amount in rows:
+      self.receipt.append(code)
+      self.bucket.append(bucket)
+      self.vendor.append(vendor)
+      self.month.append(month)
+      self.timestamp.append(timestamp)
+      self.amount.append(amount)
+    self.alive.extend(b"\x01" * len(rows))
+    self.rows_by_guid[receipt.guid] = (code, start, len(self.amount))
+
+  def remove(self, guid: UUID):
+    if (rows := self.rows_by_guid.pop(guid, None)) is None:
+      return
+    _, start, stop = rows
+    self.alive[start:stop] = bytes(stop - start)
+    self.dead_rows += stop - start
+    if self.dead_rows >= COMPACT_MIN_ROWS and self.dead_rows * 2 > len(self.alive):
+      self.compact()
+
+  def compact(self):
+    """Drops dead rows."""
+    keep = [i for i, alive in enumerate(self.alive) if alive]
+    for name in ("receipt", "bucket", "vendor", "month", "timestamp", "amount"):
+      column: array = getattr(self, name)
+      setattr(self, name, array(column.typecode, [column[i] for i in keep]))
+    self.alive = bytearray(b"\x01" * len(keep))
+    self.dead_rows = 0
+
+    guid_by_code = {code: guid for guid, (code, _, _) in self.rows_by_guid.items()}
+    self.rows_by_guid = {}
+    start = 0
+    for i in range(1, len(self.receipt) + 1):
+      if i == len(self.receipt) or self.receipt[i] != self.receipt[start]:
+        code = self.receipt[start]
+        self.rows_by_guid[guid_by_code[code]] = (code, start, i)
+        start = i
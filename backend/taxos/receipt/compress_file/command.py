@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CompressFile:
+  """Compress an uploaded receipt file into its archive."""
+
+  file_hash: str
+
+  def __post_init__(self):
+    if not (file_hash := str(self.file_hash or "").strip()):
+      raise ValueError("A non-empty file hash is required.")
+    self.file_hash = file_hash
+
+  def execute(self):
+    from taxos.receipt.compress_file.handler import handle
+
+    return handle(self)
@@ -0,0 +1,32 @@
+import logging
+import shutil
+import zipfile
+
+from taxos.context.tools import require_tenant
+from taxos.receipt.compress_file.command import CompressFile
+from taxos.receipt.tools import get_file_archive, get_pending_file_dir
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: CompressFile) -> bool:
+  """Returns True if an archive was written, False if there was nothing to compress."""
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  zip_path = get_file_archive(tenant.guid, command.file_hash)
+  pending_dir = get_pending_file_dir(tenant.guid, command.file_hash)
+
+  if not pending_dir.exists():
+    logger.info(f"No pending upload for hash {command.file_hash}")
+    return False
+
+  if not zip_path.exists():
+    temp_file = zip_path.with_suffix(".tmp")
+    with zipfile.ZipFile(temp_file, "w", zipfile.ZIP_DEFLATED) as zipf:
+      for file in pending_dir.iterdir():
+        zipf.write(file, file.name)
+    temp_file.replace(zip_path)
+    logger.info(f"Compressed upload with hash {command.file_hash} to {zip_path}")
+
+  shutil.rmtree(pending_dir)
+  return True
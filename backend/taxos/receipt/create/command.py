@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import Union
 
 from taxos.allocation.entity import Allocation
+from taxos.receipt.entity import Receipt
 from taxos.tools.time import parse_datetime
 
 
@@ -19,6 +20,16 @@ class CreateReceipt:
     default="",
     metadata={"help": "SHA256 hash of the receipt file."},
   )
+  reject_duplicates: bool = field(
+    default=False,
+    metadata={"help": "Fail if a receipt with the same file, or vendor, total and day, already exists."},
+  )
+  duplicates: list[Receipt] = field(
+    default_factory=list,
+    init=False,
+    repr=False,
+    metadata={"help": "Set on execute: the receipts that already looked like this one when it was created."},
+  )
 
   def __post_init__(self):
     if not self.vendor or not self.vendor.strip():
@@ -27,8 +38,7 @@ class CreateReceipt:
       raise ValueError("Total amount cannot be negative.")
     if self.allocations is None:
       self.allocations = set()
-    if not isinstance(self.date, datetime):
-      self.date = parse_datetime(self.date, self.timezone)
+    self.date = parse_datetime(self.date, self.timezone)
     self.vendor_ref = str(self.vendor_ref or "").strip()
 
   def execute(self):
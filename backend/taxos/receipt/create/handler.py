@@ -4,8 +4,10 @@ from datetime import datetime
 from taxos.context.tools import require_tenant
 from taxos.receipt.create.command import CreateReceipt
 from taxos.receipt.entity import Receipt
+from taxos.receipt.find_duplicates.query import FindDuplicateReceipts
+from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.receipt.save.command import SaveReceipt
-from taxos.receipt.tools import get_state_file
+from taxos.receipt.tools import get_state_file, lock_receipts
 from taxos.tools import guid
 from taxos.vendor.find_or_create.command import FindOrCreateVendor
 
@@ -22,21 +24,31 @@ def handle(command: CreateReceipt) -> Receipt:
   if state_file.exists() and state_file.stat().st_size > 0:
     raise RuntimeError(f"Receipt {receipt_guid} already exists.")
 
-  # Create or find vendor to enable typeahead functionality
-  if command.vendor:
-    vendor = FindOrCreateVendor(command.vendor).execute()
-    logger.debug(f"Vendor: {vendor.name} ({vendor.guid})")
-
-  receipt = Receipt(
-    receipt_guid,
-    vendor=command.vendor,
-    total=command.total,
-    date=command.date,
-    timezone=command.timezone,
-    allocations=command.allocations,
-    vendor_ref=command.vendor_ref,
-    notes=command.notes,
-    hash=command.hash,
-  )
-
-  return SaveReceipt(receipt).execute()
+  # Checked under the write lock, against the latest receipts, so concurrent duplicates can't both get in
+  with lock_receipts(tenant.guid):
+    repo = LoadReceiptRepo(for_update=True).execute()
+    command.duplicates = FindDuplicateReceipts(
+      command.vendor, command.total, command.date, command.timezone, hash=command.hash, repo=repo
+    ).execute()
+    if command.reject_duplicates and command.duplicates:
+      guids = ", ".join(r.guid.hex for r in command.duplicates)
+      raise Receipt.AlreadyExists(f"Receipt looks like a duplicate of {guids}.")
+
+    # Create or find vendor to enable typeahead functionality
+    if command.vendor:
+      vendor = FindOrCreateVendor(command.vendor).execute()
+      logger.debug(f"Vendor: {vendor.name} ({vendor.guid})")
+
+    receipt = Receipt(
+      receipt_guid,
+      vendor=command.vendor,
+      total=command.total,
+      date=command.date,
+      timezone=command.timezone,
+      allocations=command.allocations,
+      vendor_ref=command.vendor_ref,
+      notes=command.notes,
+      hash=command.hash,
+    )
+
+    return SaveReceipt(receipt).execute()
@@ -1,11 +1,14 @@
 import logging
 import shutil
 
-from taxos.context.tools import require_receipt, require_tenant
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import clear_identity, require_receipt, require_tenant
 from taxos.receipt.delete.command import DeleteReceipt
 from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.receipt.repo.update.command import UpdateReceiptRepo
-from taxos.receipt.tools import get_state_file
+from taxos.receipt.tools import get_state_file, lock_receipts
 
 logger = logging.getLogger(__name__)
 
@@ -14,17 +17,21 @@ def handle(command: DeleteReceipt):
   logger.debug(f"{command=}")
   tenant = require_tenant()
 
-  try:
-    receipt = require_receipt(command.ref)
-  except Receipt.DoesNotExist:
-    logger.warning(f"Receipt not found for deletion: {command.ref}")
-    return False
+  with lock_receipts(tenant.guid):
+    try:
+      receipt = require_receipt(command.ref)
+    except Receipt.DoesNotExist:
+      logger.warning(f"Receipt not found for deletion: {command.ref}")
+      return False
 
-  UpdateReceiptRepo(receipt, remove=True).execute()
-  receipt_guid = receipt.guid
-  state_file = get_state_file(receipt_guid, tenant.guid)
-  content_dir = state_file.parent
-  if content_dir.exists():
-    shutil.rmtree(content_dir)
-    return True
-  return False
+    LoadReceiptRepo().execute().check_open(receipt.date)
+    UpdateReceiptRepo(receipt, remove=True).execute()
+    receipt_guid = receipt.guid
+    state_file = get_state_file(receipt_guid, tenant.guid)
+    content_dir = state_file.parent
+    if content_dir.exists():
+      shutil.rmtree(content_dir)
+      clear_identity(Receipt, receipt_guid)
+      RecordChanges(ChangeKind.RECEIPT, [receipt_guid], deleted=True).execute()
+      return True
+    return False
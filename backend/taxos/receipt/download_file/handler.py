@@ -4,7 +4,7 @@ from typing import Optional, Tuple
 
 from taxos.context.tools import require_tenant
 from taxos.receipt.download_file.command import DownloadFile, DownloadFileResult
-from taxos.tenant.tools import get_files_dir
+from taxos.receipt.tools import get_file_archive, get_pending_file_dir
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +23,19 @@ def _read_first_file_from_zip(zip_path) -> Optional[Tuple[str, bytes]]:
     return filename, file_data
 
 
+def _read_first_pending_file(pending_dir) -> Optional[Tuple[str, bytes]]:
+  """Serves uploads that the background worker has not compressed yet."""
+  if not pending_dir.exists():
+    return None
+
+  try:
+    for file in pending_dir.iterdir():
+      return file.name, file.read_bytes()
+  except FileNotFoundError:
+    logger.debug(f"Pending upload {pending_dir} was removed while reading it")
+  return None
+
+
 def handle(command: DownloadFile) -> DownloadFileResult:
   logger.debug(f"{command=}")
 
@@ -30,10 +43,14 @@ def handle(command: DownloadFile) -> DownloadFileResult:
     raise ValueError("A non-empty file hash is required.")
 
   tenant = require_tenant()
-  files_dir = get_files_dir(tenant.guid)
-  zip_path = files_dir / f"{file_hash}.zip"
+  zip_path = get_file_archive(tenant.guid, file_hash)
 
   result = _read_first_file_from_zip(zip_path)
+  if result is None:
+    result = _read_first_pending_file(get_pending_file_dir(tenant.guid, file_hash))
+  if result is None:
+    # Compressed meanwhile; the archive is written before the pending upload is removed
+    result = _read_first_file_from_zip(zip_path)
   if result is None:
     raise FileNotFoundError("No file exists with the requested hash.")
 
@@ -1,3 +1,5 @@
+import hashlib
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from uuid import UUID
@@ -12,6 +14,18 @@ class Receipt:
   class DoesNotExist(FileNotFoundError):
     pass
 
+  class AlreadyExists(FileExistsError):
+    pass
+
+  class VersionConflict(RuntimeError):
+    pass
+
+  class YearClosed(ValueError):
+    pass
+
+  class UnsupportedSchema(RuntimeError):
+    pass
+
   guid: UUID
   vendor: str
   total: float
@@ -28,12 +42,25 @@ class Receipt:
   def __post_init__(self):
     if not isinstance(self.guid, UUID):
       self.guid = UUID(self.guid)
-    if isinstance(self.date, str):
-      self.date = parse_datetime(self.date, self.timezone)
+    # Always timezone-aware, in the receipt's own timezone, so dates compare and bucket by month consistently.
+    self.date = parse_datetime(self.date, self.timezone)
 
   def __hash__(self) -> int:
     return hash(self.guid)
 
+  @property
+  def unallocated_amount(self) -> float:
+    """How much of the total is not yet assigned to any bucket."""
+    return self.total - sum(a.amount for a in self.allocations)
+
+  @property
+  def version(self) -> str:
+    """Digest of the receipt's content, which changes whenever any of it does."""
+    allocations = sorted((a.bucket.guid.hex, float(a.amount)) for a in self.allocations)
+    content = [self.vendor, float(self.total), self.date.isoformat(), self.timezone, allocations]
+    content += [self.vendor_ref, self.notes, self.hash]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()[:16]
+
 
 @dataclass
 class ReceiptRef:
@@ -0,0 +1,17 @@
+import logging
+
+from taxos.receipt.entity import Receipt
+from taxos.receipt.find_duplicates.query import FindDuplicateReceipts
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: FindDuplicateReceipts) -> list[Receipt]:
+  logger.debug(f"{query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+  duplicates = {r.guid: r for r in repo.iter_by_fingerprint(query.vendor, query.total, query.date)}
+  if query.hash:
+    duplicates.update((r.guid, r) for r in repo.iter_by_hash(query.hash))
+  return sorted(duplicates.values(), key=lambda r: (r.date, r.guid))
@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Union
+
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.tools.time import parse_datetime
+
+
+@dataclass
+class FindDuplicateReceipts:
+  """Find receipts that look like the one described: the same file, or the same vendor, total and day."""
+
+  vendor: str
+  total: float
+  date: Union[datetime, str]
+  timezone: str
+  hash: str = field(
+    default="",
+    metadata={"help": "SHA256 hash of the receipt file, if any."},
+  )
+  repo: Optional[ReceiptRepo] = field(
+    default=None,
+    repr=False,
+    metadata={
+      "help": "Optional pre-loaded receipt repo to use.",
+    },
+  )
+
+  def __post_init__(self):
+    self.date = parse_datetime(self.date, self.timezone)
+
+  def execute(self) -> list[Receipt]:
+    from taxos.receipt.find_duplicates.handler import handle
+
+    return handle(self)
@@ -6,7 +6,7 @@ from taxos.bucket.entity import BucketRef
 from taxos.context.tools import require_tenant
 from taxos.receipt.entity import Receipt
 from taxos.receipt.load.query import LoadReceipt
-from taxos.receipt.tools import get_state_file
+from taxos.receipt.tools import STATE_SCHEMA, get_state_file
 from taxos.tools import json
 from taxos.tools.guid import parse_guid
 
@@ -48,12 +48,45 @@ def parse_allocations(data) -> set[Allocation]:
   return allocations
 
 
+def parse_state(state: dict) -> Receipt:
+  """A receipt from a state file in the current schema, which needs no checks beyond the Receipt's own."""
+  return Receipt(
+    state["guid"],
+    vendor=state["vendor"],
+    total=state["total"],
+    date=state["date"],
+    timezone=state["timezone"],
+    allocations={Allocation(a["bucket"], a["amount"]) for a in state["allocations"]},
+    vendor_ref=state["vendor_ref"],
+    notes=state["notes"],
+    hash=state["hash"],
+  )
+
+
 def parse_receipt(state_file: Path) -> Receipt | None:
-  if not state_file.exists():
+  try:
+    state = json.load(state_file)
+  except FileNotFoundError:
     logger.warning("Receipt state file not found: %s", state_file)
     return None
 
-  state = json.load(state_file)
+  if is_current_state(state, state_file):
+    return parse_state(state)
+  return parse_legacy_state(state, state_file)
+
+
+def is_current_state(state, state_file: Path) -> bool:
+  """Whether the state is in the current schema rather than a legacy one.
+  Raises for any other schema, e.g. one written by a newer build, rather than reading it as something it isn't."""
+  if not (isinstance(state, dict) and "schema" in state):
+    return False
+  if state["schema"] != STATE_SCHEMA:
+    raise Receipt.UnsupportedSchema(f"Unsupported receipt state schema {state['schema']} in {state_file}")
+  return True
+
+
+def parse_legacy_state(state, state_file: Path) -> Receipt | None:
+  """A receipt from a state file written before the schema was versioned; see STATE_SCHEMA."""
   logger.debug(f"Loaded receipt state from {state_file}: {state}")
   if not isinstance(state, dict):
     logger.warning("Invalid receipt state file: %s", state_file)
@@ -94,6 +127,8 @@ def handle(query: LoadReceipt) -> Receipt:
   try:
     if receipt := parse_receipt(state_file):
       return receipt
+  except Receipt.UnsupportedSchema:
+    raise  # not missing, so it must not be dropped from the repo
   except Exception as e:
     logger.exception(f"Failed loading receipt from state file {state_file}: {e}")
   raise Receipt.DoesNotExist(receipt_guid)
@@ -0,0 +1,19 @@
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+from taxos.receipt.entity import Receipt
+
+
+class ReceiptOrder(StrEnum):
+  DATE = "date"
+  TOTAL = "total"
+  VENDOR = "vendor"
+
+
+@dataclass
+class ReceiptPage:
+  receipts: list[Receipt] = field(default_factory=list)
+  next_page_token: str = field(
+    default="",
+    metadata={"help": "Pass back to fetch the following page; empty on the last page."},
+  )
@@ -0,0 +1,97 @@
+import base64
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable
+from uuid import UUID
+
+from taxos.receipt.entity import Receipt
+from taxos.receipt.page.entity import ReceiptOrder, ReceiptPage
+
+MAX_PAGE_SIZE = 1000
+
+SortKey = tuple
+
+
+def parse_order_by(order_by: str) -> tuple[ReceiptOrder, bool]:
+  """Parses e.g. "total desc" into (ReceiptOrder.TOTAL, True)."""
+  parts = order_by.split()
+  if not parts:
+    return ReceiptOrder.DATE, False
+  if len(parts) > 2 or (len(parts) == 2 and parts[1].lower() not in ("asc", "desc")):
+    raise ValueError(f"Invalid order_by: {order_by}")
+  try:
+    order = ReceiptOrder(parts[0].lower())
+  except ValueError:
+    raise ValueError(f"Cannot order receipts by {parts[0]}") from None
+  return order, len(parts) == 2 and parts[1].lower() == "desc"
+
+
+def get_sort_key(order: ReceiptOrder) -> Callable[[Receipt], SortKey]:
+  """Every key ends with the guid, so keys are unique and pages never overlap."""
+  if order == ReceiptOrder.TOTAL:
+    return lambda r: (r.total, r.guid)
+  if order == ReceiptOrder.VENDOR:
+    return lambda r: (r.vendor.casefold(), r.guid)
+  return lambda r: (r.date, r.guid)
+
+
+def encode_page_token(order_by: str, key: SortKey) -> str:
+  value, guid = key
+  if isinstance(value, datetime):
+    value = value.isoformat()
+  data = json.dumps([order_by, value, guid.hex])
+  return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_page_token(page_token: str, order_by: str) -> SortKey:
+  """Returns the sort key of the last receipt on the previous page.
+  Raises ValueError for any token that was not issued by encode_page_token for the same order_by."""
+  # binascii.Error and json.JSONDecodeError are ValueErrors; a token of the wrong shape raises TypeError
+  try:
+    token_order_by, value, guid = json.loads(base64.urlsafe_b64decode(page_token.encode()))
+  except (ValueError, TypeError):
+    raise ValueError("Invalid page_token") from None
+  if token_order_by != order_by:
+    raise ValueError("page_token was issued for a different order_by")
+
+  order, _ = parse_order_by(order_by)
+  try:
+    if order == ReceiptOrder.DATE:
+      value = datetime.fromisoformat(value)
+    elif not isinstance(value, (int, float) if order == ReceiptOrder.TOTAL else str):
+      raise TypeError(f"Unexpected {type(value).__name__} in page_token ordered by {order_by}")
+    return value, UUID(guid)
+  except (ValueError, TypeError, AttributeError):
+    raise ValueError("Invalid page_token") from None
+
+
+def paginate(
+  receipts: Iterable[Receipt],
+  order_by: str,
+  page_size: int,
+  after: SortKey | None = None,
+  presorted: bool = False,
+) -> ReceiptPage:
+  """Selects the page following `after` from unsorted receipts using a bounded heap.
+  If presorted, receipts must already be in order and start after the cursor."""
+  order, descending = parse_order_by(order_by)
+  key = get_sort_key(order)
+
+  if presorted:
+    page = list(islice(receipts, page_size + 1)) if page_size else list(receipts)
+  else:
+    if after is not None:
+      receipts = (r for r in receipts if (key(r) < after if descending else key(r) > after))
+    if page_size:
+      select = heapq.nlargest if descending else heapq.nsmallest
+      page = select(page_size + 1, receipts, key=key)
+    else:
+      page = sorted(receipts, key=key, reverse=descending)
+
+  next_page_token = ""
+  if page_size and len(page) > page_size:
+    page = page[:page_size]
+    next_page_token = encode_page_token(order_by, key(page[-1]))
+  return ReceiptPage(page, next_page_token)
@@ -1,26 +1,137 @@
+import bisect
+import heapq
+import logging
 from dataclasses import dataclass, field
-from datetime import date
+from datetime import date, datetime
+from typing import Iterable
 from uuid import UUID
-from venv import logger
 
+from taxos.receipt.columns.entity import ReceiptColumns
 from taxos.receipt.entity import Receipt, ReceiptRef
+from taxos.receipt.search.entity import SearchIndex
+from taxos.receipt.tools import get_fingerprint
 from taxos.tools.guid import parse_guid
+from taxos.vendor.tools import normalize_vendor_name
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the repo's fields change, so cached repos get rebuilt.
+VERSION = 12
 
 
 def _get_month_key(date: date) -> str:
   return date.replace(day=1).strftime("%Y-%m")
 
 
+def _get_date_key(receipt: Receipt) -> tuple[datetime, UUID]:
+  return receipt.date, receipt.guid
+
+
 @dataclass
 class ReceiptRepo:
+  version: int = field(default_factory=lambda: VERSION, init=False)
   records: dict[UUID, Receipt] = field(default_factory=dict, init=False)
   index_by_month: dict[str, set[UUID]] = field(default_factory=dict, init=False, repr=False)
+  month_by_guid: dict[UUID, str] = field(default_factory=dict, init=False, repr=False)
+  index_by_date: list[tuple[datetime, UUID]] = field(
+    default_factory=list,
+    init=False,
+    repr=False,
+    metadata={"help": "(date, guid) of every receipt, kept sorted for range queries."},
+  )
+  index_by_bucket: dict[UUID, dict[str, set[UUID]]] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "Bucket guid -> month key -> guids of receipts with an allocation to the bucket."},
+  )
+  index_unallocated: dict[str, dict[UUID, float]] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "Month key -> guid -> unallocated amount of receipts not fully allocated."},
+  )
+  index_by_vendor: dict[str, list[tuple[datetime, UUID]]] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "Normalized vendor name -> (date, guid) of its receipts, kept sorted."},
+  )
+  index_by_hash: dict[str, set[UUID]] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "File hash -> guids of the receipts it is attached to."},
+  )
+  index_by_fingerprint: dict[tuple[str, int, str], set[UUID]] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "(normalized vendor, total in cents, local day) -> guids of matching receipts."},
+  )
+  columns: ReceiptColumns = field(default_factory=ReceiptColumns, init=False, repr=False)
+  search_index: SearchIndex = field(default_factory=SearchIndex, init=False, repr=False)
+  frozen: bool = field(
+    default=False,
+    init=False,
+    repr=False,
+    metadata={"help": "Set once the repo is published for every request to read, after which it must not change."},
+  )
+  segments: dict[int, "ReceiptRepo"] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "Tax year -> read-only segment holding the closed year's receipts, read along with this repo."},
+  )
+
+  def __getstate__(self):
+    # Copies made from the pickle are drafts to change, whether or not this one was published.
+    # Segments live in files of their own, so only open years are pickled.
+    return {**vars(self), "frozen": False, "segments": {}}
+
+  def check_writable(self):
+    if self.frozen:
+      raise RuntimeError("Published receipt repos are read-only; load one for update to change it.")
+
+  def check_open(self, *dates: datetime):
+    """Raises if any of the dates falls in a closed tax year."""
+    for day in dates:
+      if day.year in self.segments:
+        raise Receipt.YearClosed(f"Tax year {day.year} is closed; its receipts can no longer change.")
+
+  def iter_segments(self, month_keys: list[str] | None = None):
+    """(segment, its months among month_keys) of the closed years to read along with this repo;
+    all of them, with None for months, if month_keys is None."""
+    for year, segment in self.segments.items():
+      if month_keys is None:
+        yield segment, None
+      elif keys := [month_key for month_key in month_keys if month_key.startswith(f"{year:04d}-")]:
+        yield segment, keys
 
   def add(self, receipt: Receipt):
-    """idempotent add/update of a receipt to the repo"""
+    """idempotent add/update of a receipt to the repo.
+    Pass a new Receipt rather than mutating the stored one, so stale index entries can be found."""
+    self.check_writable()
+    self.check_open(receipt.date)
+    self.remove(receipt)
     self.records[receipt.guid] = receipt
     month_key = _get_month_key(receipt.date)
     self.index_by_month.setdefault(month_key, set()).add(receipt.guid)
+    self.month_by_guid[receipt.guid] = month_key
+    bisect.insort(self.index_by_date, (receipt.date, receipt.guid))
+    for allocation in receipt.allocations:
+      months = self.index_by_bucket.setdefault(allocation.bucket.guid, {})
+      months.setdefault(month_key, set()).add(receipt.guid)
+    if (unallocated_amount := receipt.unallocated_amount) > 0:
+      self.index_unallocated.setdefault(month_key, {})[receipt.guid] = unallocated_amount
+    if vendor_name := normalize_vendor_name(receipt.vendor):
+      bisect.insort(self.index_by_vendor.setdefault(vendor_name, []), (receipt.date, receipt.guid))
+    if receipt.hash:
+      self.index_by_hash.setdefault(receipt.hash, set()).add(receipt.guid)
+    fingerprint = get_fingerprint(receipt.vendor, receipt.total, receipt.date)
+    self.index_by_fingerprint.setdefault(fingerprint, set()).add(receipt.guid)
+    self.columns.add(receipt)
+    self.search_index.add(receipt)
 
   def get_by_ref(self, ref: UUID | Receipt | ReceiptRef | str) -> Receipt | None:
     if isinstance(ref, UUID):
@@ -31,23 +142,187 @@ class ReceiptRepo:
       if not (guid := parse_guid(ref)):
         logger.debug(f"Invalid receipt guid string: {ref}")
         return None
-    return self.records.get(guid)
+    if (receipt := self.records.get(guid)) is None:
+      receipt = next((s.records[guid] for s in self.segments.values() if guid in s.records), None)
+    return receipt
+
+  def iter_records(self):
+    """Every receipt, in no particular order."""
+    yield from self.records.values()
+    for segment, _ in self.iter_segments():
+      yield from segment.records.values()
+
+  def iter_columns(self):
+    """The columns of this repo, then those of each segment."""
+    yield self.columns
+    for segment, _ in self.iter_segments():
+      yield segment.columns
+
+  def search(self, text: str) -> dict[UUID, float]:
+    """Scores of the receipts matching the text; see SearchIndex.search."""
+    scores = self.search_index.search(text)
+    for segment, _ in self.iter_segments():
+      scores.update(segment.search_index.search(text))
+    return scores
 
   def iter_by_month(self, month_key: str):
     guids = self.index_by_month.get(month_key, set())
     for guid in guids:
       if receipt := self.get_by_ref(guid):
         yield receipt
+    for segment, _ in self.iter_segments([month_key]):
+      yield from segment.iter_by_month(month_key)
+
+  def get_bucket_months(self, bucket_guid: UUID) -> list[str]:
+    """Keys of the months with receipts allocated to the bucket, in order."""
+    month_keys = set(self.index_by_bucket.get(bucket_guid, ()))
+    for segment, _ in self.iter_segments():
+      month_keys.update(segment.get_bucket_months(bucket_guid))
+    return sorted(month_keys)
+
+  def iter_by_bucket(self, bucket_guid: UUID, month_keys: Iterable[str] | None = None):
+    """Receipts with an allocation to the bucket, optionally only in the given months."""
+    months = self.index_by_bucket.get(bucket_guid, {})
+    month_keys = None if month_keys is None else list(month_keys)
+    for month_key in list(months if month_keys is None else month_keys):
+      for guid in list(months.get(month_key, ())):
+        if receipt := self.get_by_ref(guid):
+          yield receipt
+    for segment, keys in self.iter_segments(month_keys):
+      yield from segment.iter_by_bucket(bucket_guid, keys)
+
+  def get_bucket_totals(self, bucket_guid: UUID, month_keys: Iterable[str] | None = None) -> tuple[float, int]:
+    """Amount allocated to the bucket, and count of receipts allocating it, optionally only in the given months."""
+    amount, count = 0.0, 0
+    months = self.index_by_bucket.get(bucket_guid, {})
+    month_keys = None if month_keys is None else list(month_keys)
+    for month_key in months if month_keys is None else month_keys:
+      for guid in months.get(month_key, ()):
+        amount += sum(a.amount for a in self.records[guid].allocations if a.bucket.guid == bucket_guid)
+        count += 1
+    for segment, keys in self.iter_segments(month_keys):
+      segment_amount, segment_count = segment.get_bucket_totals(bucket_guid, keys)
+      amount += segment_amount
+      count += segment_count
+    return amount, count
+
+  def iter_unallocated(self, month_keys: Iterable[str] | None = None):
+    """Receipts not fully allocated to buckets, optionally only in the given months."""
+    month_keys = None if month_keys is None else list(month_keys)
+    for month_key in list(self.index_unallocated if month_keys is None else month_keys):
+      for guid in list(self.index_unallocated.get(month_key, ())):
+        if receipt := self.get_by_ref(guid):
+          yield receipt
+    for segment, keys in self.iter_segments(month_keys):
+      yield from segment.iter_unallocated(keys)
+
+  def get_unallocated_totals(self, month_keys: Iterable[str] | None = None) -> tuple[int, float]:
+    """Count and summed unallocated amount of receipts not fully allocated."""
+    count, amount = 0, 0.0
+    month_keys = None if month_keys is None else list(month_keys)
+    for month_key in self.index_unallocated if month_keys is None else month_keys:
+      amounts = self.index_unallocated.get(month_key, {})
+      count += len(amounts)
+      amount += sum(amounts.values())
+    for segment, keys in self.iter_segments(month_keys):
+      segment_count, segment_amount = segment.get_unallocated_totals(keys)
+      count += segment_count
+      amount += segment_amount
+    return count, amount
+
+  def count_by_vendor(self, vendor_name: str) -> int:
+    count = len(self.index_by_vendor.get(normalize_vendor_name(vendor_name), ()))
+    return count + sum(segment.count_by_vendor(vendor_name) for segment, _ in self.iter_segments())
+
+  def iter_by_vendor(self, vendor_name: str, start: datetime | None = None, end: datetime | None = None):
+    """Receipts naming the vendor (ignoring case and spacing), dated from start (inclusive)
+    to end (exclusive), in date order."""
+    entries = self.index_by_vendor.get(normalize_vendor_name(vendor_name), [])
+    lo = bisect.bisect_left(entries, (start,)) if start else 0
+    hi = bisect.bisect_left(entries, (end,)) if end else len(entries)
+    receipts = (receipt for _, guid in entries[lo:hi] if (receipt := self.records.get(guid)))
+    if self.segments:
+      segments = [segment.iter_by_vendor(vendor_name, start, end) for segment, _ in self.iter_segments()]
+      receipts = heapq.merge(receipts, *segments, key=_get_date_key)
+    yield from receipts
+
+  def iter_by_hash(self, file_hash: str):
+    """Receipts the file is attached to."""
+    for guid in list(self.index_by_hash.get(file_hash, ())):
+      if receipt := self.get_by_ref(guid):
+        yield receipt
+    for segment, _ in self.iter_segments():
+      yield from segment.iter_by_hash(file_hash)
+
+  def iter_by_fingerprint(self, vendor: str, total: float, date: datetime):
+    """Receipts from the same vendor (ignoring case and spacing), for the same total, on the same local day."""
+    for guid in list(self.index_by_fingerprint.get(get_fingerprint(vendor, total, date), ())):
+      if receipt := self.get_by_ref(guid):
+        yield receipt
+    for segment, _ in self.iter_segments():
+      yield from segment.iter_by_fingerprint(vendor, total, date)
+
+  def iter_by_date(
+    self,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after: tuple[datetime, UUID] | None = None,
+    reverse: bool = False,
+  ):
+    """Receipts dated from start (inclusive) to end (exclusive), in date order.
+    Iteration resumes past the (date, guid) key `after`, in either direction."""
+    lo = bisect.bisect_left(self.index_by_date, (start,)) if start else 0
+    hi = bisect.bisect_left(self.index_by_date, (end,)) if end else len(self.index_by_date)
+    if after and reverse:
+      hi = min(hi, bisect.bisect_left(self.index_by_date, after))
+    elif after:
+      lo = max(lo, bisect.bisect_right(self.index_by_date, after))
+    positions = range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)
+    receipts = (receipt for i in positions if (receipt := self.records.get(self.index_by_date[i][1])))
+    if self.segments:
+      segments = [segment.iter_by_date(start, end, after, reverse) for segment, _ in self.iter_segments()]
+      receipts = heapq.merge(receipts, *segments, key=_get_date_key, reverse=reverse)
+    yield from receipts
 
   def remove(self, receipt: Receipt | ReceiptRef):
     """idempotent remove of a receipt from the repo"""
-    months_to_remove = set()
+    self.check_writable()
     if found := self.records.get(receipt.guid):
-      for key, guids in self.index_by_month.items():
-        if found.guid in guids:
-          guids.remove(found.guid)
+      month_key = self.month_by_guid.pop(found.guid)
+      if guids := self.index_by_month.get(month_key):
+        guids.discard(found.guid)
+        if not guids:
+          del self.index_by_month[month_key]
+      key = (found.date, found.guid)
+      i = bisect.bisect_left(self.index_by_date, key)
+      if i < len(self.index_by_date) and self.index_by_date[i] == key:
+        del self.index_by_date[i]
+      for allocation in found.allocations:
+        months = self.index_by_bucket.get(allocation.bucket.guid, {})
+        if guids := months.get(month_key):
+          guids.discard(found.guid)
+          if not guids:
+            del months[month_key]
+        if not months:
+          self.index_by_bucket.pop(allocation.bucket.guid, None)
+      if (amounts := self.index_unallocated.get(month_key)) and amounts.pop(found.guid, None) is not None:
+        if not amounts:
+          del self.index_unallocated[month_key]
+      vendor_name = normalize_vendor_name(found.vendor)
+      if entries := self.index_by_vendor.get(vendor_name):
+        i = bisect.bisect_left(entries, key)
+        if i < len(entries) and entries[i] == key:
+          del entries[i]
+        if not entries:
+          del self.index_by_vendor[vendor_name]
+      for index, key in (
+        (self.index_by_hash, found.hash),
+        (self.index_by_fingerprint, get_fingerprint(found.vendor, found.total, found.date)),
+      ):
+        if (guids := index.get(key)) is not None:
+          guids.discard(found.guid)
           if not guids:
-            months_to_remove.add(key)
+            del index[key]
+      self.columns.remove(found.guid)
+      self.search_index.remove(found.guid)
       del self.records[found.guid]
-    for key in months_to_remove:
-      del self.index_by_month[key]
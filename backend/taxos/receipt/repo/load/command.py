@@ -11,6 +11,12 @@ class LoadReceiptRepo:
       "help": "If True, force rebuild the receipt repo instead of loading from cache.",
     },
   )
+  for_update: bool = field(
+    default=False,
+    metadata={
+      "help": "If True, get a copy to change and save, instead of the published repo, which is read-only.",
+    },
+  )
 
   def execute(self) -> ReceiptRepo:
     from taxos.receipt.repo.load.handler import handle
@@ -1,16 +1,28 @@
+import dataclasses
 import logging
+import os
 import pickle
 
 from taxos.bucket.entity import Bucket
-from taxos.context.tools import require_bucket, require_receipt, require_tenant
+from taxos.context.tools import (
+  get_identity,
+  require_bucket,
+  require_receipt,
+  require_tenant,
+  set_identity,
+)
 from taxos.receipt.entity import Receipt
-from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.entity import VERSION, ReceiptRepo
 from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.receipt.repo.save.command import SaveReceiptRepo
+from taxos.receipt.repo.tools import get_publish_lock, get_published, publish
+from taxos.receipt.segment.tools import load_segments
 from taxos.receipt.tools import get_repo_file
 from taxos.tenant.entity import Tenant
 from taxos.tenant.tools import get_receipts_dir
+from taxos.tools.file_stamp import get_stamp, stamp_file
 from taxos.tools.guid import parse_guid
+from taxos.tools.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +30,15 @@ logger = logging.getLogger(__name__)
 def rebuild(tenant: Tenant) -> ReceiptRepo:
   logger.info(f"Rebuilding receipt repo for tenant {tenant.guid}")
   repo = ReceiptRepo()
+  repo.segments = load_segments(tenant.guid)
   receipts_dir = get_receipts_dir(tenant.guid)
 
   if not receipts_dir.exists():
     logger.warning(f"Receipts directory does not exist for tenant {tenant.guid}: {receipts_dir}")
     return repo
 
+  # The receipts of closed years are in their segments; their state files needn't be read
+  closed = {guid for segment in repo.segments.values() for guid in segment.records}
   for receipt_dir in receipts_dir.iterdir():
     if not receipt_dir.is_dir():
       logger.debug(f"Skipping non-directory in receipts dir: {receipt_dir}")
@@ -33,14 +48,24 @@ def rebuild(tenant: Tenant) -> ReceiptRepo:
       logger.debug(f"Skipping non-guid directory in receipts dir: {receipt_dir}")
       continue
 
+    if receipt_guid in closed:
+      continue
+
     try:
       receipt = require_receipt(receipt_guid)
+      if receipt.date.year in repo.segments:
+        continue
+      allocations = set()
       for allocation in receipt.allocations:
         try:
           require_bucket(allocation.bucket)
         except Bucket.DoesNotExist as e:
-          allocation.amount = 0
+          allocation = dataclasses.replace(allocation, amount=0)
           logger.warning(f"Failed to get bucket for allocation in receipt {receipt_guid}: {e}")
+        allocations.add(allocation)
+      if allocations != receipt.allocations:
+        # Change a copy; the receipt is the request's cached instance, which must still match its state file
+        receipt = dataclasses.replace(receipt, allocations=allocations)
       repo.add(receipt)
     except Receipt.DoesNotExist:
       logger.warning(f"Skipping missing receipt during rebuild: {receipt_guid}")
@@ -49,22 +74,86 @@ def rebuild(tenant: Tenant) -> ReceiptRepo:
   return repo
 
 
-def handle(command: LoadReceiptRepo) -> ReceiptRepo:
-  logger.debug(f"{command=}")
-  tenant = require_tenant()
+def load(tenant: Tenant, force_rebuild: bool) -> tuple[ReceiptRepo, bytes]:
+  """The repo, rebuilt if missing, unreadable or outdated, and its pickled form."""
   repo_file = get_repo_file(tenant.guid)
-
-  if repo_file.exists() and command.force_rebuild:
+  if repo_file.exists() and force_rebuild:
     logger.info(f"Deleting receipt repo for tenant {tenant.guid} due to force_rebuild")
     repo_file.unlink()
 
   if not repo_file.exists():
     logger.info(f"No receipt index found for tenant {tenant.guid}")
-    return rebuild(tenant)
+    repo = rebuild(tenant)
+    return repo, pickle.dumps(repo)
 
   try:
-    repo = pickle.load(repo_file.open("rb"))
-    return repo
+    with repo_file.open("rb") as f:
+      data = f.read()
+      stamp = get_stamp(os.fstat(f.fileno()))
+    repo = pickle.loads(data)
   except Exception as e:
     logger.warning(f"Failed to load receipt repo from file: {e}")
-    return rebuild(tenant)
+    repo = rebuild(tenant)
+    return repo, pickle.dumps(repo)
+
+  # Look in the instance dict; the class default would hide a missing version.
+  if vars(repo).get("version") != VERSION:
+    logger.info(f"Receipt repo for tenant {tenant.guid} is outdated")
+    repo = rebuild(tenant)
+    return repo, pickle.dumps(repo)
+
+  repo.segments = load_segments(tenant.guid)
+  if any(int(month_key[:4]) in repo.segments for month_key in repo.index_by_month):
+    # A year was closed, but the repo it was taken out of was not saved
+    logger.info(f"Receipt repo for tenant {tenant.guid} holds receipts of closed years")
+    repo = rebuild(tenant)
+    return repo, pickle.dumps(repo)
+
+  with get_publish_lock(tenant.guid):
+    # A writer that replaced the file since it was read has published its newer version already
+    if stamp_file(repo_file) != stamp:
+      repo.frozen = True  # still read-only, so writers copy it
+    else:
+      publish(tenant.guid, repo, data, stamp)
+  return repo, data
+
+
+def copy(repo: ReceiptRepo, data: bytes) -> ReceiptRepo:
+  """A draft of the repo to change, from its pickled form."""
+  draft = pickle.loads(data)
+  draft.segments = repo.segments  # never changed, so shared
+  return draft
+
+
+def get_current(tenant: Tenant, force_rebuild: bool, for_update: bool) -> tuple[ReceiptRepo, bytes]:
+  """The latest version of the repo, and its pickled form."""
+  if not force_rebuild and (published := get_published(tenant.guid)):
+    return published
+
+  if for_update:
+    # Writers hold the tenant's write lock, so nothing is written while they read; a load started by
+    # readers before the lock was taken may return an older version, so they don't wait on one.
+    return load(tenant, force_rebuild)
+
+  # Concurrent loads for the tenant wait on one read (or rebuild) instead of each doing their own
+  key = (LoadReceiptRepo, tenant.guid, force_rebuild)
+  (repo, data), leader = single_flight(key, lambda: load(tenant, force_rebuild))
+  if not leader and not repo.frozen:
+    repo = copy(repo, data)  # an unpublished rebuild may still be changed by the request that made it
+  return repo, data
+
+
+def handle(command: LoadReceiptRepo) -> ReceiptRepo:
+  logger.debug(f"{command=}")
+  tenant = require_tenant()
+  # Reads within a request see the version current when it first loaded the repo, or its own changes
+  if not command.force_rebuild and (repo := get_identity(ReceiptRepo, tenant.guid)):
+    if not (command.for_update and repo.frozen):
+      return repo
+
+  repo, data = get_current(tenant, command.force_rebuild, command.for_update)
+  if command.for_update and repo.frozen:
+    # Writers change a copy, which replaces the published version once saved
+    repo = copy(repo, data)
+  set_identity(repo, tenant.guid)
+  return repo
@@ -1,9 +1,11 @@
 import logging
 import pickle
 
-from taxos.context.tools import require_tenant
+from taxos.context.tools import get_unit_of_work, require_tenant, set_identity
 from taxos.receipt.repo.save.command import SaveReceiptRepo
+from taxos.receipt.repo.tools import get_publish_lock, publish
 from taxos.receipt.tools import get_repo_file
+from taxos.tools.file_stamp import get_stamp
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +13,16 @@ logger = logging.getLogger(__name__)
 def handle(command: SaveReceiptRepo):
   logger.debug(f"{command=}")
   tenant = require_tenant()
+  set_identity(command.repo, tenant.guid)
+  if work := get_unit_of_work():
+    work.writes[(SaveReceiptRepo, tenant.guid)] = command
+    return
+
   repo_file = get_repo_file(tenant.guid)
   repo_file.parent.mkdir(parents=True, exist_ok=True)
   temp_file = repo_file.with_suffix(".tmp")
-  pickle.dump(command.repo, open(temp_file, "wb"))
-  temp_file.replace(repo_file)
+  data = pickle.dumps(command.repo)
+  with get_publish_lock(tenant.guid):
+    temp_file.write_bytes(data)
+    temp_file.replace(repo_file)
+    publish(tenant.guid, command.repo, data, get_stamp(repo_file.stat()))
@@ -0,0 +1,34 @@
+import threading
+from uuid import UUID
+
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.tools import get_repo_file
+from taxos.tools.file_stamp import FileStamp, stamp_file
+
+# The published version of each tenant's receipt repo, shared by every request in this process:
+# (repo, pickled repo, stamp of the repo file it was read from or written to).
+# Published repos never change; writers change a copy, then publish that in its place.
+_published: dict[UUID, tuple[ReceiptRepo, bytes, FileStamp]] = {}
+# Per-tenant locks keeping the repo file and published version in step
+_publish_locks: dict[UUID, threading.Lock] = {}
+_publish_locks_guard = threading.Lock()
+
+
+def get_publish_lock(tenant_guid: UUID) -> threading.Lock:
+  with _publish_locks_guard:
+    return _publish_locks.setdefault(tenant_guid, threading.Lock())
+
+
+def get_published(tenant_guid: UUID) -> tuple[ReceiptRepo, bytes] | None:
+  """The published repo and its pickle, unless the repo file has been replaced since, e.g. by another process."""
+  if not (published := _published.get(tenant_guid)):
+    return None
+  repo, data, published_stamp = published
+  return (repo, data) if stamp_file(get_repo_file(tenant_guid)) == published_stamp else None
+
+
+def publish(tenant_guid: UUID, repo: ReceiptRepo, data: bytes, stamp: FileStamp) -> None:
+  """Makes the repo the one new requests read.
+  Hold the tenant's publish lock from writing the repo file until this returns."""
+  repo.frozen = True
+  _published[tenant_guid] = (repo, data, stamp)
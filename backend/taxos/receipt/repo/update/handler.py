@@ -1,11 +1,12 @@
 import logging
 
-from taxos.context.tools import require_receipt
+from taxos.context.tools import require_receipt, require_tenant
 from taxos.receipt.entity import Receipt
 from taxos.receipt.repo.entity import ReceiptRepo
 from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.receipt.repo.save.command import SaveReceiptRepo
 from taxos.receipt.repo.update.command import UpdateReceiptRepo
+from taxos.receipt.tools import lock_receipts
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +21,14 @@ def handle(command: UpdateReceiptRepo) -> bool:
     return False
 
   try:
-    repo: ReceiptRepo = LoadReceiptRepo().execute()
-    # Remove first to ensure it is updated if it already exists.
-    repo.remove(receipt)
-    if not command.remove:
-      repo.add(receipt)
-    SaveReceiptRepo(repo).execute()
+    # Held until the repo is published, so the next writer starts from this version of it
+    with lock_receipts(require_tenant().guid):
+      repo: ReceiptRepo = LoadReceiptRepo(for_update=True).execute()
+      # Remove first to ensure it is updated if it already exists.
+      repo.remove(receipt)
+      if not command.remove:
+        repo.add(receipt)
+      SaveReceiptRepo(repo).execute()
     return True
   except Exception as e:
     logger.error(f"Failed to update receipt repo: {e}")
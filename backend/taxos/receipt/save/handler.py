@@ -1,14 +1,20 @@
-from taxos.context.tools import require_tenant
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import require_tenant, set_identity
+from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.receipt.repo.update.command import UpdateReceiptRepo
 from taxos.receipt.save.command import SaveReceipt
-from taxos.receipt.tools import get_state_file
-from taxos.tools import json
+from taxos.receipt.tools import get_state_file, lock_receipts, write_state
 
 
 def handle(command: SaveReceipt):
   tenant = require_tenant()
   receipt = command.receipt
-  state_file = get_state_file(receipt.guid, tenant.guid)
-  json.dump(receipt, state_file)
-  UpdateReceiptRepo(receipt).execute()
-  return receipt
+  with lock_receipts(tenant.guid):
+    LoadReceiptRepo().execute().check_open(receipt.date)
+    state_file = get_state_file(receipt.guid, tenant.guid)
+    write_state(receipt, state_file)
+    set_identity(receipt)
+    UpdateReceiptRepo(receipt).execute()
+    RecordChanges(ChangeKind.RECEIPT, [receipt.guid]).execute()
+    return receipt
@@ -0,0 +1,80 @@
+import bisect
+import math
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from taxos.receipt.entity import Receipt
+from taxos.receipt.search.tools import PREFIX_WEIGHT, get_term_weights, tokenize
+
+
+@dataclass
+class SearchIndex:
+  """Inverted index of the words in receipts' vendor, vendor_ref and notes."""
+
+  postings: dict[str, dict[UUID, float]] = field(
+    default_factory=dict,
+    metadata={"help": "Word -> guid -> weight of the word in the receipt."},
+  )
+  terms: list[str] = field(
+    default_factory=list,
+    metadata={"help": "Every indexed word, kept sorted for prefix lookups."},
+  )
+  terms_by_guid: dict[UUID, list[str]] = field(default_factory=dict)
+
+  def add(self, receipt: Receipt):
+    """Indexes the receipt's words; remove any previous version first."""
+    if not (weights := get_term_weights(receipt)):
+      return
+    self.terms_by_guid[receipt.guid] = list(weights)
+    for term, weight in weights.items():
+      if (postings := self.postings.get(term)) is None:
+        postings = self.postings[term] = {}
+        bisect.insort(self.terms, term)
+      postings[receipt.guid] = weight
+
+  def remove(self, guid: UUID):
+    for term in self.terms_by_guid.pop(guid, ()):
+      postings = self.postings[term]
+      postings.pop(guid, None)
+      if not postings:
+        del self.postings[term]
+        del self.terms[bisect.bisect_left(self.terms, term)]
+
+  def iter_terms(self, prefix: str):
+    i = bisect.bisect_left(self.terms, prefix)
+    while i < len(self.terms) and self.terms[i].startswith(prefix):
+      yield self.terms[i]
+      i += 1
+
+  def search(self, text: str) -> dict[UUID, float]:
+    """Scores of the receipts matching every word of the text, in full or as a prefix.
+    Rare words, and words in the vendor name, score highest."""
+    receipt_count = len(self.terms_by_guid)
+    matches: list[tuple[int, list[tuple[dict[UUID, float], float]]]] = []
+    for token in dict.fromkeys(tokenize(text)):
+      boosts = []
+      for term in self.iter_terms(token):
+        postings = self.postings[term]
+        boost = math.log(1 + receipt_count / len(postings)) * (1.0 if term == token else PREFIX_WEIGHT)
+        boosts.append((postings, boost))
+      if not boosts:
+        return {}
+      matches.append((sum(len(postings) for postings, _ in boosts), boosts))
+
+    # Start from the rarest word, so common ones only need checking against its few matches
+    result: dict[UUID, float] | None = None
+    for size, boosts in sorted(matches, key=lambda match: match[0]):
+      scores: dict[UUID, float] = {}
+      if result is None or size < len(result) * len(boosts):
+        for postings, boost in boosts:
+          for guid, weight in postings.items():
+            if (score := weight * boost) > scores.get(guid, 0.0):
+              scores[guid] = score
+      else:
+        for guid in result:
+          if score := max((p[guid] * boost for p, boost in boosts if guid in p), default=0.0):
+            scores[guid] = score
+      result = scores if result is None else {g: s + scores[g] for g, s in result.items() if g in scores}
+      if not result:
+        return {}
+    return result or {}
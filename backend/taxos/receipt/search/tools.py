@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+import re
+from uuid import UUID
+
+from taxos.receipt.entity import Receipt
+
+# How much a word counts towards a receipt's score, by the field it appears in
+FIELD_WEIGHTS = {"vendor": 3.0, "vendor_ref": 2.0, "notes": 1.0}
+# Relative score of a word matched only by prefix, e.g. "cost" for "costco"
+PREFIX_WEIGHT = 0.5
+
+RankKey = tuple[float, float, UUID]
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+  return _WORD.findall(text.casefold())
+
+
+def get_term_weights(receipt: Receipt) -> dict[str, float]:
+  weights: dict[str, float] = {}
+  for name, weight in FIELD_WEIGHTS.items():
+    for term in tokenize(getattr(receipt, name)):
+      weights[term] = weights.get(term, 0.0) + weight
+  return weights
+
+
+def get_rank_key(receipt: Receipt, score: float) -> RankKey:
+  """Best match first, then newest first; ends with the guid so keys are unique."""
+  return -score, -receipt.date.timestamp(), receipt.guid
+
+
+def encode_search_token(text: str, key: RankKey) -> str:
+  score, timestamp, guid = key
+  data = json.dumps([text, score, timestamp, guid.hex])
+  return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_search_token(page_token: str, text: str) -> RankKey:
+  """Returns the rank key of the last receipt on the previous page."""
+  try:
+    token_text, score, timestamp, guid = json.loads(base64.urlsafe_b64decode(page_token.encode()))
+    # Convert inside the try so a token of the wrong shape is invalid too, not an internal error
+    rank_key = float(score), float(timestamp), UUID(str(guid))
+  except (ValueError, TypeError, binascii.Error):
+    raise ValueError("Invalid page_token") from None
+  if token_text != text:
+    raise ValueError("page_token was issued for a different search")
+  return rank_key
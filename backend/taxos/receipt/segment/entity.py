@@ -0,0 +1,31 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+from uuid import UUID
+
+from taxos.receipt.repo.entity import ReceiptRepo
+
+
+@dataclass
+class ReceiptSegment(ReceiptRepo):
+  """The receipts of a closed tax year, moved into a file of their own that is written once and never changed.
+  Reads work as on any repo; bucket totals come from rollups computed when the year was closed."""
+
+  year: int = 0
+  bucket_totals: dict[UUID, dict[str, tuple[float, int]]] = field(
+    default_factory=dict,
+    init=False,
+    repr=False,
+    metadata={"help": "Bucket guid -> month key -> (amount allocated to the bucket, count of receipts)."},
+  )
+
+  def compute_rollups(self):
+    self.bucket_totals = {}
+    for bucket_guid, months in self.index_by_bucket.items():
+      totals = self.bucket_totals[bucket_guid] = {}
+      for month_key in months:
+        totals[month_key] = ReceiptRepo.get_bucket_totals(self, bucket_guid, [month_key])
+
+  def get_bucket_totals(self, bucket_guid: UUID, month_keys: Iterable[str] | None = None) -> tuple[float, int]:
+    totals = self.bucket_totals.get(bucket_guid, {})
+    rollups = [totals[key] for key in (totals if month_keys is None else month_keys) if key in totals]
+    return sum(amount for amount, _ in rollups), sum(count for _, count in rollups)
@@ -0,0 +1,105 @@
+import copy
+import dataclasses
+import logging
+import mmap
+import pickle
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Iterable
+from uuid import UUID
+
+from taxos.receipt.entity import Receipt
+from taxos.receipt.segment.entity import ReceiptSegment
+from taxos.receipt.tools import get_segments_dir
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC and the header's length, the pickled header (the segment without its column rows, i.e. its
+# records, indexes and rollups, and where each column's rows are), then the raw rows of each column at 8 byte
+# boundaries. Only the column rows are mapped rather than read; the header is unpickled in full, once per process.
+MAGIC = b"TAXOSEG1"
+HEADER = struct.Struct("<8sQ")
+COLUMNS = ("receipt", "bucket", "vendor", "month", "timestamp", "amount")
+
+# Segments read by this process, with the mtime of their file: they never change, so each is read once
+_segments: dict[Path, tuple[int, ReceiptSegment]] = {}
+_segments_guard = threading.Lock()
+
+
+def _align(offset: int) -> int:
+  return -(-offset // 8) * 8
+
+
+def build_segment(year: int, receipts: Iterable[Receipt]) -> ReceiptSegment:
+  segment = ReceiptSegment(year=year)
+  for receipt in receipts:
+    segment.add(receipt)
+  segment.columns.compact()
+  segment.compute_rollups()
+  return segment
+
+
+def write_segment(path: Path, segment: ReceiptSegment) -> None:
+  columns = segment.columns
+  chunks = [(name, getattr(columns, name).typecode, bytes(getattr(columns, name))) for name in COLUMNS]
+  chunks.append(("alive", "B", bytes(columns.alive)))
+  layout, offset = [], 0
+  for name, typecode, chunk in chunks:
+    layout.append((name, typecode, offset, len(chunk)))
+    offset = _align(offset + len(chunk))
+
+  header_segment = copy.copy(segment)
+  header_segment.columns = dataclasses.replace(columns, **{name: array(typecode) for name, typecode, _ in chunks[:-1]})
+  header_segment.columns.alive = bytearray()
+  header = pickle.dumps((header_segment, layout))
+
+  path.parent.mkdir(parents=True, exist_ok=True)
+  temp_file = path.with_suffix(".tmp")
+  with temp_file.open("wb") as f:
+    f.write(HEADER.pack(MAGIC, len(header)))
+    f.write(header)
+    start = _align(f.tell())
+    for (_, _, offset, _), (_, _, chunk) in zip(layout, chunks):
+      f.write(bytes(start + offset - f.tell()))
+      f.write(chunk)
+  temp_file.replace(path)
+
+
+def read_segment(path: Path) -> ReceiptSegment:
+  """The segment in the file: its records and indexes unpickled from the header, its columns mapped from the file."""
+  with path.open("rb") as f:
+    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+  magic, size = HEADER.unpack_from(buffer)
+  if magic != MAGIC:
+    raise ValueError(f"Not a receipt segment: {path}")
+  segment, layout = pickle.loads(buffer[HEADER.size : HEADER.size + size])
+  start = _align(HEADER.size + size)
+  view = memoryview(buffer)
+  for name, typecode, offset, length in layout:
+    setattr(segment.columns, name, view[start + offset : start + offset + length].cast(typecode))
+  segment.frozen = True
+  return segment
+
+
+def load_segments(tenant_guid: UUID) -> dict[int, ReceiptSegment]:
+  """The segments of the tenant's closed tax years, by year."""
+  segments_dir = get_segments_dir(tenant_guid)
+  if not segments_dir.exists():
+    return {}
+
+  segments = {}
+  for path in sorted(segments_dir.glob("*.seg")):
+    mtime = path.stat().st_mtime_ns
+    with _segments_guard:
+      cached = _segments.get(path)
+    if cached and cached[0] == mtime:
+      segment = cached[1]
+    else:
+      logger.info(f"Reading receipt segment {path}")
+      segment = read_segment(path)
+      with _segments_guard:
+        _segments[path] = (mtime, segment)
+    segments[segment.year] = segment
+  return segments
@@ -1,7 +1,23 @@
+import dataclasses
+import threading
+from datetime import datetime
 from pathlib import Path
 from uuid import UUID
 
-from taxos.tenant.tools import get_receipts_dir
+from taxos.context.tools import hold_until_commit
+from taxos.receipt.entity import Receipt
+from taxos.tenant.tools import get_files_dir, get_receipts_dir
+from taxos.tools import json
+from taxos.vendor.tools import normalize_vendor_name
+
+# Version of the receipt state file format. State files without one are from before it was versioned, and may
+# name the receipt by a `state_file` path instead of `guid`, or an allocation's bucket by `bucket_guid` or
+# `bucket_ref`. Bump it whenever the format changes, and teach MigrateTenantData to upgrade older files.
+STATE_SCHEMA = 2
+
+# Per-tenant locks serializing receipt writes, so no writer starts from state another is about to replace.
+_write_locks: dict[UUID, threading.RLock] = {}
+_write_locks_guard = threading.Lock()
 
 
 def get_content_dir(tenant_guid: UUID, receipt_guid: UUID) -> Path:
@@ -14,6 +30,46 @@ def get_state_file(receipt_guid: UUID, tenant_guid: UUID) -> Path:
   return content_dir / "state.json"
 
 
+def write_state(receipt: Receipt, state_file: Path) -> None:
+  """Writes the receipt's state file, in the current schema."""
+  state = {field.name: getattr(receipt, field.name) for field in dataclasses.fields(receipt)}
+  json.dump({"schema": STATE_SCHEMA, **state}, state_file)
+
+
 def get_repo_file(tenant_guid: UUID) -> Path:
   content_dir = get_receipts_dir(tenant_guid)
   return content_dir / "repo.pkl"
+
+
+def get_segments_dir(tenant_guid: UUID) -> Path:
+  return get_receipts_dir(tenant_guid) / "segments"
+
+
+def get_segment_file(tenant_guid: UUID, year: int) -> Path:
+  """Where the receipts of a closed tax year are kept, out of the receipt repo."""
+  return get_segments_dir(tenant_guid) / f"{year:04d}.seg"
+
+
+def get_file_archive(tenant_guid: UUID, file_hash: str) -> Path:
+  return get_files_dir(tenant_guid) / f"{file_hash}.zip"
+
+
+def get_pending_file_dir(tenant_guid: UUID, file_hash: str) -> Path:
+  """Where an uploaded file waits until it has been compressed into its archive."""
+  return get_files_dir(tenant_guid) / f"{file_hash}.pending"
+
+
+def get_write_lock(tenant_guid: UUID) -> threading.RLock:
+  with _write_locks_guard:
+    return _write_locks.setdefault(tenant_guid, threading.RLock())
+
+
+def lock_receipts(tenant_guid: UUID):
+  """Holds the tenant's receipt write lock for the block, or until the unit of work commits.
+  Take it around every read-modify-write of receipt state files or the receipt repo."""
+  return hold_until_commit(get_write_lock(tenant_guid))
+
+
+def get_fingerprint(vendor: str, total: float, date: datetime) -> tuple[str, int, str]:
+  """What makes two receipts look like the same purchase: vendor, total in cents and local day."""
+  return normalize_vendor_name(vendor), round(total * 100), date.date().isoformat()
@@ -18,11 +18,20 @@ class UpdateReceipt:
   vendor_ref: str = ""
   notes: str = ""
   hash: str = ""
+  expected_version: str = field(
+    default="",
+    metadata={
+      "help": "Raise Receipt.VersionConflict unless the stored receipt has this version; empty to not check. "
+      "Only edits are checked: bulk writers such as MoveAllocations and MergeVendors rewrite receipts without one, "
+      "though every writer holds the tenant's receipt write lock, so none interleaves with the check."
+    },
+  )
 
   def __post_init__(self):
+    if not isinstance(self.ref, (Receipt, ReceiptRef)):
+      self.ref = ReceiptRef(self.ref)
     # TODO: tenant timezone
-    if not isinstance(self.date, datetime):
-      self.date = parse_datetime(self.date, self.timezone)
+    self.date = parse_datetime(self.date, self.timezone)
 
   def execute(self):
     from taxos.receipt.update.handler import handle
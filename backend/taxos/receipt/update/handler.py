@@ -1,12 +1,20 @@
+import dataclasses
 import logging
 from datetime import datetime
 
-from taxos.context.tools import require_receipt, require_tenant
+from taxos.change.entity import ChangeKind
+from taxos.change.record.command import RecordChanges
+from taxos.context.tools import (
+  clear_identity,
+  require_receipt,
+  require_tenant,
+  set_identity,
+)
 from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.receipt.repo.update.command import UpdateReceiptRepo
-from taxos.receipt.tools import get_state_file
+from taxos.receipt.tools import get_state_file, lock_receipts, write_state
 from taxos.receipt.update.command import UpdateReceipt
-from taxos.tools import json
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +23,37 @@ def handle(command: UpdateReceipt) -> Receipt:
   assert isinstance(command.date, datetime), "Date must be parsed."
   logger.debug(f"{command=}")
   tenant = require_tenant()
-  receipt = require_receipt(command.ref)
 
-  receipt.vendor = command.vendor
-  receipt.total = command.total
-  receipt.allocations = command.allocations
-  receipt.date = command.date
-  receipt.timezone = command.timezone
-  receipt.vendor_ref = command.vendor_ref
-  receipt.notes = command.notes
-  receipt.hash = command.hash
-
-  state_file = get_state_file(receipt.guid, tenant.guid)
-  json.dump(receipt, state_file)
-
-  UpdateReceiptRepo(receipt).execute()
+  with lock_receipts(tenant.guid):
+    # Re-read under the lock, so the version compared is the one last written
+    clear_identity(Receipt, command.ref.guid)
+    stored = require_receipt(command.ref)
+    # A copy, since the loaded receipt may be the one held by the repo or identity map
+    receipt = dataclasses.replace(
+      stored,
+      vendor=command.vendor,
+      total=command.total,
+      allocations=command.allocations,
+      date=command.date,
+      timezone=command.timezone,
+      vendor_ref=command.vendor_ref,
+      notes=command.notes,
+      hash=command.hash,
+    )
+    if receipt.version == stored.version:
+      logger.debug(f"Receipt {stored.guid} is unchanged, skipping update")
+      return stored
+    LoadReceiptRepo().execute().check_open(stored.date, receipt.date)
+    if command.expected_version and command.expected_version != stored.version:
+      raise Receipt.VersionConflict(
+        f"Receipt {stored.guid.hex} was changed by someone else (version {stored.version}, "
+        f"expected {command.expected_version})."
+      )
+
+    state_file = get_state_file(receipt.guid, tenant.guid)
+    write_state(receipt, state_file)
+    set_identity(receipt)
+    UpdateReceiptRepo(receipt).execute()
+    RecordChanges(ChangeKind.RECEIPT, [receipt.guid]).execute()
 
   return receipt
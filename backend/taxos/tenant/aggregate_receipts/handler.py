@@ -0,0 +1,23 @@
+import logging
+
+from taxos.receipt.aggregate.entity import ReceiptAggregate
+from taxos.receipt.aggregate.tools import aggregate_tiers
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.tenant.aggregate_receipts.query import AggregateReceipts
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: AggregateReceipts) -> ReceiptAggregate:
+  logger.debug(f"{query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+  rows = aggregate_tiers(
+    repo.iter_columns(),
+    query.group_by,
+    start=query.start or None,
+    end=query.end or None,
+    buckets=[bucket.guid for bucket in query.buckets] or None,
+    vendors=query.vendors or None,
+  )
+  return ReceiptAggregate(query.group_by, rows)
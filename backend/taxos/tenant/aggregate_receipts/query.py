@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Union
+
+from taxos.bucket.entity import Bucket, BucketRef
+from taxos.receipt.aggregate.entity import Dimension, ReceiptAggregate
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.tools.time import parse_datetime
+
+
+@dataclass
+class AggregateReceipts:
+  """Total receipt amounts grouped by bucket, vendor and/or period, e.g. spend by bucket by quarter."""
+
+  group_by: list[Union[Dimension, str]] = field(
+    default_factory=list,
+    metadata={"help": f"Dimensions to group by, in order: {', '.join(Dimension)}. Default: one grand total."},
+  )
+  start: Optional[Union[datetime, str]] = field(
+    default=None,
+    metadata={"help": "Include receipts dated at or after this instant. Default: no lower bound."},
+  )
+  end: Optional[Union[datetime, str]] = field(
+    default=None,
+    metadata={"help": "Include receipts dated before this instant. Default: no upper bound."},
+  )
+  buckets: list[Union[Bucket, BucketRef, str]] = field(
+    default_factory=list,
+    metadata={"help": "Include only amounts allocated to these buckets. Default: all, including unallocated."},
+  )
+  vendors: list[str] = field(
+    default_factory=list,
+    metadata={"help": "Include only receipts from these vendor names. Default: all."},
+  )
+  timezone: str = field(
+    default="UTC",
+    metadata={"help": "Timezone for start and end values that do not specify one."},
+  )
+  repo: Optional[ReceiptRepo] = field(
+    default=None,
+    repr=False,
+    metadata={
+      "help": "Optional pre-loaded receipt repo to use.",
+    },
+  )
+
+  def __post_init__(self):
+    self.group_by = [Dimension(str(d).strip().lower()) for d in self.group_by]
+    if len(set(self.group_by)) != len(self.group_by):
+      raise ValueError("group_by cannot repeat a dimension.")
+    self.buckets = [b if isinstance(b, (Bucket, BucketRef)) else BucketRef(b) for b in self.buckets]
+    if self.start:
+      self.start = parse_datetime(self.start, self.timezone)
+    if self.end:
+      self.end = parse_datetime(self.end, self.timezone)
+    if self.start and self.end and self.start > self.end:
+      raise ValueError("start must not be after end.")
+
+  def execute(self) -> ReceiptAggregate:
+    from taxos.tenant.aggregate_receipts.handler import handle
+
+    return handle(self)
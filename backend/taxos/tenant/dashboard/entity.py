@@ -14,5 +14,13 @@ class BucketSummary:
 @dataclass
 class Dashboard:
   buckets: list[BucketSummary] = field(default_factory=list)
-  unallocated: list[Receipt] = field(default_factory=list)
-  vendor_names: list[str] = field(default_factory=list)
+  unallocated: list[Receipt] = field(
+    default_factory=list,
+    metadata={"help": "The oldest unallocated receipts; see ListUnallocatedReceipts for the rest."},
+  )
+  unallocated_count: int = 0
+  unallocated_amount: float = 0.0
+  change_seq: int = field(
+    default=0,
+    metadata={"help": "The latest change reflected here; pass it to GetChanges to follow further changes."},
+  )
@@ -1,56 +1,57 @@
 import logging
 
 from taxos.bucket.repo.load.query import LoadBucketRepo
+from taxos.change.tools import connect, get_latest_seq
+from taxos.context.tools import require_tenant
 from taxos.receipt.entity import Receipt
 from taxos.receipt.repo.load.command import LoadReceiptRepo
 from taxos.tenant.dashboard.entity import BucketSummary, Dashboard
 from taxos.tenant.dashboard.get.query import GetDashboard
-from taxos.tenant.list_receipts.query import ListReceipts
-from taxos.vendor.list.query import ListVendors
+from taxos.tenant.list_unallocated_receipts.query import ListUnallocatedReceipts
 
 logger = logging.getLogger(__name__)
 
 
 def handle(query: GetDashboard) -> Dashboard:
   logger.info(f"Generating dashboard for months: {query.months}")
-  bucket_repo = LoadBucketRepo().execute()
+  sections = set(query.sections or ("buckets", "unallocated"))
+  # Read first, so changes made while the dashboard is built are fetched again rather than missed
+  with connect(require_tenant().guid) as conn:
+    change_seq = get_latest_seq(conn)
   receipt_repo = LoadReceiptRepo().execute()
 
   bucket_summaries: list[BucketSummary] = []
   unallocated_receipts: list[Receipt] = []
+  unallocated_count, unallocated_amount = 0, 0.0
 
   # Calculate summaries for each bucket
-  for bucket in bucket_repo.index.values():
-    receipts = ListReceipts(
-      months=query.months,
-      bucket=bucket,
-      repo=receipt_repo,
-    ).execute()
-
-    total_amount = sum(sum(a.amount for a in r.allocations if a.bucket.guid == bucket.guid) for r in receipts)
-    receipt_count = len(receipts)
-
-    bucket_summaries.append(
-      BucketSummary(
-        guid=bucket.guid.hex,
-        name=bucket.name,
-        total_amount=total_amount,
-        receipt_count=receipt_count,
+  if "buckets" in sections:
+    bucket_repo = LoadBucketRepo().execute()
+    for bucket in bucket_repo.index.values():
+      # Closed years answer from their rollups, without visiting their receipts
+      total_amount, receipt_count = receipt_repo.get_bucket_totals(bucket.guid, query.months or None)
+
+      bucket_summaries.append(
+        BucketSummary(
+          guid=bucket.guid.hex,
+          name=bucket.name,
+          total_amount=total_amount,
+          receipt_count=receipt_count,
+        )
       )
-    )
 
-  for month in query.months:
-    for receipt in receipt_repo.iter_by_month(month):
-      total_allocated = sum(a.amount for a in receipt.allocations)
-      if receipt.total > total_allocated:
-        unallocated_receipts.append(receipt)
-
-  # Get all vendor names for typeahead
-  vendors = ListVendors().execute()
-  vendor_names = [vendor.name for vendor in vendors]
+  if "unallocated" in sections and query.months:
+    unallocated_count, unallocated_amount = receipt_repo.get_unallocated_totals(query.months)
+    unallocated_receipts = ListUnallocatedReceipts(
+      months=query.months,
+      page_size=query.unallocated_limit,
+      repo=receipt_repo,
+    ).execute().receipts
 
   return Dashboard(
     buckets=bucket_summaries,
     unallocated=unallocated_receipts,
-    vendor_names=vendor_names,
+    unallocated_count=unallocated_count,
+    unallocated_amount=unallocated_amount,
+    change_seq=change_seq,
   )
@@ -1,11 +1,29 @@
 from dataclasses import dataclass, field
 
+from taxos.receipt.page.tools import MAX_PAGE_SIZE
 from taxos.tenant.dashboard.entity import Dashboard
 
+DEFAULT_UNALLOCATED_LIMIT = 10
+
 
 @dataclass
 class GetDashboard:
   months: list[str] = field(default_factory=list)
+  sections: list[str] = field(
+    default_factory=list,
+    metadata={"help": "Dashboard fields to compute (buckets, unallocated); all when empty."},
+  )
+  unallocated_limit: int = field(
+    default=DEFAULT_UNALLOCATED_LIMIT,
+    metadata={"help": f"How many of the oldest unallocated receipts to include. Default: {DEFAULT_UNALLOCATED_LIMIT}."},
+  )
+
+  def __post_init__(self):
+    if unknown := set(self.sections) - {"buckets", "unallocated"}:
+      raise ValueError(f"Unknown dashboard sections: {sorted(unknown)}")
+    if self.unallocated_limit < 0:
+      raise ValueError("unallocated_limit cannot be negative.")
+    self.unallocated_limit = min(self.unallocated_limit or DEFAULT_UNALLOCATED_LIMIT, MAX_PAGE_SIZE)
 
   def execute(self) -> Dashboard:
     from taxos.tenant.dashboard.get.handler import handle
@@ -6,7 +6,11 @@ from taxos.tenant.entity import Tenant, TenantRef
 
 @dataclass
 class DeleteTenant:
-  tenant: Union[Tenant, TenantRef]
+  tenant: Union[Tenant, TenantRef, str]
+
+  def __post_init__(self):
+    if not isinstance(self.tenant, (Tenant, TenantRef)):
+      self.tenant = TenantRef(self.tenant)
 
   def execute(self):
     from taxos.tenant.delete.handler import handle
@@ -1,14 +1,28 @@
-import shutil
+import logging
+import os
 
+from taxos import TRASH_DIR
+from taxos.context.tools import clear_identity
+from taxos.job.enqueue.command import EnqueueJob
 from taxos.tenant.delete.command import DeleteTenant
+from taxos.tenant.entity import Tenant
+from taxos.tenant.purge.command import PurgeTenant
+from taxos.tools import guid
+
+logger = logging.getLogger(__name__)
 
 
 def handle(command: DeleteTenant):
   try:
     tenant = command.tenant.hydrate()
     if tenant.content_dir.exists():
-      shutil.rmtree(tenant.content_dir)
+      # Moving the tree out of the way is instant; the slow removal happens in the background.
+      os.makedirs(TRASH_DIR, exist_ok=True)
+      trash_dir = TRASH_DIR / f"tenant_{tenant.guid.hex}_{guid.uuid7().hex}"
+      tenant.content_dir.rename(trash_dir)
+      clear_identity(Tenant, tenant.guid)
+      EnqueueJob(PurgeTenant(trash_dir.as_posix()), scoped=False).execute()
       return True
-  except RuntimeError:
+  except (RuntimeError, Tenant.DoesNotExist):
     pass  # probably does not exist
   return False
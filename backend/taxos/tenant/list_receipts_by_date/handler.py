@@ -0,0 +1,41 @@
+import logging
+from datetime import datetime, timedelta
+
+from taxos.context.tools import require_bucket
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.tenant.list_receipts_by_date.query import ListReceiptsByDate
+
+logger = logging.getLogger(__name__)
+
+
+def get_month_keys(start: datetime, end: datetime) -> list[str]:
+  """Month keys overlapping the period, padded by a month on each side because
+  receipts are filed under the month in their own timezone."""
+  month = (start - timedelta(days=31)).replace(day=1)
+  last = (end + timedelta(days=31)).strftime("%Y-%m")
+  keys = []
+  while (key := month.strftime("%Y-%m")) <= last:
+    keys.append(key)
+    month = (month + timedelta(days=32)).replace(day=1)
+  return keys
+
+
+def handle(query: ListReceiptsByDate) -> list[Receipt]:
+  logger.debug(f"Handling {query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+  start = query.start if isinstance(query.start, datetime) else None
+  end = query.end if isinstance(query.end, datetime) else None
+
+  if not query.bucket:
+    return list(repo.iter_by_date(start, end))
+
+  bucket = require_bucket(query.bucket)
+  month_keys = get_month_keys(start, end) if start and end else None
+  receipts = [
+    receipt
+    for receipt in repo.iter_by_bucket(bucket.guid, month_keys)
+    if (not start or receipt.date >= start) and (not end or receipt.date < end)
+  ]
+  return sorted(receipts, key=lambda r: (r.date, r.guid))
@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Union
+
+from taxos.bucket.entity import Bucket, BucketRef
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.tools.time import parse_datetime
+
+
+@dataclass
+class ListReceiptsByDate:
+  """List receipts dated within a period, in date order."""
+
+  start: Optional[Union[datetime, str]] = field(
+    default=None,
+    metadata={"help": "Include receipts dated at or after this instant. Default: no lower bound."},
+  )
+  end: Optional[Union[datetime, str]] = field(
+    default=None,
+    metadata={"help": "Include receipts dated before this instant. Default: no upper bound."},
+  )
+  bucket: Optional[Union[Bucket, BucketRef, str]] = field(
+    default=None,
+    metadata={"help": "Include only receipts allocated to this bucket. Default: all receipts."},
+  )
+  timezone: str = field(
+    default="UTC",
+    metadata={"help": "Timezone for start and end values that do not specify one."},
+  )
+  repo: Optional[ReceiptRepo] = field(
+    default=None,
+    repr=False,
+    metadata={
+      "help": "Optional pre-loaded receipt repo to use.",
+    },
+  )
+
+  def __post_init__(self):
+    if self.start:
+      self.start = parse_datetime(self.start, self.timezone)
+    if self.end:
+      self.end = parse_datetime(self.end, self.timezone)
+    if self.start and self.end and self.start > self.end:
+      raise ValueError("start must not be after end.")
+    if self.bucket and not isinstance(self.bucket, (Bucket, BucketRef)):
+      self.bucket = BucketRef(self.bucket)
+
+  def execute(self):
+    from taxos.tenant.list_receipts_by_date.handler import handle
+
+    return handle(self)
@@ -0,0 +1,17 @@
+import logging
+
+from taxos.receipt.page.entity import ReceiptPage
+from taxos.receipt.page.tools import decode_page_token, paginate
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.tenant.list_unallocated_receipts.query import ListUnallocatedReceipts
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: ListUnallocatedReceipts) -> ReceiptPage:
+  logger.debug(f"Handling {query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+  after = decode_page_token(query.page_token, query.order_by) if query.page_token else None
+  receipts = repo.iter_unallocated(query.months or None)
+  return paginate(receipts, query.order_by, query.page_size, after=after)
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from taxos.receipt.page.entity import ReceiptPage
+from taxos.receipt.page.tools import MAX_PAGE_SIZE, parse_order_by
+from taxos.receipt.repo.entity import ReceiptRepo
+
+
+@dataclass
+class ListUnallocatedReceipts:
+  """List one page of receipts that are not fully allocated to buckets."""
+
+  months: list[str] = field(
+    default_factory=list,
+    metadata={"help": "List of specific month to load, e.g. ['2024-01', '2024-02']. Default: all."},
+  )
+  order_by: str = field(
+    default="date",
+    metadata={"help": "date, total or vendor, optionally followed by 'desc'."},
+  )
+  page_size: int = field(
+    default=0,
+    metadata={"help": f"Maximum receipts to return, up to {MAX_PAGE_SIZE}. Default: all."},
+  )
+  page_token: str = field(
+    default="",
+    metadata={"help": "next_page_token from the previous page."},
+  )
+  repo: Optional[ReceiptRepo] = field(
+    default=None,
+    repr=False,
+    metadata={
+      "help": "Optional pre-loaded receipt repo to use.",
+    },
+  )
+
+  def __post_init__(self):
+    self.order_by = " ".join(self.order_by.lower().split()) or "date"
+    parse_order_by(self.order_by)
+    if self.page_size < 0:
+      raise ValueError("page_size cannot be negative.")
+    self.page_size = min(self.page_size, MAX_PAGE_SIZE)
+
+  def execute(self) -> ReceiptPage:
+    from taxos.tenant.list_unallocated_receipts.handler import handle
+
+    return handle(self)
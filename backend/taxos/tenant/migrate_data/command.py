@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from taxos.tenant.entity import Tenant, TenantRef
+
+
+@dataclass
+class MigrateTenantData:
+  """Upgrade every receipt state file of a tenant to the current schema, so loads skip the legacy paths.
+  Does nothing once the tenant has been migrated, unless forced."""
+
+  tenant: Optional[Union[Tenant, TenantRef, str]] = field(
+    default=None,
+    metadata={"help": "The tenant to migrate. Default: the current tenant."},
+  )
+  workers: int = field(default=8, metadata={"help": "How many files to upgrade at once."})
+  force: bool = field(default=False, metadata={"help": "Check every file again, even if already migrated."})
+
+  def __post_init__(self):
+    if self.tenant and not isinstance(self.tenant, (Tenant, TenantRef)):
+      self.tenant = TenantRef(self.tenant)
+    self.workers = int(self.workers)
+    if self.workers < 1:
+      raise ValueError("workers must be at least 1.")
+
+  def execute(self) -> int:
+    from taxos.tenant.migrate_data.handler import handle
+
+    return handle(self)
@@ -0,0 +1,58 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from taxos.context.tools import require_tenant
+from taxos.receipt.load.handler import is_current_state, parse_legacy_state
+from taxos.receipt.tools import STATE_SCHEMA, lock_receipts, write_state
+from taxos.tenant.migrate_data.command import MigrateTenantData
+from taxos.tenant.tools import get_receipts_dir, get_schema_file
+from taxos.tools import json
+from taxos.tools.guid import parse_guid
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_receipt(state_file: Path) -> bool:
+  """Rewrites the state file in the current schema; returns False if it already was."""
+  state = json.load(state_file)
+  if is_current_state(state, state_file):
+    return False
+  if not (receipt := parse_legacy_state(state, state_file)):
+    raise ValueError(f"Unreadable receipt state file: {state_file}")
+  write_state(receipt, state_file)
+  return True
+
+
+def handle(command: MigrateTenantData) -> int:
+  """Returns the number of files that were upgraded."""
+  logger.debug(f"{command=}")
+  tenant = require_tenant(command.tenant)
+  schema_file = get_schema_file(tenant.guid)
+  if not command.force and schema_file.exists() and json.load(schema_file).get("receipt") == STATE_SCHEMA:
+    logger.debug(f"Data of tenant {tenant.guid} is already migrated")
+    return 0
+
+  receipts_dir = get_receipts_dir(tenant.guid)
+  state_files = []
+  if receipts_dir.exists():
+    state_files = [d / "state.json" for d in receipts_dir.iterdir() if d.is_dir() and parse_guid(d.name)]
+
+  def migrate(state_file: Path) -> bool | None:
+    try:
+      return migrate_receipt(state_file)
+    except Exception as e:
+      logger.warning(f"Failed to migrate {state_file}: {type(e).__name__}: {e}")
+      return None
+
+  # Every receipt writer waits, so none is overwritten by the file it replaced; the content of each file is unchanged
+  with lock_receipts(tenant.guid), ThreadPoolExecutor(command.workers) as pool:
+    results = list(pool.map(migrate, state_files))
+
+  migrated, failed = results.count(True), results.count(None)
+  if failed:
+    logger.warning(f"Migrated {migrated} files of tenant {tenant.guid}; {failed} failed and will be tried again")
+  else:
+    json.dump({"receipt": STATE_SCHEMA}, schema_file)
+    logger.info(f"Migrated {migrated} of {len(state_files)} files of tenant {tenant.guid}")
+  return migrated
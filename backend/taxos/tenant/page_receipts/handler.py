@@ -0,0 +1,32 @@
+import logging
+from itertools import chain
+
+from taxos.context.tools import require_bucket
+from taxos.receipt.page.entity import ReceiptOrder, ReceiptPage
+from taxos.receipt.page.tools import decode_page_token, paginate, parse_order_by
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.tenant.page_receipts.query import PageReceipts
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: PageReceipts) -> ReceiptPage:
+  logger.debug(f"Handling {query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+  order, descending = parse_order_by(query.order_by)
+  after = decode_page_token(query.page_token, query.order_by) if query.page_token else None
+
+  if query.bucket:
+    bucket = require_bucket(query.bucket)
+    receipts = repo.iter_by_bucket(bucket.guid, query.months or None)
+  elif query.months:
+    receipts = chain.from_iterable(repo.iter_by_month(month) for month in query.months)
+  elif order == ReceiptOrder.DATE:
+    # The date index is already in order, so only the page itself is read.
+    receipts = repo.iter_by_date(after=after, reverse=descending)
+    return paginate(receipts, query.order_by, query.page_size, presorted=True)
+  else:
+    receipts = repo.iter_records()
+
+  return paginate(receipts, query.order_by, query.page_size, after=after)
@@ -0,0 +1,19 @@
+from dataclasses import dataclass, field
+
+from taxos.tenant.entity import TenantRef
+
+
+@dataclass
+class PreloadTenant:
+  """Load a tenant's repos (rebuilding any that are outdated), so its next requests find them ready."""
+
+  tenant: TenantRef | str = field(metadata={"help": "The tenant to preload; runs outside of any request context."})
+
+  def __post_init__(self):
+    if not isinstance(self.tenant, TenantRef):
+      self.tenant = TenantRef(str(self.tenant))
+
+  def execute(self):
+    from taxos.tenant.preload.handler import handle
+
+    return handle(self)
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PurgeTenant:
+  """Permanently remove a deleted tenant's data from the trash."""
+
+  path: str
+
+  def execute(self):
+    from taxos.tenant.purge.handler import handle
+
+    return handle(self)
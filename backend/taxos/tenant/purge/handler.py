@@ -0,0 +1,23 @@
+import logging
+import shutil
+from pathlib import Path
+
+from taxos import TRASH_DIR
+from taxos.tenant.purge.command import PurgeTenant
+
+logger = logging.getLogger(__name__)
+
+
+def handle(command: PurgeTenant) -> bool:
+  logger.debug(f"{command=}")
+  path = Path(command.path).resolve()
+  if not path.is_relative_to(TRASH_DIR.resolve()):
+    raise ValueError(f"Refusing to purge a path outside the trash: {path}")
+
+  if not path.exists():
+    logger.info(f"Nothing to purge at {path}")
+    return False
+
+  shutil.rmtree(path)
+  logger.info(f"Purged {path}")
+  return True
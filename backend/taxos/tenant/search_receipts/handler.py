@@ -0,0 +1,38 @@
+import heapq
+import logging
+
+from taxos.receipt.page.entity import ReceiptPage
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.receipt.search.tools import (
+  decode_search_token,
+  encode_search_token,
+  get_rank_key,
+)
+from taxos.tenant.search_receipts.query import SearchReceipts
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: SearchReceipts) -> ReceiptPage:
+  logger.debug(f"{query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+  after = decode_search_token(query.page_token, query.text) if query.page_token else None
+
+  ranked = (
+    (get_rank_key(receipt, score), receipt)
+    for guid, score in repo.search(query.text).items()
+    if (receipt := repo.get_by_ref(guid))
+  )
+  if after is not None:
+    ranked = (item for item in ranked if item[0] > after)
+  if query.page_size:
+    page = heapq.nsmallest(query.page_size + 1, ranked, key=lambda item: item[0])
+  else:
+    page = sorted(ranked, key=lambda item: item[0])
+
+  next_page_token = ""
+  if query.page_size and len(page) > query.page_size:
+    page = page[: query.page_size]
+    next_page_token = encode_search_token(query.text, page[-1][0])
+  return ReceiptPage([receipt for _, receipt in page], next_page_token)
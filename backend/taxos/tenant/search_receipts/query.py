@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from taxos.receipt.page.entity import ReceiptPage
+from taxos.receipt.page.tools import MAX_PAGE_SIZE
+from taxos.receipt.repo.entity import ReceiptRepo
+
+
+@dataclass
+class SearchReceipts:
+  """Find receipts by the words in their vendor, vendor_ref or notes, best match first."""
+
+  text: str = field(
+    metadata={"help": "Words to find; each must match a whole word or the start of one."},
+  )
+  page_size: int = field(
+    default=0,
+    metadata={"help": f"Maximum receipts to return, up to {MAX_PAGE_SIZE}. Default: all."},
+  )
+  page_token: str = field(
+    default="",
+    metadata={"help": "next_page_token from the previous page."},
+  )
+  repo: Optional[ReceiptRepo] = field(
+    default=None,
+    repr=False,
+    metadata={
+      "help": "Optional pre-loaded receipt repo to use.",
+    },
+  )
+
+  def __post_init__(self):
+    self.text = " ".join(str(self.text).split())
+    if not self.text:
+      raise ValueError("text cannot be empty or whitespace.")
+    if self.page_size < 0:
+      raise ValueError("page_size cannot be negative.")
+    self.page_size = min(self.page_size, MAX_PAGE_SIZE)
+
+  def execute(self) -> ReceiptPage:
+    from taxos.tenant.search_receipts.handler import handle
+
+    return handle(self)
@@ -0,0 +1,30 @@
+import logging
+from typing import Iterator
+
+from taxos.context.tools import require_bucket
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.tenant.stream_receipts.query import StreamReceipts
+
+logger = logging.getLogger(__name__)
+
+
+def handle(query: StreamReceipts) -> Iterator[Receipt]:
+  """Receipts come out in date order within each month, and months in the order requested
+  (ascending by default), so at most one month is held in memory at a time."""
+  logger.debug(f"Handling {query=}")
+  repo: ReceiptRepo = query.repo or LoadReceiptRepo().execute()
+
+  if not query.bucket and not query.months:
+    yield from repo.iter_by_date()
+    return
+
+  if query.bucket:
+    bucket = require_bucket(query.bucket)
+    month_keys = query.months or repo.get_bucket_months(bucket.guid)
+    for month_key in month_keys:
+      yield from sorted(repo.iter_by_bucket(bucket.guid, [month_key]), key=lambda r: (r.date, r.guid))
+  else:
+    for month_key in query.months:
+      yield from sorted(repo.iter_by_month(month_key), key=lambda r: (r.date, r.guid))
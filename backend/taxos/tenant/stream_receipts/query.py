@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+from taxos.bucket.entity import Bucket, BucketRef
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.entity import ReceiptRepo
+
+
+@dataclass
+class StreamReceipts:
+  """Yield receipts as they are read from the repo, without building the full list."""
+
+  bucket: Optional[Union[Bucket, BucketRef, str]] = field(
+    default=None,
+    metadata={"help": "Include only receipts allocated to this bucket. Default: all receipts."},
+  )
+  months: list[str] = field(
+    default_factory=list,
+    metadata={"help": "List of specific month to load, e.g. ['2024-01', '2024-02']. Default: all."},
+  )
+  repo: Optional[ReceiptRepo] = field(
+    default=None,
+    repr=False,
+    metadata={
+      "help": "Optional pre-loaded receipt repo to use.",
+    },
+  )
+
+  def __post_init__(self):
+    if self.bucket and not isinstance(self.bucket, (Bucket, BucketRef)):
+      self.bucket = BucketRef(self.bucket)
+
+  def execute(self) -> Iterator[Receipt]:
+    from taxos.tenant.stream_receipts.handler import handle
+
+    return handle(self)
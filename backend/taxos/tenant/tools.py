@@ -13,6 +13,12 @@ def get_state_file(guid: UUID) -> Path:
   return content_dir / "state.json"
 
 
+def get_schema_file(guid: UUID) -> Path:
+  """Records the schema versions the tenant's data files were last migrated to."""
+  content_dir = get_content_dir(guid)
+  return content_dir / "schema.json"
+
+
 def get_buckets_dir(tenant_guid: UUID) -> Path:
   tenant_dir = get_content_dir(tenant_guid)
   return tenant_dir / "buckets"
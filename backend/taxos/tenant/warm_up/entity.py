@@ -0,0 +1,67 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from taxos.access.log.list.query import ListActiveTenants
+from taxos.tenant.preload.command import PreloadTenant
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmUp:
+  """Preloads the most recently active tenants in background threads, so their first requests after a restart
+  don't pay for loading (or rebuilding) their repos."""
+
+  max_tenants: int = 50
+  since_days: float = 14
+  workers: int = 4
+  total: int = field(default=0, init=False)
+  done: int = field(default=0, init=False)
+  failed: int = field(default=0, init=False)
+  started_at: datetime | None = field(default=None, init=False)
+  finished_at: datetime | None = field(default=None, init=False)
+  _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+  @property
+  def started(self) -> bool:
+    return self.started_at is not None
+
+  @property
+  def ready(self) -> bool:
+    """Whether requests can be served without waiting on warm-up; false until it has been started and finished."""
+    return self.finished_at is not None
+
+  def start(self):
+    with self._lock:
+      if self.started_at:
+        return
+      self.started_at = datetime.now(timezone.utc)
+    threading.Thread(target=self._run, name="warm-up", daemon=True).start()
+
+  def _run(self):
+    try:
+      tenants = ListActiveTenants(since_days=self.since_days, limit=self.max_tenants).execute()
+      self.total = len(tenants)
+      logger.info(f"Warming up {self.total} recently active tenants")
+      # Most recently active first, so they are ready soonest
+      with ThreadPoolExecutor(self.workers, thread_name_prefix="warm-up") as pool:
+        for tenant_guid in tenants:
+          pool.submit(self._preload, tenant_guid.hex)
+    except Exception as e:
+      logger.exception(f"Warm-up failed: {e}")
+    finally:
+      self.finished_at = datetime.now(timezone.utc)
+      logger.info(f"Warm-up finished: {self.done} tenants preloaded, {self.failed} failed")
+
+  def _preload(self, tenant_key: str):
+    try:
+      PreloadTenant(tenant_key).execute()
+      with self._lock:
+        self.done += 1
+    except Exception as e:
+      logger.warning(f"Failed to preload tenant {tenant_key}: {type(e).__name__}: {e}")
+      with self._lock:
+        self.failed += 1
@@ -0,0 +1,18 @@
+import os
+from pathlib import Path
+
+# (mtime in ns, inode, size) of a file. Files written by replacing them get a new inode each time,
+# so the stamp changes with every write, even where timestamps are too coarse to tell two writes apart.
+FileStamp = tuple[int, int, int]
+
+
+def get_stamp(result: os.stat_result) -> FileStamp:
+  return result.st_mtime_ns, result.st_ino, result.st_size
+
+
+def stamp_file(path: Path) -> FileStamp | None:
+  """The file's stamp, or None if it does not exist."""
+  try:
+    return get_stamp(path.stat())
+  except FileNotFoundError:
+    return None
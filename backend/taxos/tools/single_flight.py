@@ -0,0 +1,45 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+  done: threading.Event = field(default_factory=threading.Event)
+  result: Any = None
+  error: BaseException | None = None
+
+
+# Calls currently running, by key
+_flights: dict[Hashable, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(key: Hashable, call: Callable[[], T]) -> tuple[T, bool]:
+  """Runs call, unless a call with the same key is already running in another thread,
+  in which case waits for that one and shares its result (or error) instead.
+  Returns the result, and whether this caller was the one that ran it."""
+  with _flights_lock:
+    flight = _flights.get(key)
+    leader = flight is None
+    if leader:
+      flight = _flights[key] = _Flight()
+
+  if not leader:
+    flight.done.wait()
+    if flight.error is not None:
+      raise flight.error
+    return flight.result, False
+
+  try:
+    flight.result = call()
+    return flight.result, True
+  except BaseException as e:
+    flight.error = e
+    raise
+  finally:
+    with _flights_lock:
+      del _flights[key]
+    flight.done.set()
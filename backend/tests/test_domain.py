@@ -1,33 +1,87 @@
+import contextvars
 import hashlib
+import os
+import pickle
+import shutil
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 
 import pytest
 from google.protobuf.timestamp_pb2 import Timestamp
+from taxos.access.log.list.query import ListActiveTenants
+from taxos.access.log.record.command import RecordAccess
 from taxos.access.token.generate.command import GenerateAccessToken
 from taxos.access.token.revoke.command import RevokeToken
+from taxos.allocation.entity import Allocation
 from taxos.bucket.create.command import CreateBucket
 from taxos.bucket.delete.command import DeleteBucket
-from taxos.bucket.entity import Bucket
+from taxos.bucket.entity import Bucket, BucketRef
+from taxos.bucket.merge.command import MergeBuckets
 from taxos.bucket.repo.entity import BucketRepo
 from taxos.bucket.repo.load.query import LoadBucketRepo
+from taxos.bucket.tools import get_content_dir as get_bucket_content_dir
 from taxos.bucket.update.command import UpdateBucket
+from taxos.change import tools as change_tools
+from taxos.change.entity import ChangeBatch, ChangeKind, ChangeSet
+from taxos.change.get.query import GetChanges
+from taxos.change.watch.query import WatchChanges
 from taxos.context.entity import Context
-from taxos.context.tools import set_context
+from taxos.context.tools import (
+  require_bucket,
+  require_receipt,
+  set_context,
+  unit_of_work,
+)
+from taxos.idempotency.claim.command import ClaimIdempotencyKey
+from taxos.idempotency.complete.command import CompleteIdempotencyKey
+from taxos.idempotency.entity import IdempotencyKey
+from taxos.idempotency.release.command import ReleaseIdempotencyKey
+from taxos.job import tools as job_tools
+from taxos.job.enqueue.command import EnqueueJob
+from taxos.job.entity import JobStatus
+from taxos.job.load.query import LoadJob
+from taxos.job.run_next.command import RunNextJob
 from taxos.receipt.attach_file.command import AttachFile
+from taxos.receipt.close_year.command import CloseYear
+from taxos.receipt.compress_file.command import CompressFile
 from taxos.receipt.create.command import CreateReceipt
 from taxos.receipt.delete.command import DeleteReceipt
+from taxos.receipt.download_file.command import DownloadFile
 from taxos.receipt.entity import Receipt
+from taxos.receipt.find_duplicates.query import FindDuplicateReceipts
+from taxos.receipt.load.query import LoadReceipt
 from taxos.receipt.repo.load.command import LoadReceiptRepo
+from taxos.receipt.repo.load.handler import rebuild
+from taxos.receipt.repo.tools import get_published, publish
+from taxos.receipt.tools import (
+  STATE_SCHEMA,
+  get_pending_file_dir,
+  get_repo_file,
+  get_segment_file,
+  get_state_file,
+)
+from taxos.receipt.update.command import UpdateReceipt
 from taxos.tenant.create.command import CreateTenant
 from taxos.tenant.dashboard.get.query import GetDashboard
 from taxos.tenant.delete.command import DeleteTenant
 from taxos.tenant.list_receipts.query import ListReceipts
+from taxos.tenant.migrate_data.command import MigrateTenantData
 from taxos.tenant.tools import get_files_dir
 from taxos.tenant.unallocated_receipt.check.command import CheckUnallocatedReceipt
+from taxos.tenant.warm_up.entity import WarmUp
+from taxos.tools import guid, json
 from taxos.vendor.entity import Vendor
+from taxos.vendor.find_duplicates.query import FindDuplicateVendors
 from taxos.vendor.find_or_create.command import FindOrCreateVendor
 from taxos.vendor.list.query import ListVendors
+from taxos.vendor.load.query import LoadVendor
+from taxos.vendor.merge.command import MergeVendors
+from taxos.vendor.repo.load.query import LoadVendorRepo
+from taxos.vendor.summary.get.query import GetVendorSummary
+from taxos.vendor.tools import get_names_file, require_names
 
 MONTH_KEY = datetime.now().strftime("%Y-%m")
 
@@ -119,6 +173,11 @@ def ensure_receipt_deleted(receipt: Receipt):
   assert repo.get_by_ref(receipt.guid) is None, "Receipt should be deleted from repo"
 
 
+def run_queued_jobs():
+  while RunNextJob(worker="test").execute():
+    pass
+
+
 def ensure_bucket_deleted(bucket: Bucket):
   result = DeleteBucket(bucket.guid.hex).execute()
   assert result is True, f"Expected True from bucket delete, got {result}"
@@ -187,6 +246,17 @@ def test_vendor_find_or_create(test_context):
   assert vendors == sorted(vendors, key=lambda v: v.name.lower()), "Vendors should be sorted by name"
 
 
+@pytest.mark.integration
+def test_vendor_names_are_unique(test_context):
+  names = ["Acme Corp", "acme corp", "  ACME   Corp "] * 4
+  with ThreadPoolExecutor(4) as pool:
+    futures = [pool.submit(contextvars.copy_context().run, FindOrCreateVendor(name).execute) for name in names]
+    vendors = [future.result() for future in futures]
+
+  assert len({v.guid for v in vendors}) == 1, "Concurrent creates should resolve to one vendor"
+  assert len(ListVendors(prefix="acme").execute()) == 1
+
+
 @pytest.mark.integration
 def test_vendor_created_with_receipt(test_context):
   """Test that vendors are automatically created when receipts are created"""
@@ -268,3 +338,530 @@ def test_attach_file_to_receipt(test_context, tmp_path):
   another_test_file_path.write_bytes(b"Another test file content.")
   with pytest.raises(FileExistsError):
     AttachFile(receipt.guid.hex, another_test_file_path).execute()
+
+
+@pytest.mark.integration
+def test_job_queue(test_context, tmp_path, monkeypatch):
+  monkeypatch.setattr(job_tools, "JOBS_DB_FILE", tmp_path / "jobs.sqlite3")  # leave no jobs behind
+  job = EnqueueJob(CreateBucket(name="Queued Bucket")).execute()
+  assert job.status == JobStatus.PENDING
+  assert job.tenant == test_context.tenant.guid
+
+  duplicate = EnqueueJob(CreateBucket(name="Queued Bucket")).execute()
+  assert duplicate.guid == job.guid, "Identical pending work should be coalesced"
+
+  run_queued_jobs()
+  set_context(test_context)  # workers clear the context when they finish
+
+  job = LoadJob(job.guid).execute()
+  assert job.status == JobStatus.SUCCEEDED, job.error
+  assert job.attempts == 1
+  buckets = LoadBucketRepo().execute().index.values()
+  assert any(b.name == "Queued Bucket" for b in buckets), "Queued command should have run"
+
+  retried = EnqueueJob(LoadVendor(guid.uuid7().hex), max_attempts=2).execute()
+  failed = EnqueueJob(LoadVendor(guid.uuid7().hex), max_attempts=1).execute()
+  run_queued_jobs()
+  set_context(test_context)
+
+  retried = LoadJob(retried.guid).execute()
+  assert retried.status == JobStatus.PENDING, "Job should be waiting for a retry"
+  assert retried.attempts == 1
+  assert "DoesNotExist" in retried.error
+
+  failed = LoadJob(failed.guid).execute()
+  assert failed.status == JobStatus.FAILED
+
+
+def get_allocated_amounts(receipt: Receipt) -> dict:
+  """Reads the receipt back from disk and from the repo, which must agree."""
+  stored = LoadReceipt(receipt.guid.hex).execute()
+  indexed = LoadReceiptRepo().execute().get_by_ref(receipt.guid)
+  assert indexed is not None, "Receipt should be in the repo"
+  amounts = {a.bucket.guid: a.amount for a in stored.allocations}
+  assert amounts == {a.bucket.guid: a.amount for a in indexed.allocations}
+  return amounts
+
+
+@pytest.mark.integration
+def test_download_during_compression(test_context, monkeypatch):
+  file_hash = hashlib.sha256(b"scan").hexdigest()
+  pending_dir = get_pending_file_dir(test_context.tenant.guid, file_hash)
+  pending_dir.mkdir(parents=True)
+  (pending_dir / "scan.pdf").write_bytes(b"scan")
+  read_bytes = Path.read_bytes
+
+  def compress_then_read(path):
+    CompressFile(file_hash).execute()  # the job finishes between listing the upload and reading it
+    return read_bytes(path)
+
+  monkeypatch.setattr(Path, "read_bytes", compress_then_read)
+  result = DownloadFile(file_hash).execute()
+  assert (result.filename, result.file_data) == ("scan.pdf", b"scan")
+  assert not pending_dir.exists()
+
+
+@pytest.mark.integration
+def test_merge_and_delete_buckets(test_context):
+  source = ensure_bucket_created("Source")
+  target = ensure_bucket_created("Target")
+  other = ensure_bucket_created("Other")
+
+  def allocate(*pairs):
+    return {Allocation(BucketRef(bucket.guid.hex), amount) for bucket, amount in pairs}
+
+  only_source = CreateReceipt("Shop", 10, "2024-01-05T10:00:00", "UTC", allocations=allocate((source, 10))).execute()
+  split = CreateReceipt("Shop", 10, "2024-02-05T10:00:00", "UTC", allocations=allocate((source, 4), (target, 6))).execute()
+  unrelated = CreateReceipt("Shop", 5, "2024-02-06T10:00:00", "UTC", allocations=allocate((other, 5))).execute()
+
+  merged = MergeBuckets(source.guid.hex, target.guid.hex).execute()
+  assert merged.guid == target.guid
+  assert get_allocated_amounts(only_source) == {target.guid: 10}
+  assert get_allocated_amounts(split) == {target.guid: 10}
+  assert get_allocated_amounts(unrelated) == {other.guid: 5}
+  assert source.guid not in {b.guid for b in LoadBucketRepo().execute().index.values()}
+  assert [r.guid for r in get_receipt_list("2024-02", bucket=target.guid.hex)] == [split.guid]
+
+  ensure_bucket_deleted(target)
+  assert get_allocated_amounts(only_source) == {}
+  assert get_allocated_amounts(split) == {}
+  assert get_allocated_amounts(unrelated) == {other.guid: 5}
+  assert LoadReceiptRepo().execute().index_by_bucket.keys() == {other.guid}
+
+
+@pytest.mark.integration
+def test_dashboard_sections(test_context):
+  bucket = ensure_bucket_created("Dashboard")
+  receipt = ensure_receipt_created("Corner Store", 8)
+
+  dashboard = GetDashboard(months=[MONTH_KEY], sections=["unallocated"]).execute()
+  assert [r.guid for r in dashboard.unallocated] == [receipt.guid]
+  assert dashboard.buckets == []
+
+  dashboard = GetDashboard(months=[MONTH_KEY], sections=["buckets"]).execute()
+  assert [b.guid for b in dashboard.buckets] == [bucket.guid.hex]
+  assert dashboard.unallocated == []
+
+  with pytest.raises(ValueError):
+    GetDashboard(months=[MONTH_KEY], sections=["receipts"])
+
+
+@pytest.mark.integration
+def test_vendor_typeahead(test_context):
+  for name in ("Corner Store", "Cornerstone Cafe", "Cornerstone Cafe", "Costco"):
+    ensure_receipt_created(name, 5)
+
+  assert [v.name for v in ListVendors(prefix="cor").execute()] == ["Cornerstone Cafe", "Corner Store"]
+  assert [v.name for v in ListVendors(prefix="  CORNER ").execute()] == ["Corner Store"]
+  assert [v.name for v in ListVendors(limit=1).execute()] == ["Cornerstone Cafe"]
+  assert ListVendors(prefix="cox").execute() == []
+
+  repo = LoadVendorRepo().execute()
+  assert LoadVendorRepo().execute() is repo, "Vendor repos should be reused until a vendor is written"
+  FindOrCreateVendor("Corner Deli").execute()
+  assert LoadVendorRepo().execute() is not repo
+  assert [v.name for v in ListVendors(prefix="corner d").execute()] == ["Corner Deli"]
+
+  # Another process renames a vendor within the same timestamp tick, with a name of the same length
+  names_file = get_names_file(test_context.tenant.guid)
+  repo, stat = LoadVendorRepo().execute(), names_file.stat()
+  names = {name.replace("corner deli", "corner dell"): guid for name, guid in json.load(names_file).items()}
+  json.dump(names, names_file)
+  os.utime(names_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+  assert "corner dell" in require_names(test_context.tenant.guid), "Rewritten names should be read again"
+  assert LoadVendorRepo().execute() is not repo
+  names_file.write_text("{")
+  assert "corner deli" in require_names(test_context.tenant.guid), "Unreadable names should be rebuilt"
+
+
+@pytest.mark.integration
+def test_find_and_merge_duplicate_vendors(test_context):
+  receipts = [ensure_receipt_created(name, 5) for name in ("Costco", "COSTCO #123", "Costco", "Walmart", "Walgreens")]
+
+  duplicates = FindDuplicateVendors().execute()
+  assert [(d.vendor.name, d.duplicate.name) for d in duplicates] == [("Costco", "COSTCO #123")]
+
+  merged = MergeVendors(duplicates[0].duplicate, duplicates[0].vendor).execute()
+  assert merged.guid == duplicates[0].vendor.guid
+  assert [LoadReceipt(r.guid.hex).execute().vendor for r in receipts] == ["Costco"] * 3 + ["Walmart", "Walgreens"]
+  assert sorted(v.name for v in ListVendors().execute()) == ["Costco", "Walgreens", "Walmart"]
+  assert FindOrCreateVendor("costco  #123").execute().guid == merged.guid
+  assert FindDuplicateVendors().execute() == []
+
+
+@pytest.mark.integration
+def test_vendor_summary(test_context):
+  food = ensure_bucket_created("Food")
+  gas = ensure_bucket_created("Gas")
+  CreateReceipt("Costco", 100, "2024-03-01T12:00:00", "UTC", allocations={Allocation(food.guid.hex, 60), Allocation(gas.guid.hex, 30)}).execute()
+  CreateReceipt("costco", 50, "2024-05-01T12:00:00", "UTC", allocations={Allocation(food.guid.hex, 50)}).execute()
+  CreateReceipt("Costco", 20, "2023-05-01T12:00:00", "UTC").execute()
+  CreateReceipt("Shell", 40, "2024-05-01T12:00:00", "UTC").execute()
+
+  summaries = GetVendorSummary(start="2024-01-01", end="2025-01-01").execute()
+  assert [(s.vendor.name, s.total_amount, s.receipt_count) for s in summaries] == [("Costco", 150, 2), ("Shell", 40, 1)]
+  costco = summaries[0]
+  assert costco.unallocated_amount == 10
+  assert [(b.guid, b.total_amount, b.receipt_count) for b in costco.buckets] == [(food.guid.hex, 110, 2), (gas.guid.hex, 30, 1)]
+
+  [summary] = GetVendorSummary(vendor=costco.vendor.guid.hex).execute()
+  assert (summary.total_amount, summary.receipt_count) == (170, 3)
+
+
+@pytest.mark.integration
+def test_duplicate_receipts(test_context):
+  scan = hashlib.sha256(b"scan").hexdigest()
+  original = CreateReceipt("Costco", 25.5, "2024-03-01T09:00:00", "UTC", hash=scan).execute()
+
+  same_purchase = FindDuplicateReceipts(" COSTCO", 25.50, "2024-03-01T18:00:00", "UTC").execute()
+  assert [r.guid for r in same_purchase] == [original.guid]
+  same_file = FindDuplicateReceipts("Shell", 80, "2024-04-01T09:00:00", "UTC", hash=scan).execute()
+  assert [r.guid for r in same_file] == [original.guid]
+  assert FindDuplicateReceipts("Costco", 25.5, "2024-03-02T09:00:00", "UTC").execute() == []
+
+  with pytest.raises(Receipt.AlreadyExists):
+    CreateReceipt("costco", 25.5, "2024-03-01T12:00:00", "UTC", reject_duplicates=True).execute()
+  command = CreateReceipt("costco", 25.5, "2024-03-01T12:00:00", "UTC")
+  command.execute()  # allowed unless rejected
+  assert [r.guid for r in command.duplicates] == [original.guid]
+  assert len(FindDuplicateReceipts("Costco", 25.5, "2024-03-01", "UTC").execute()) == 2
+
+  def upload():
+    set_context(Context(test_context.tenant))  # a request of its own
+    try:
+      return CreateReceipt("Shell", 40, "2024-05-01T12:00:00", "UTC", reject_duplicates=True).execute()
+    except Receipt.AlreadyExists:
+      return None
+
+  with ThreadPoolExecutor(4) as pool:
+    created = [future.result() for future in [pool.submit(contextvars.copy_context().run, upload) for _ in range(4)]]
+  assert len([r for r in created if r]) == 1, "Concurrent duplicate uploads should not all get in"
+
+
+@pytest.mark.integration
+def test_change_feed(test_context, monkeypatch):
+  start = GetDashboard().execute().change_seq
+  bucket = ensure_bucket_created("Food")
+  kept = CreateReceipt("Costco", 10, "2024-03-01T12:00:00", "UTC").execute()
+  gone = CreateReceipt("Shell", 20, "2024-03-02T12:00:00", "UTC").execute()
+  UpdateBucket(bucket, "Groceries").execute()
+  DeleteReceipt(gone.guid.hex).execute()
+
+  changes = GetChanges(start).execute()
+  assert not changes.resync
+  assert [r.guid for r in changes.receipts] == [kept.guid]
+  assert changes.deleted_receipts == [gone.guid]
+  assert [(b.guid, b.name) for b in changes.buckets] == [(bucket.guid, "Groceries")]
+  assert sorted(v.name for v in changes.vendors) == ["Costco", "Shell"]
+
+  assert GetChanges(changes.seq).execute() == ChangeSet(changes.seq)
+  assert GetChanges(changes.seq + 1).execute().resync
+
+  # Clients that fall behind the retained log must reload
+  monkeypatch.setattr("taxos.change.record.handler.MAX_CHANGES", 1)
+  DeleteBucket(bucket).execute()
+  assert GetChanges(start).execute().resync
+  latest = GetChanges(changes.seq).execute()
+  assert (latest.resync, latest.deleted_buckets) == (False, [bucket.guid])
+
+
+@pytest.mark.integration
+def test_watch_changes(test_context):
+  bucket = ensure_bucket_created("Food")
+  watch = WatchChanges(since_seq=0, heartbeat=0.01).execute()
+  assert [(c.kind, c.guid) for c in next(watch).changes] == [(ChangeKind.BUCKET, bucket.guid)]
+  assert next(watch) == ChangeBatch()  # heartbeat
+
+  DeleteBucket(bucket).execute()
+  [change] = next(watch).changes
+  assert (change.seq, change.kind, change.guid, change.deleted) == (2, ChangeKind.BUCKET, bucket.guid, True)
+
+  watch.close()
+  assert not change_tools._subscribers
+  assert next(WatchChanges(since_seq=5).execute()).resync
+
+
+@pytest.mark.integration
+def test_unit_of_work(test_context):
+  bucket = ensure_bucket_created("Food")
+  assert require_bucket(bucket.guid.hex) is bucket, "Saved entities should not be reloaded"
+
+  start = GetChanges().execute().seq
+  with unit_of_work():
+    first = CreateReceipt(
+      "Shop", 10, "2024-01-05T10:00:00", "UTC", allocations={Allocation(bucket.guid.hex, 10)}
+    ).execute()
+    second = CreateReceipt("Shop", 20, "2024-01-06T10:00:00", "UTC").execute()
+    UpdateReceipt(
+      first.guid.hex, "Shop", 12, "2024-02-05T10:00:00", "UTC", allocations={Allocation(bucket.guid.hex, 12)}
+    ).execute()
+    assert require_receipt(first.guid.hex).total == 12
+    assert GetChanges(start).execute().seq == start, "Changes should be recorded on commit"
+    assert not get_repo_file(test_context.tenant.guid).exists(), "The repo should be saved on commit"
+
+  changes = GetChanges(start).execute()
+  assert changes.seq == start + 3, "Each receipt, and the new vendor, should be recorded once"
+  assert {r.guid for r in changes.receipts} == {first.guid, second.guid}
+  test_context.identity_map.clear()
+  repo = LoadReceiptRepo().execute()
+  assert {r.guid for r in repo.iter_by_bucket(bucket.guid, ["2024-02"])} == {first.guid}
+  assert repo.get_by_ref(second.guid)
+
+
+@pytest.mark.integration
+def test_rebuild_leaves_cached_receipts_alone(test_context):
+  bucket = ensure_bucket_created("Food")
+  receipt = CreateReceipt(
+    "Shop", 10, "2024-01-05T10:00:00", "UTC", allocations={Allocation(bucket.guid.hex, 10)}
+  ).execute()
+  shutil.rmtree(get_bucket_content_dir(bucket.guid, test_context.tenant.guid))
+  test_context.identity_map.clear()
+
+  cached = require_receipt(receipt.guid)
+  rebuilt = LoadReceiptRepo(force_rebuild=True).execute()
+  assert [a.amount for a in rebuilt.get_by_ref(receipt.guid).allocations] == [0], "Missing buckets get nothing"
+  assert require_receipt(receipt.guid) is cached and cached.version == receipt.version, "The cache is not the repo's"
+
+
+@pytest.mark.integration
+def test_receipt_versions(test_context):
+  receipt = CreateReceipt("Shop", 10, "2024-01-05T10:00:00", "UTC", notes="Lunch").execute()
+  state_file = get_state_file(receipt.guid, test_context.tenant.guid)
+  mtime, seq = state_file.stat().st_mtime_ns, GetChanges().execute().seq
+
+  same = UpdateReceipt(receipt.guid.hex, "Shop", 10.0, "2024-01-05T10:00:00", "UTC", notes="Lunch").execute()
+  assert same.version == receipt.version
+  assert state_file.stat().st_mtime_ns == mtime, "Unchanged receipts should not be rewritten"
+  assert GetChanges().execute().seq == seq
+
+  updated = UpdateReceipt(
+    receipt.guid.hex, "Shop", 12, "2024-01-05T10:00:00", "UTC", notes="Lunch", expected_version=receipt.version
+  ).execute()
+  assert updated.version != receipt.version
+
+  with pytest.raises(Receipt.VersionConflict):
+    UpdateReceipt(
+      receipt.guid.hex, "Shop", 15, "2024-01-05T10:00:00", "UTC", notes="Lunch", expected_version=receipt.version
+    ).execute()
+  assert LoadReceipt(receipt.guid.hex).execute().total == 12
+
+
+@pytest.mark.integration
+def test_idempotency_keys(test_context, monkeypatch):
+  claimed = ClaimIdempotencyKey("retry-1", "hash-a").execute()
+  assert claimed.response is None, "A new key should be claimed"
+  with pytest.raises(IdempotencyKey.InProgress):
+    ClaimIdempotencyKey("retry-1", "hash-a").execute()
+  with pytest.raises(IdempotencyKey.Mismatch):
+    ClaimIdempotencyKey("retry-1", "hash-b").execute()
+
+  assert CompleteIdempotencyKey("retry-1", '{"guid": "abc"}').execute()
+  assert ClaimIdempotencyKey("retry-1", "hash-a").execute().response == '{"guid": "abc"}'
+
+  ClaimIdempotencyKey("retry-2", "hash-a").execute()
+  assert ReleaseIdempotencyKey("retry-2").execute()
+  assert ClaimIdempotencyKey("retry-2", "hash-a").execute().response is None, "A released key can be claimed again"
+
+  monkeypatch.setattr("taxos.idempotency.claim.handler.MAX_KEYS", 2)
+  ClaimIdempotencyKey("retry-3", "hash-a").execute()
+  assert ClaimIdempotencyKey("retry-1", "hash-b").execute().response is None, "The oldest key should be forgotten"
+
+
+@pytest.mark.integration
+def test_concurrent_repo_loads(test_context, monkeypatch):
+  ensure_receipt_created("Shop", 10)
+  get_repo_file(test_context.tenant.guid).unlink()
+  rebuilds = []
+
+  def slow_rebuild(tenant):
+    rebuilds.append(tenant.guid)
+    time.sleep(0.2)  # long enough for every thread to arrive
+    return rebuild(tenant)
+
+  def load_repo():
+    set_context(Context(test_context.tenant))  # a request of its own
+    return LoadReceiptRepo().execute()
+
+  monkeypatch.setattr("taxos.receipt.repo.load.handler.rebuild", slow_rebuild)
+  with ThreadPoolExecutor(4) as pool:
+    repos = [future.result() for future in [pool.submit(contextvars.copy_context().run, load_repo) for _ in range(4)]]
+
+  assert len(rebuilds) == 1, "Concurrent loads should share one rebuild"
+  assert len({id(repo) for repo in repos}) == 1, "Concurrent readers should share the published repo"
+  assert repos[0].frozen and len(repos[0].records) == 1
+
+
+@pytest.mark.integration
+def test_concurrent_writers(test_context, monkeypatch):
+  ensure_receipt_created("Shop", 10)
+
+  def slow_publish(*args):
+    time.sleep(0.05)  # long enough for the other writers to load their copies
+    return publish(*args)
+
+  def create_receipt(total):
+    set_context(Context(test_context.tenant))  # a request of its own
+    with unit_of_work():
+      return CreateReceipt("Shop", total, "2025-01-01T12:00:00", "UTC").execute()
+
+  monkeypatch.setattr("taxos.receipt.repo.save.handler.publish", slow_publish)
+  with ThreadPoolExecutor(8) as pool:
+    futures = [pool.submit(contextvars.copy_context().run, create_receipt, 11 + i) for i in range(8)]
+    receipts = [future.result() for future in futures]
+
+  guids = {receipt.guid for receipt in receipts}
+  set_context(Context(test_context.tenant))  # a request started after the writes
+  assert guids <= LoadReceiptRepo().execute().records.keys(), "No writer should publish over another's receipt"
+  saved = pickle.loads(get_repo_file(test_context.tenant.guid).read_bytes())
+  assert len(saved.records) == 9 and guids <= saved.records.keys()
+
+
+@pytest.mark.integration
+def test_repo_written_elsewhere(test_context):
+  ensure_receipt_created("Shop", 10)
+  repo_file = get_repo_file(test_context.tenant.guid)
+  assert get_published(test_context.tenant.guid), "Saving should publish the repo"
+
+  # Another process replaces the file within the same timestamp tick, with content of the same size
+  stat = repo_file.stat()
+  temp_file = repo_file.with_suffix(".other")
+  temp_file.write_bytes(repo_file.read_bytes())
+  temp_file.replace(repo_file)
+  os.utime(repo_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+  assert get_published(test_context.tenant.guid) is None, "A replaced repo file should be read again"
+
+  set_context(Context(test_context.tenant))
+  repo = LoadReceiptRepo().execute()
+  assert get_published(test_context.tenant.guid) == (repo, repo_file.read_bytes())
+
+
+@pytest.mark.integration
+def test_repo_snapshots(test_context):
+  first = ensure_receipt_created("Shop", 10)
+  snapshot = LoadReceiptRepo().execute()
+  assert snapshot.frozen, "Readers should get the published repo"
+  with pytest.raises(RuntimeError):
+    snapshot.add(first)
+
+  draft = LoadReceiptRepo(for_update=True).execute()
+  assert draft is not snapshot and not draft.frozen
+  assert LoadReceiptRepo().execute() is draft, "A request should read its own changes"
+
+  set_context(Context(test_context.tenant))  # another request, started before the write
+  assert LoadReceiptRepo().execute() is snapshot
+  set_context(test_context)
+  second = ensure_receipt_created("Shop", 20)
+  set_context(Context(test_context.tenant))
+  assert LoadReceiptRepo().execute() is not snapshot
+  assert set(LoadReceiptRepo().execute().records) == {first.guid, second.guid}
+  assert set(snapshot.records) == {first.guid}, "Published repos should not change"
+
+
+@pytest.mark.integration
+def test_warm_up(test_context):
+  tenant_guid = test_context.tenant.guid
+  ensure_receipt_created("Shop", 10)
+  assert RecordAccess(tenant_guid).execute()
+  assert not RecordAccess(tenant_guid).execute(), "Repeat accesses should not be written every time"
+  assert ListActiveTenants(limit=1).execute() == [tenant_guid]
+
+  get_repo_file(tenant_guid).unlink()
+  warm_up = WarmUp(max_tenants=1)
+  assert not warm_up.started and not warm_up.ready, "Warm-up that never started should not report ready"
+  warm_up.start()
+  assert warm_up.started
+  for _ in range(100):
+    if warm_up.ready:
+      break
+    time.sleep(0.1)
+  assert warm_up.ready and (warm_up.total, warm_up.done, warm_up.failed) == (1, 1, 0)
+  assert get_repo_file(tenant_guid).exists(), "The missing repo should have been rebuilt"
+  assert get_published(tenant_guid), "The repo should be in memory for the tenant's next request"
+
+
+@pytest.mark.integration
+def test_close_year(test_context, monkeypatch):
+  food = ensure_bucket_created("Food")
+  filed = CreateReceipt(
+    "Costco", 100, "2024-03-01T12:00:00", "UTC", allocations={Allocation(food.guid.hex, 60)}
+  ).execute()
+  current = CreateReceipt(
+    "Costco", 10, datetime.now().isoformat(), "UTC", allocations={Allocation(food.guid.hex, 10)}
+  ).execute()
+  with pytest.raises(ValueError):
+    CloseYear(datetime.now().year)
+
+  segment = CloseYear(2024).execute()
+  assert set(segment.records) == {filed.guid}
+  assert get_segment_file(test_context.tenant.guid, 2024).exists()
+  with pytest.raises(ValueError):
+    CloseYear(2024).execute()
+
+  set_context(Context(test_context.tenant))  # the next request
+  repo = LoadReceiptRepo().execute()
+  assert set(repo.records) == {current.guid}, "The hot repo should only hold open years"
+  assert {r.guid for r in ListReceipts(bucket=food).execute()} == {filed.guid, current.guid}
+  dashboard = GetDashboard(months=["2024-03", MONTH_KEY]).execute()
+  [summary] = [b for b in dashboard.buckets if b.guid == food.guid.hex]
+  assert (summary.total_amount, summary.receipt_count) == (70, 2)
+
+  with pytest.raises(Receipt.YearClosed):
+    UpdateReceipt(filed.guid.hex, "Costco", 90, "2024-03-01T12:00:00", "UTC").execute()
+  with pytest.raises(Receipt.YearClosed):
+    UpdateReceipt(current.guid.hex, "Costco", 10, "2024-03-02T12:00:00", "UTC").execute()
+  with pytest.raises(Receipt.YearClosed):
+    CreateReceipt("Shell", 40, "2024-05-01T12:00:00", "UTC").execute()
+  with pytest.raises(Receipt.YearClosed):
+    DeleteReceipt(filed.guid.hex).execute()
+  other = ensure_bucket_created("Other")
+  with pytest.raises(Receipt.YearClosed):
+    MergeBuckets(food, other).execute()
+  with pytest.raises(Receipt.YearClosed):
+    DeleteBucket(food).execute()
+  set_context(Context(test_context.tenant))  # read back from disk
+  assert require_bucket(food.guid.hex), "Buckets with allocations in closed years should be kept"
+  assert require_receipt(current.guid).version == current.version, "Nothing should change when a bucket is kept"
+  assert require_receipt(filed.guid).version == filed.version, "Closed years should keep their allocations"
+
+  read = []
+
+  def read_receipt(ref):
+    read.append(ref)
+    return require_receipt(ref)
+
+  monkeypatch.setattr("taxos.receipt.repo.load.handler.require_receipt", read_receipt)
+  rebuilt = LoadReceiptRepo(force_rebuild=True).execute()
+  assert set(rebuilt.records) == {current.guid} and filed.guid in {r.guid for r in rebuilt.iter_records()}
+  assert read == [current.guid], "Rebuilds should not read the state files of closed years"
+
+
+@pytest.mark.integration
+def test_migrate_tenant_data(test_context):
+  food = ensure_bucket_created("Food")
+  current = ensure_receipt_created("Shop", 10)
+  legacy = CreateReceipt(
+    "Costco", 25, "2024-03-01T12:00:00", "UTC", allocations={Allocation(food.guid.hex, 20)}
+  ).execute()
+  state_file = get_state_file(legacy.guid, test_context.tenant.guid)
+  assert json.load(state_file)["schema"] == STATE_SCHEMA
+  # As written before the schema was versioned
+  state = {k: v for k, v in json.load(state_file).items() if k not in ("schema", "guid")}
+  state["state_file"] = state_file.as_posix()
+  state["allocations"] = [{"bucket_guid": food.guid.hex, "amount": 20}]
+  state_file.write_text(json.dumps(state))
+  assert LoadReceipt(legacy.guid.hex).execute().version == legacy.version
+
+  assert MigrateTenantData(workers=2).execute() == 1
+  assert json.load(state_file)["schema"] == STATE_SCHEMA
+  assert json.load(get_state_file(current.guid, test_context.tenant.guid))["schema"] == STATE_SCHEMA
+  assert LoadReceipt(legacy.guid.hex).execute().version == legacy.version
+  assert MigrateTenantData().execute() == 0, "Migrated tenants should not be checked again"
+  assert MigrateTenantData(force=True).execute() == 0
+
+  # As written by a newer build, e.g. before a rollback
+  state_file.write_text(json.dumps({**json.load(state_file), "schema": STATE_SCHEMA + 1}))
+  with pytest.raises(Receipt.UnsupportedSchema):
+    LoadReceipt(legacy.guid.hex).execute()
+  set_context(Context(test_context.tenant))  # a request that has not read the receipt yet
+  with pytest.raises(Receipt.UnsupportedSchema):
+    LoadReceiptRepo(force_rebuild=True).execute()
@@ -0,0 +1,336 @@
+import base64
+import dataclasses
+import json
+import pickle
+
+import pytest
+from taxos.allocation.entity import Allocation
+from taxos.bucket.entity import Bucket
+from taxos.receipt.columns.entity import COMPACT_MIN_ROWS
+from taxos.receipt.entity import Receipt
+from taxos.receipt.page.tools import decode_page_token, get_sort_key, parse_order_by
+from taxos.receipt.repo.entity import VERSION, ReceiptRepo
+from taxos.receipt.search.tools import decode_search_token
+from taxos.receipt.segment.tools import build_segment, read_segment, write_segment
+from taxos.tenant.aggregate_receipts.query import AggregateReceipts
+from taxos.tenant.list_unallocated_receipts.query import ListUnallocatedReceipts
+from taxos.tenant.page_receipts.query import PageReceipts
+from taxos.tenant.search_receipts.query import SearchReceipts
+from taxos.tenant.stream_receipts.query import StreamReceipts
+from taxos.tools import guid
+from taxos.tools.time import parse_datetime
+
+BUCKET_A = guid.uuid7()
+BUCKET_B = guid.uuid7()
+
+
+def make_receipt(date: str, *buckets, total: float = 10, timezone: str = "UTC") -> Receipt:
+  return Receipt(
+    guid.uuid7(),
+    vendor="Vendor",
+    total=total,
+    date=date,
+    timezone=timezone,
+    allocations={Allocation(bucket.hex, total / len(buckets)) for bucket in buckets},
+  )
+
+
+def test_bucket_index_by_month():
+  repo = ReceiptRepo()
+  jan = make_receipt("2024-01-10T12:00:00", BUCKET_A)
+  feb = make_receipt("2024-02-10T12:00:00", BUCKET_A, BUCKET_B)
+  unallocated = make_receipt("2024-02-11T12:00:00")
+  for receipt in (jan, feb, unallocated):
+    repo.add(receipt)
+
+  assert {r.guid for r in repo.iter_by_bucket(BUCKET_A)} == {jan.guid, feb.guid}
+  assert [r.guid for r in repo.iter_by_bucket(BUCKET_A, ["2024-02"])] == [feb.guid]
+  assert [r.guid for r in repo.iter_by_bucket(BUCKET_B, ["2024-01"])] == []
+  assert list(repo.iter_by_bucket(guid.uuid7())) == []
+
+
+def test_bucket_index_follows_updates():
+  repo = ReceiptRepo()
+  receipt = make_receipt("2024-01-10T12:00:00", BUCKET_A)
+  repo.add(receipt)
+
+  moved = dataclasses.replace(receipt, date=receipt.date.replace(month=3), allocations={Allocation(BUCKET_B.hex, 10)})
+  repo.add(moved)
+  assert BUCKET_A not in repo.index_by_bucket
+  assert [r.guid for r in repo.iter_by_bucket(BUCKET_B, ["2024-03"])] == [receipt.guid]
+
+  repo.remove(moved)
+  repo.remove(moved)
+  assert repo.records == {}
+  assert repo.index_by_bucket == {}
+  assert repo.index_by_month == {}
+
+
+def test_unallocated_index_follows_updates():
+  repo = ReceiptRepo()
+  allocated = make_receipt("2024-01-05T12:00:00", BUCKET_A)
+  partial = dataclasses.replace(make_receipt("2024-01-10T12:00:00"), allocations={Allocation(BUCKET_A.hex, 4)})
+  empty = make_receipt("2024-02-10T12:00:00")
+  for receipt in (allocated, partial, empty):
+    repo.add(receipt)
+
+  assert repo.get_unallocated_totals(["2024-01"]) == (1, 6)
+  assert repo.get_unallocated_totals() == (2, 16)
+  assert {r.guid for r in repo.iter_unallocated()} == {partial.guid, empty.guid}
+
+  repo.add(dataclasses.replace(partial, allocations={Allocation(BUCKET_A.hex, 10)}))
+  repo.remove(empty)
+  assert repo.get_unallocated_totals() == (0, 0)
+  assert repo.index_unallocated == {}
+
+
+def test_list_unallocated_receipts_pages_by_date():
+  repo = ReceiptRepo()
+  receipts = [make_receipt(f"2024-03-0{day}T12:00:00") for day in range(1, 6)]
+  for receipt in reversed(receipts):
+    repo.add(receipt)
+  repo.add(make_receipt("2024-03-06T12:00:00", BUCKET_A))
+
+  seen, page_token = [], ""
+  while True:
+    page = ListUnallocatedReceipts(["2024-03"], page_size=2, page_token=page_token, repo=repo).execute()
+    seen += [r.guid for r in page.receipts]
+    if not (page_token := page.next_page_token):
+      break
+  assert seen == [r.guid for r in receipts]
+
+
+def test_vendor_index_range_queries():
+  repo = ReceiptRepo()
+  old = dataclasses.replace(make_receipt("2023-06-01T12:00:00"), vendor="Costco")
+  new = dataclasses.replace(make_receipt("2024-06-01T12:00:00"), vendor="  COSTCO ")
+  other = dataclasses.replace(make_receipt("2024-06-02T12:00:00"), vendor="Shell")
+  for receipt in (new, other, old):
+    repo.add(receipt)
+
+  assert repo.count_by_vendor("costco") == 2
+  assert [r.guid for r in repo.iter_by_vendor("Costco")] == [old.guid, new.guid]
+  start, end = parse_datetime("2024-01-01", "UTC"), parse_datetime("2025-01-01", "UTC")
+  assert [r.guid for r in repo.iter_by_vendor("costco", start, end)] == [new.guid]
+
+  repo.add(dataclasses.replace(new, vendor="Shell"))
+  repo.remove(old)
+  assert repo.count_by_vendor("costco") == 0
+  assert repo.index_by_vendor.keys() == {"shell"}
+
+
+def test_date_index_range_queries():
+  repo = ReceiptRepo()
+  march = make_receipt("2024-03-31T23:30:00", timezone="America/New_York")  # already April in UTC
+  jan = make_receipt("2024-01-15T12:00:00")
+  april = make_receipt("2024-04-01T00:00:00")
+  same_time = make_receipt("2024-01-15T12:00:00")
+  for receipt in (march, jan, april, same_time):
+    repo.add(receipt)
+
+  assert [r.guid for r in repo.iter_by_date()] == [jan.guid, same_time.guid, april.guid, march.guid]
+
+  start = parse_datetime("2024-04-01T00:00:00", "UTC")
+  assert [r.guid for r in repo.iter_by_date(start)] == [april.guid, march.guid]
+  assert [r.guid for r in repo.iter_by_date(end=start)] == [jan.guid, same_time.guid]
+  assert repo.month_by_guid[march.guid] == "2024-03"
+
+  repo.remove(jan)
+  assert [r.guid for r in repo.iter_by_date(end=start)] == [same_time.guid]
+  assert jan.guid not in repo.month_by_guid
+
+
+def read_all_pages(repo: ReceiptRepo, **kwargs) -> list[Receipt]:
+  receipts, page_token = [], ""
+  while True:
+    page = PageReceipts(page_size=2, page_token=page_token, repo=repo, **kwargs).execute()
+    assert len(page.receipts) <= 2
+    receipts.extend(page.receipts)
+    if not (page_token := page.next_page_token):
+      return receipts
+
+
+@pytest.mark.parametrize("order_by", ["date", "date desc", "total", "total desc", "vendor", "vendor desc"])
+def test_keyset_pagination(order_by):
+  repo = ReceiptRepo()
+  receipts = [
+    dataclasses.replace(make_receipt(f"2024-0{month}-01T12:00:00", total=total), vendor=vendor)
+    for month, total, vendor in [(1, 5, "b"), (2, 5, "A"), (3, 1, "c"), (1, 9, "a"), (5, 2, "B")]
+  ]
+  for receipt in receipts:
+    repo.add(receipt)
+
+  order, descending = parse_order_by(order_by)
+  expected = sorted(receipts, key=get_sort_key(order), reverse=descending)
+  assert [r.guid for r in read_all_pages(repo, order_by=order_by)] == [r.guid for r in expected]
+
+
+def test_page_token_must_match_order():
+  repo = ReceiptRepo()
+  for month in range(1, 4):
+    repo.add(make_receipt(f"2024-0{month}-01T12:00:00"))
+
+  page = PageReceipts(page_size=1, order_by="total", repo=repo).execute()
+  with pytest.raises(ValueError):
+    PageReceipts(page_size=1, order_by="date", page_token=page.next_page_token, repo=repo).execute()
+
+
+@pytest.mark.parametrize(
+  "token",
+  [["total", 10, 5], ["total", "10", guid.uuid7().hex], ["total", 10], "total", ["date", [], guid.uuid7().hex]],
+)
+def test_malformed_page_tokens_are_invalid(token):
+  order_by = token[0] if isinstance(token, list) else "total"
+  page_token = base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
+  with pytest.raises(ValueError, match="Invalid page_token"):
+    decode_page_token(page_token, order_by)
+
+
+@pytest.mark.parametrize(
+  "token", [["shop", 1.0, 2.0, 5], ["shop", "high", 2.0, guid.uuid7().hex], ["shop", 1.0, 2.0], {"shop": 1}, "x"]
+)
+def test_malformed_search_tokens_are_invalid(token):
+  page_token = base64.urlsafe_b64encode(json.dumps(token).encode()).decode()
+  with pytest.raises(ValueError, match="Invalid page_token"):
+    decode_search_token(page_token, "shop")
+  with pytest.raises(ValueError, match="Invalid page_token"):
+    decode_search_token("not base64!", "shop")
+
+
+def test_stream_receipts_in_date_order():
+  repo = ReceiptRepo()
+  receipts = [
+    make_receipt("2024-02-10T12:00:00", BUCKET_A),
+    make_receipt("2024-01-20T12:00:00", BUCKET_A),
+    make_receipt("2024-01-05T12:00:00", BUCKET_B),
+    make_receipt("2024-01-10T12:00:00", BUCKET_A),
+  ]
+  for receipt in receipts:
+    repo.add(receipt)
+
+  def stream(**kwargs) -> list[str]:
+    return [r.date.strftime("%m-%d") for r in StreamReceipts(repo=repo, **kwargs).execute()]
+
+  assert stream() == ["01-05", "01-10", "01-20", "02-10"]
+  assert stream(months=["2024-02", "2024-01"]) == ["02-10", "01-05", "01-10", "01-20"]
+  assert stream(bucket=Bucket(BUCKET_A, "A")) == ["01-10", "01-20", "02-10"]
+
+
+def test_aggregate_receipts():
+  repo = ReceiptRepo()
+  split = make_receipt("2024-03-31T23:30:00", BUCKET_A, BUCKET_B, timezone="America/New_York")  # Q1 locally
+  partial = dataclasses.replace(make_receipt("2024-04-02T12:00:00", total=30), vendor="shell")
+  partial = dataclasses.replace(partial, allocations={Allocation(BUCKET_A.hex, 10)})
+  for receipt in (split, partial, make_receipt("2023-01-01T00:00:00", BUCKET_B)):
+    repo.add(receipt)
+
+  rows = AggregateReceipts(["year"], repo=repo).execute().rows
+  assert [(r.keys, r.total_amount, r.receipt_count) for r in rows] == [(["2023"], 10, 1), (["2024"], 40, 2)]
+
+  rows = AggregateReceipts(["bucket", "quarter"], start="2024-01-01", repo=repo).execute().rows
+  assert [(r.keys, r.total_amount) for r in rows] == [
+    (["", "2024-Q2"], 20),
+    ([BUCKET_A.hex, "2024-Q1"], 5),
+    ([BUCKET_A.hex, "2024-Q2"], 10),
+    ([BUCKET_B.hex, "2024-Q1"], 5),
+  ]
+
+  rows = AggregateReceipts(["vendor", "month"], buckets=[BUCKET_A.hex], vendors=["SHELL"], repo=repo).execute().rows
+  assert [(r.keys, r.total_amount, r.receipt_count) for r in rows] == [(["shell", "2024-04"], 10, 1)]
+
+  # Updates replace the old rows, and compaction keeps totals intact
+  for _ in range(COMPACT_MIN_ROWS):
+    repo.add(dataclasses.replace(partial, allocations=set()))
+  assert repo.columns.dead_rows < COMPACT_MIN_ROWS
+  [row] = AggregateReceipts(repo=repo).execute().rows
+  assert (row.keys, row.total_amount, row.receipt_count) == ([], 50, 3)
+
+
+def test_search_receipts():
+  repo = ReceiptRepo()
+  costco = dataclasses.replace(make_receipt("2024-01-01T12:00:00"), vendor="Costco", notes="Groceries for the cottage")
+  invoice = dataclasses.replace(make_receipt("2024-02-01T12:00:00"), vendor="Hydro", vendor_ref="INV-2024-0042")
+  cottage = dataclasses.replace(make_receipt("2024-03-01T12:00:00"), vendor="Cottage Rentals")
+  for receipt in (costco, invoice, cottage):
+    repo.add(receipt)
+
+  def search(text: str, **kwargs) -> list:
+    return [r.guid for r in SearchReceipts(text, repo=repo, **kwargs).execute().receipts]
+
+  assert search("inv-2024-0042") == [invoice.guid]
+  assert search("COTTAGE") == [cottage.guid, costco.guid]  # vendor outranks notes
+  assert search("co") == [costco.guid, cottage.guid]  # ties go to newest first
+  assert search("cott groc") == [costco.guid]
+  assert search("costco hydro") == []
+
+  first = SearchReceipts("co", page_size=1, repo=repo).execute()
+  second = SearchReceipts("co", page_size=1, page_token=first.next_page_token, repo=repo).execute()
+  assert [r.guid for r in first.receipts + second.receipts] == search("co")
+  assert not second.next_page_token
+  with pytest.raises(ValueError):
+    SearchReceipts("cottage", page_token=first.next_page_token, repo=repo).execute()
+
+  repo.add(dataclasses.replace(costco, notes=""))
+  repo.remove(cottage)
+  assert search("cottage") == []
+  assert "cottage" not in repo.search_index.terms
+
+
+def test_hash_and_fingerprint_indexes():
+  repo = ReceiptRepo()
+  receipt = dataclasses.replace(make_receipt("2024-03-31T23:30:00", timezone="America/New_York"), hash="abc")
+  repo.add(receipt)
+
+  assert [r.guid for r in repo.iter_by_hash("abc")] == [receipt.guid]
+  date = parse_datetime("2024-03-31T08:00:00", "America/New_York")  # same local day
+  assert [r.guid for r in repo.iter_by_fingerprint(" vendor ", 10.001, date)] == [receipt.guid]
+  assert list(repo.iter_by_fingerprint("Vendor", 10.01, date)) == []
+
+  repo.add(dataclasses.replace(receipt, hash="", total=12))
+  assert list(repo.iter_by_hash("abc")) == []
+  assert list(repo.iter_by_fingerprint("Vendor", 10, date)) == []
+  repo.remove(receipt)
+  assert repo.index_by_hash == {} and repo.index_by_fingerprint == {}
+
+
+def test_version_is_pickled():
+  repo = pickle.loads(pickle.dumps(ReceiptRepo()))
+  assert vars(repo).get("version") == VERSION, "Saved repos should not be taken for outdated ones"
+
+
+def test_reads_merge_closed_year_segments(tmp_path):
+  closed = [
+    make_receipt("2023-03-10T12:00:00", BUCKET_A, total=30),
+    make_receipt("2023-12-31T23:00:00", total=5, timezone="America/New_York"),  # 2023 locally
+    dataclasses.replace(make_receipt("2023-06-01T12:00:00", BUCKET_B), vendor="Shell", hash="abc"),
+  ]
+  write_segment(tmp_path / "2023.seg", build_segment(2023, closed))
+  segment = read_segment(tmp_path / "2023.seg")
+  assert segment.frozen and isinstance(segment.columns.amount, memoryview)
+
+  repo = ReceiptRepo()
+  repo.segments = {2023: segment}
+  open_jan = make_receipt("2024-01-10T12:00:00", BUCKET_A)
+  repo.add(open_jan)
+  with pytest.raises(Receipt.YearClosed):
+    repo.add(make_receipt("2023-05-01T12:00:00"))
+
+  assert repo.get_by_ref(closed[0].guid) == closed[0]
+  assert len(list(repo.iter_records())) == 4
+  assert [r.guid for r in repo.iter_by_date()] == [r.guid for r in (closed[0], closed[2], closed[1], open_jan)]
+  assert [r.guid for r in repo.iter_by_date(reverse=True)][:2] == [open_jan.guid, closed[1].guid]
+  assert {r.guid for r in repo.iter_by_bucket(BUCKET_A)} == {closed[0].guid, open_jan.guid}
+  assert [r.guid for r in repo.iter_by_bucket(BUCKET_A, ["2023-03"])] == [closed[0].guid]
+  assert repo.get_bucket_months(BUCKET_A) == ["2023-03", "2024-01"]
+  assert repo.get_bucket_totals(BUCKET_A) == (40, 2)
+  assert repo.get_bucket_totals(BUCKET_A, ["2024-01"]) == (10, 1)
+  assert repo.get_unallocated_totals(["2023-12"]) == (1, 5)
+  assert repo.count_by_vendor("vendor") == 3
+  assert [r.guid for r in repo.iter_by_hash("abc")] == [closed[2].guid]
+  assert set(SearchReceipts("shell", repo=repo).execute().receipts) == {closed[2]}
+  assert [r.guid for r in PageReceipts(repo=repo, months=["2023-06"]).execute().receipts] == [closed[2].guid]
+
+  rows = AggregateReceipts(["year"], repo=repo).execute().rows
+  assert [(r.keys, r.total_amount, r.receipt_count) for r in rows] == [(["2023"], 45, 3), (["2024"], 10, 1)]
+  rows = AggregateReceipts(["vendor"], repo=repo).execute().rows
+  assert [(r.keys, r.total_amount, r.receipt_count) for r in rows] == [(["Shell"], 10, 1), (["Vendor"], 45, 3)]
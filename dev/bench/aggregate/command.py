@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class BenchAggregate:
+  """Time AggregateReceipts on a synthetic tenant, against a per-receipt loop."""
+
+  receipts: int = field(
+    default=500_000,
+    metadata={"help": "How many synthetic receipts to generate."},
+  )
+  group_by: str = field(
+    default="bucket,quarter",
+    metadata={"help": "Comma-separated dimensions to group by."},
+  )
+  seed: int = field(
+    default=0,
+    metadata={"help": "Random seed for the synthetic receipts."},
+  )
+
+  def execute(self):
+    from dev.bench.aggregate.handler import handle
+
+    handle(self)
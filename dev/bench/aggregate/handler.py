@@ -0,0 +1,82 @@
+import random
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from taxos.allocation.entity import Allocation
+from taxos.bucket.entity import BucketRef
+from taxos.receipt.entity import Receipt
+from taxos.receipt.repo.entity import ReceiptRepo
+from taxos.tenant.aggregate_receipts.query import AggregateReceipts
+
+from dev.bench.aggregate.command import BenchAggregate
+
+BUCKETS = 40
+VENDORS = 2_000
+YEARS = 5
+
+
+def make_repo(command: BenchAggregate) -> ReceiptRepo:
+  rng = random.Random(command.seed)
+  buckets = [BucketRef(UUID(int=rng.getrandbits(128)).hex) for _ in range(BUCKETS)]
+  vendors = [f"Vendor {i}" for i in range(VENDORS)]
+  start = datetime(datetime.now().year - YEARS, 1, 1)
+  repo = ReceiptRepo()
+  for _ in range(command.receipts):
+    total = round(rng.uniform(1, 500), 2)
+    # Mostly single-bucket receipts, some split, some left unallocated
+    split = rng.choices((0, 1, 2), weights=(1, 7, 2))[0]
+    allocations = {Allocation(bucket, round(total / split, 2)) for bucket in rng.sample(buckets, split)}
+    repo.add(
+      Receipt(
+        UUID(int=rng.getrandbits(128)),
+        vendor=rng.choice(vendors),
+        total=total,
+        date=start + timedelta(seconds=rng.randrange(YEARS * 365 * 86400)),
+        timezone="UTC",
+        allocations=allocations,
+      )
+    )
+  return repo
+
+
+def loop_receipts(repo: ReceiptRepo, query: AggregateReceipts) -> int:
+  """The per-Receipt equivalent of the query, for comparison."""
+  labels = {
+    "vendor": lambda receipt, bucket: receipt.vendor,
+    "bucket": lambda receipt, bucket: bucket,
+    "month": lambda receipt, bucket: f"{receipt.date:%Y-%m}",
+    "quarter": lambda receipt, bucket: f"{receipt.date.year}-Q{(receipt.date.month - 1) // 3 + 1}",
+    "year": lambda receipt, bucket: str(receipt.date.year),
+  }
+  totals: dict[tuple, list] = {}
+  for receipt in repo.records.values():
+    rows = [(a.bucket.guid.hex, a.amount) for a in receipt.allocations]
+    if receipt.unallocated_amount > 0:
+      rows.append(("", receipt.unallocated_amount))
+    for bucket, amount in rows:
+      key = tuple(labels[d](receipt, bucket) for d in query.group_by)
+      total = totals.setdefault(key, [0.0, set()])
+      total[0] += amount
+      total[1].add(receipt.guid)
+  return len(totals)
+
+
+def timed(label: str, fn):
+  started = time.perf_counter()
+  result = fn()
+  print(f"⏱️  {label}: {time.perf_counter() - started:.3f}s")
+  return result
+
+
+def handle(command: BenchAggregate):
+  print(f"🏗️  Building a synthetic tenant of {command.receipts:,} receipts...")
+  repo = timed("build repo", lambda: make_repo(command))
+  print(f"📊 {len(repo.columns.amount):,} allocation rows")
+
+  query = AggregateReceipts(group_by=command.group_by.split(","), repo=repo)
+  result = timed(f"AggregateReceipts by {command.group_by}", query.execute)
+  print(f"📋 {len(result.rows):,} groups")
+
+  groups = timed("per-receipt loop", lambda: loop_receipts(repo, query))
+  print(f"📋 {groups:,} groups")
@@ -28,7 +28,6 @@ const App: React.FC = () => {
 	const {
 		buckets,
 		bucketSummaries,
-		vendorNames,
 		addReceipt,
 		updateReceipt,
 		deleteReceipt,
@@ -344,7 +343,6 @@ const App: React.FC = () => {
 					}}
 					onDelete={deleteReceipt}
 					bucketSummaries={bucketSummaries}
-					vendorNames={vendorNames}
 					initialFile={uploadedFile}
 					editingReceipt={editingReceipt}
 					uploadingFile={uploadingFile}
@@ -1,7 +1,38 @@
-import { createClient, type Interceptor, Code } from "@connectrpc/connect";
+import {
+	createClient,
+	type Interceptor,
+	Code,
+	ConnectError,
+} from "@connectrpc/connect";
 import { createConnectTransport } from "@connectrpc/connect-web";
 import { TaxosApi } from "./v1/taxos_service_connect";
 
+// Calls that create something are sent with an idempotency key, so they can be retried
+// without the server creating it twice
+const IDEMPOTENT_METHODS = new Set([
+	"CreateBucket",
+	"CreateReceipt",
+	"UploadReceiptFile",
+]);
+const MAX_ATTEMPTS = 4;
+// Only transient failures; a retry of a rejected or conflicting call would fail the same way
+const RETRYABLE_CODES = new Set([Code.Unavailable, Code.DeadlineExceeded]);
+
+const retryInterceptor: Interceptor = (next) => async (req) => {
+	if (!IDEMPOTENT_METHODS.has(req.method.name)) return await next(req);
+
+	req.header.set("Idempotency-Key", crypto.randomUUID());
+	for (let attempt = 1; ; attempt++) {
+		try {
+			return await next(req);
+		} catch (error) {
+			const { code } = ConnectError.from(error);
+			if (attempt >= MAX_ATTEMPTS || !RETRYABLE_CODES.has(code)) throw error;
+			await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** attempt));
+		}
+	}
+};
+
 const logoutOnUnauthorized = () => {
 	localStorage.removeItem("taxos_token");
 	window.location.href = "/";
@@ -50,7 +81,7 @@ export class TaxosApiClient {
 			TaxosApi,
 			createConnectTransport({
 				baseUrl,
-				interceptors: [tokenInterceptor],
+				interceptors: [retryInterceptor, tokenInterceptor],
 			}),
 		);
 	}
@@ -118,6 +149,29 @@ export class TaxosApiClient {
 		return await this.client.listReceipts(params || {});
 	}
 
+	// Pages through every receipt in the given months that is not fully allocated
+	async listUnallocatedReceipts(params?: { months?: string[] }) {
+		const receipts = [];
+		let pageToken = "";
+		do {
+			const page = await this.client.listUnallocatedReceipts({
+				...params,
+				pageSize: 1000,
+				pageToken,
+			});
+			receipts.push(...page.receipts);
+			pageToken = page.nextPageToken;
+		} while (pageToken);
+		return { receipts };
+	}
+
+	// Yields receipts as the server streams them, without waiting for the full list
+	async *streamReceipts(params?: { bucket?: string; months?: string[] }) {
+		for await (const chunk of this.client.streamReceipts(params || {})) {
+			yield* chunk.receipts;
+		}
+	}
+
 	async deleteReceipt(guid: string) {
 		return await this.client.deleteReceipt({ guid });
 	}
@@ -234,3 +288,6 @@ export const uploadReceiptFile = (
 
 export const downloadReceiptFile = (fileHash: string) =>
 	defaultClient.downloadReceiptFile(fileHash);
+
+export const listUnallocatedReceipts = (params?: { months?: string[] }) =>
+	defaultClient.listUnallocatedReceipts(params);
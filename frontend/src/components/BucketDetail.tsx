@@ -1,4 +1,4 @@
-import React, { useMemo, useEffect, useCallback } from "react";
+import React, { useMemo, useEffect } from "react";
 import { motion } from "framer-motion";
 import {
 	ArrowLeft,
@@ -42,27 +42,18 @@ const BucketDetail: React.FC<BucketDetailProps> = ({
 		loadReceiptsForBucket,
 		currentReceiptsList,
 		unallocatedSummary,
-		unallocatedReceipts,
 		setActiveBucketId,
 	} = useTaxos();
 	const [isEditing, setIsEditing] = React.useState(false);
 	const [editName, setEditName] = React.useState("");
 
-	const getUnallocatedReceipts = useCallback(async (): Promise<Receipt[]> => {
-		// Dashboard handles the refresh which populates unallocatedReceipts
-		return unallocatedReceipts;
-	}, [unallocatedReceipts]);
-
 	// Fetch receipts when bucket changes or date range changes
 	useEffect(() => {
 		setActiveBucketId(bucketId);
 		const fetchReceipts = async () => {
 			try {
-				if (bucketId === UNALLOCATED_BUCKET_ID) {
-					await getUnallocatedReceipts();
-				} else {
-					await loadReceiptsForBucket(bucketId, startDate, endDate);
-				}
+				// Unallocated receipts are paged in separately from the dashboard's first few
+				await loadReceiptsForBucket(bucketId, startDate, endDate);
 			} catch (error) {
 				console.error("Failed to fetch receipts:", error);
 			}
@@ -74,7 +65,6 @@ const BucketDetail: React.FC<BucketDetailProps> = ({
 		endDate,
 		setActiveBucketId,
 		loadReceiptsForBucket,
-		getUnallocatedReceipts,
 	]);
 
 	const bucketName = useMemo(() => {
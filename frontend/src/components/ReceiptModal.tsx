@@ -19,7 +19,11 @@ import type {
 } from "../types";
 import { format } from "date-fns";
 import UploadProgressWidget from "./UploadProgressWidget";
-import { uploadReceiptFile, downloadReceiptFile } from "../api/client";
+import {
+	client,
+	uploadReceiptFile,
+	downloadReceiptFile,
+} from "../api/client";
 
 interface ReceiptModalProps {
 	isOpen: boolean;
@@ -27,7 +31,6 @@ interface ReceiptModalProps {
 	onSave: (receipt: Omit<Receipt, "id">) => void;
 	onDelete: (id: string) => void;
 	bucketSummaries: BucketSummary[];
-	vendorNames?: string[];
 	initialFile?: string;
 	editingReceipt?: Receipt;
 	// File upload props
@@ -50,7 +53,6 @@ const ReceiptModal: React.FC<ReceiptModalProps> = ({
 	onSave,
 	onDelete,
 	bucketSummaries,
-	vendorNames = [],
 	initialFile,
 	editingReceipt,
 	uploadingFile,
@@ -79,6 +81,42 @@ const ReceiptModal: React.FC<ReceiptModalProps> = ({
 	const [downloadError, setDownloadError] = useState<string>("");
 
 	const vendorRef = useRef<HTMLInputElement>(null);
+	const completeVendorTimerRef = useRef<ReturnType<typeof setTimeout>>();
+
+	// Don't look up a completion until typing pauses
+	useEffect(() => () => clearTimeout(completeVendorTimerRef.current), []);
+
+	// Complete the vendor name with the most used vendor matching what was typed
+	const completeVendor = async (inputValue: string) => {
+		try {
+			const { vendors } = await client.listVendors({
+				prefix: inputValue,
+				limit: 1,
+			});
+			const match = vendors[0]?.name;
+			// Ignore the response if the user has kept typing since
+			if (!match || vendorRef.current?.value !== inputValue) return;
+			if (
+				match.toLowerCase() !== inputValue.toLowerCase() &&
+				match.toLowerCase().startsWith(inputValue.toLowerCase())
+			) {
+				// Set the full match as value
+				setVendor(match);
+
+				// Select the completion part
+				setTimeout(() => {
+					if (vendorRef.current) {
+						vendorRef.current.setSelectionRange(
+							inputValue.length,
+							match.length,
+						);
+					}
+				}, 0);
+			}
+		} catch (error) {
+			console.error("Failed to look up vendors:", error);
+		}
+	};
 	const lastUploadedHashRef = useRef<string>("");
 
 	// Reset form when opening
@@ -456,28 +494,12 @@ const ReceiptModal: React.FC<ReceiptModalProps> = ({
 										setVendor(inputValue);
 
 										// Only apply autocomplete if not deleting and there's input
+										clearTimeout(completeVendorTimerRef.current);
 										if (!isDeleting && inputValue.length > 0) {
-											const match = vendorNames.find((name) =>
-												name.toLowerCase().startsWith(inputValue.toLowerCase()),
+											completeVendorTimerRef.current = setTimeout(
+												() => void completeVendor(inputValue),
+												150,
 											);
-
-											if (
-												match &&
-												match.toLowerCase() !== inputValue.toLowerCase()
-											) {
-												// Set the full match as value
-												setVendor(match);
-
-												// Select the completion part
-												setTimeout(() => {
-													if (vendorRef.current) {
-														vendorRef.current.setSelectionRange(
-															inputValue.length,
-															match.length,
-														);
-													}
-												}, 0);
-											}
 										}
 
 										// Reset deleting flag after handling
@@ -4,12 +4,19 @@ import React, {
 	useState,
 	useEffect,
 	useCallback,
-	useMemo,
+	useRef,
 	type ReactNode,
 } from "react";
 import { Timestamp } from "@bufbuild/protobuf";
+import { Code, ConnectError } from "@connectrpc/connect";
 import type { Bucket, BucketSummary, Receipt } from "../types";
-import { client, getToken, dateToTimestamp } from "../api/client";
+import type { Receipt as ReceiptMessage } from "../api/v1/taxos_service_pb";
+import {
+	client,
+	getToken,
+	dateToTimestamp,
+	listUnallocatedReceipts,
+} from "../api/client";
 import { UNALLOCATED_BUCKET_ID } from "../types";
 
 const slugify = (text: string) => {
@@ -21,6 +28,9 @@ const slugify = (text: string) => {
 		.replace(/^-+|-+$/g, "");
 };
 
+const isUnallocated = (receipt: Receipt) =>
+	receipt.total - receipt.allocations.reduce((sum, a) => sum + a.amount, 0) > 0;
+
 interface TaxosContextType {
 	buckets: Bucket[];
 	bucketSummaries: BucketSummary[];
@@ -28,7 +38,6 @@ interface TaxosContextType {
 	receipts: Record<string, Receipt>;
 	unallocatedReceipts: Receipt[];
 	currentReceiptsList: Receipt[];
-	vendorNames: string[];
 	loading: boolean;
 	authenticated: boolean;
 	isNameTaken: (name: string, excludeId?: string) => boolean;
@@ -70,17 +79,10 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 	const [receipts, setReceipts] = useState<Record<string, Receipt>>({});
 	const [unallocatedReceipts, setUnallocatedReceipts] = useState<Receipt[]>([]);
 	const [currentReceiptsList, setCurrentReceiptsList] = useState<Receipt[]>([]);
-	const [vendorNames, setVendorNames] = useState<string[]>([]);
 	const [activeBucketId, setActiveBucketId] = useState<string | null>(null);
+	// Latest server change reflected locally; GetChanges fetches anything newer
+	const changeSeq = useRef<bigint | null>(null);
 
-	// Track receipt hashes for O(1) duplicate detection
-	const receiptHashes = useMemo(() => {
-		const hashes = new Set<string>();
-		Object.values(receipts).forEach((r) => {
-			if (r.hash) hashes.add(r.hash);
-		});
-		return hashes;
-	}, [receipts]);
 	const [loading, setLoading] = useState(true);
 	const [authenticated] = useState(!!getToken());
 	const [currentDateFilter, setCurrentDateFilter] = useState<{
@@ -98,6 +100,22 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 		return new Date(seconds * 1000 + nanos / 1_000_000).toISOString();
 	};
 
+	const receiptFromMessage = (r: ReceiptMessage): Receipt => ({
+		id: r.guid,
+		vendor: r.vendor,
+		total: r.total,
+		date: timestampToIso(r.date),
+		timezone: r.timezone,
+		allocations: r.allocations.map((a) => ({
+			bucketId: a.bucket,
+			amount: a.amount,
+		})),
+		ref: r.vendorRef || undefined,
+		notes: r.notes || undefined,
+		hash: r.hash || undefined,
+		version: r.version || undefined,
+	});
+
 	// Helper to generate "yyyy-mm" strings for a range
 	const getMonthsInRange = (start?: Date, end?: Date): string[] => {
 		if (!start || !end) return [];
@@ -121,10 +139,11 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 			endDate: Date,
 		): Promise<Receipt[]> => {
 			try {
-				const response = await client.listReceipts({
-					bucket: bucketId,
-					months: getMonthsInRange(startDate, endDate),
-				});
+				const months = getMonthsInRange(startDate, endDate);
+				const response =
+					bucketId === UNALLOCATED_BUCKET_ID
+						? await listUnallocatedReceipts({ months })
+						: await client.listReceipts({ bucket: bucketId, months });
 
 				const bucketReceipts: Receipt[] = response.receipts.map((r) => ({
 					id: r.guid,
@@ -139,6 +158,7 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 					ref: r.vendorRef || undefined,
 					notes: r.notes || undefined,
 					hash: r.hash || undefined,
+					version: r.version || undefined,
 				}));
 
 				// Update source of truth for current view
@@ -196,6 +216,7 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				const response = await client.getDashboard({
 					months: getMonthsInRange(startDate, endDate),
 				});
+				changeSeq.current = response.changeSeq;
 
 				const apiBuckets: Bucket[] = response.buckets.map((summary) => ({
 					id: summary.guid,
@@ -227,41 +248,21 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 						ref: r.vendorRef || undefined,
 						notes: r.notes || undefined,
 						hash: r.hash || undefined,
+						version: r.version || undefined,
 					}));
 
-				// Calculate unallocated portions for the pseudo-bucket summary
-				let unallocatedTotal = 0;
-				let unallocatedCount = 0;
-
-				for (const r of apiUnallocatedReceipts) {
-					const allocatedAmount = r.allocations.reduce(
-						(sum, a) => sum + a.amount,
-						0,
-					);
-					const unallocatedAmount = r.total - allocatedAmount;
-					if (unallocatedAmount > 0) {
-						unallocatedTotal += unallocatedAmount;
-						unallocatedCount++;
-					}
-				}
-
 				setBuckets(apiBuckets);
 				setBucketSummaries(apiSummaries);
 				setUnallocatedReceipts(apiUnallocatedReceipts);
-				setVendorNames(response.vendorNames || []);
+				// The dashboard only carries the oldest few unallocated receipts, plus totals for all of them
 				setUnallocatedSummary({
-					totalAmount: unallocatedTotal,
-					receiptCount: unallocatedCount,
+					totalAmount: response.unallocatedAmount,
+					receiptCount: response.unallocatedCount,
 				});
 
-				// If we have an active bucket that ISN'T unallocated, reload that specific bucket's receipts
-				// Otherwise, show unallocated receipts (default dashboard view)
-				if (
-					activeBucketId &&
-					activeBucketId !== UNALLOCATED_BUCKET_ID &&
-					startDate &&
-					endDate
-				) {
+				// If we have an active bucket (including unallocated), reload that specific bucket's receipts
+				// Otherwise, show the oldest unallocated receipts (default dashboard view)
+				if (activeBucketId && startDate && endDate) {
 					console.log(`Refreshing active bucket: ${activeBucketId}`);
 					// We need to call loadReceiptsForBucket here to get the latest data for the specific bucket
 					// This effectively "refreshes" the view without switching back to unallocated
@@ -302,11 +303,136 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 		}
 	}, [authenticated]);
 
-	const triggerRefresh = useCallback(() => {
-		if (currentDateFilter.start || currentDateFilter.end) {
-			void refreshBuckets(currentDateFilter.start, currentDateFilter.end, true);
+	// Whether a receipt belongs in the list currently shown
+	const isInView = useCallback(
+		(receipt: Receipt) => {
+			const date = new Date(receipt.date);
+			const [month] = getMonthsInRange(date, date);
+			const { start, end } = currentDateFilter;
+			if (!getMonthsInRange(start, end).includes(month)) return false;
+			if (activeBucketId && activeBucketId !== UNALLOCATED_BUCKET_ID) {
+				return receipt.allocations.some((a) => a.bucketId === activeBucketId);
+			}
+			return isUnallocated(receipt);
+		},
+		[currentDateFilter, activeBucketId],
+	);
+
+	// Apply only what changed on the server since the last load, instead of reloading everything
+	const triggerRefresh = useCallback(async () => {
+		const { start, end } = currentDateFilter;
+		if (!start && !end) return;
+		if (changeSeq.current === null) {
+			return void refreshBuckets(start, end, true);
 		}
-	}, [currentDateFilter, refreshBuckets]);
+
+		try {
+			const changes = await client.getChanges({ sinceSeq: changeSeq.current });
+			if (changes.resync) {
+				return void refreshBuckets(start, end, true);
+			}
+			changeSeq.current = changes.seq;
+
+			const changed = changes.receipts.map(receiptFromMessage);
+			const deleted = new Set(changes.deletedReceipts);
+			setReceipts((prev) => {
+				const updated = { ...prev };
+				for (const id of changes.deletedReceipts) delete updated[id];
+				for (const receipt of changed) updated[receipt.id] = receipt;
+				return updated;
+			});
+			// Keep lists in order, replacing changed receipts where they were
+			const byId = new Map(changed.map((r) => [r.id, r]));
+			setUnallocatedReceipts((prev) =>
+				prev
+					.map((r) => byId.get(r.id) ?? (deleted.has(r.id) ? undefined : r))
+					.filter((r): r is Receipt => !!r && isUnallocated(r)),
+			);
+			setCurrentReceiptsList((prev) => {
+				const kept = prev
+					.map((r) => byId.get(r.id) ?? (deleted.has(r.id) ? undefined : r))
+					.filter((r): r is Receipt => !!r && isInView(r));
+				const shown = new Set(prev.map((r) => r.id));
+				const added = changed.filter((r) => !shown.has(r.id) && isInView(r));
+				return [...kept, ...added];
+			});
+
+			const deletedBuckets = new Set(changes.deletedBuckets);
+			const changedBuckets = new Map(
+				changes.buckets.map((b) => [b.guid, { id: b.guid, name: b.name }]),
+			);
+			setBuckets((prev) => [
+				...prev
+					.filter((b) => !deletedBuckets.has(b.id))
+					.map((b) => changedBuckets.get(b.id) ?? b),
+				...[...changedBuckets.values()].filter(
+					(b) => !prev.some((p) => p.id === b.id),
+				),
+			]);
+
+			// Totals are computed server-side; fetch just those
+			const summary = await client.getDashboard({
+				months: getMonthsInRange(start, end),
+				readMask: {
+					paths: ["buckets", "unallocated_count", "unallocated_amount"],
+				},
+			});
+			setBucketSummaries(
+				summary.buckets.map((s) => ({
+					bucket: { id: s.guid, name: s.name },
+					totalAmount: s.totalAmount,
+					receiptCount: s.receiptCount,
+				})),
+			);
+			setUnallocatedSummary({
+				totalAmount: summary.unallocatedAmount,
+				receiptCount: summary.unallocatedCount,
+			});
+		} catch (error) {
+			console.error("Failed to sync changes:", error);
+			void refreshBuckets(start, end, true);
+		}
+	}, [currentDateFilter, refreshBuckets, isInView]);
+
+	// Let the server push change notices, so edits made elsewhere show up without polling
+	const triggerRefreshRef = useRef(triggerRefresh);
+	triggerRefreshRef.current = triggerRefresh;
+	useEffect(() => {
+		if (!authenticated) return;
+		const controller = new AbortController();
+		let pending: ReturnType<typeof setTimeout> | undefined;
+
+		const watch = async () => {
+			while (!controller.signal.aborted) {
+				try {
+					const stream = client.watchChanges(
+						{ sinceSeq: changeSeq.current ?? undefined },
+						{ signal: controller.signal },
+					);
+					for await (const notice of stream) {
+						const seen = changeSeq.current;
+						const isNew =
+							notice.resync ||
+							notice.changes.some((c) => seen === null || c.seq > seen);
+						if (!isNew) continue; // heartbeat, or already applied
+						// Coalesce bursts (e.g. a bulk upload) into one delta sync
+						clearTimeout(pending);
+						pending = setTimeout(() => void triggerRefreshRef.current(), 250);
+					}
+				} catch (error) {
+					if (controller.signal.aborted) return;
+					console.error("Change stream dropped, reconnecting:", error);
+				}
+				await new Promise((resolve) => setTimeout(resolve, 5000));
+			}
+		};
+
+		void watch();
+		return () => {
+			controller.abort();
+			clearTimeout(pending);
+		};
+	}, [authenticated]);
 
 	const isNameTaken = (name: string, excludeId?: string) => {
 		const slug = slugify(name);
@@ -323,7 +449,7 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				name: response.name,
 			};
 			setBuckets((prev) => [...prev, newBucket]);
-			triggerRefresh();
+			void triggerRefresh();
 			return true;
 		} catch (error) {
 			console.error("Failed to create bucket:", error);
@@ -365,7 +491,7 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				}
 				return updated;
 			});
-			triggerRefresh();
+			void triggerRefresh();
 		} catch (error) {
 			console.error("Failed to delete bucket:", error);
 		}
@@ -373,7 +499,7 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 
 	const addReceipt = async (receipt: Omit<Receipt, "id">) => {
 		try {
-			const response = await client.createReceipt({
+			const { receipt: response, duplicateGuids } = await client.createReceipt({
 				vendor: receipt.vendor,
 				total: receipt.total,
 				date: dateToTimestamp(new Date(receipt.date)),
@@ -387,6 +513,7 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				hash: receipt.hash || "",
 			});
 
+			if (!response) return;
 			const createdReceipt: Receipt = {
 				id: response.guid,
 				vendor: response.vendor,
@@ -400,17 +527,18 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				ref: response.vendorRef || undefined,
 				notes: response.notes || undefined,
 				hash: response.hash || undefined,
+				version: response.version || undefined,
 			};
 
-			if (createdReceipt.hash && receiptHashes.has(createdReceipt.hash)) {
+			if (duplicateGuids.length) {
 				console.warn(
-					"Duplicate receipt detected, skipping:",
+					"Receipt looks like a duplicate of:",
 					createdReceipt.vendor,
+					duplicateGuids,
 				);
-				return;
 			}
 			setReceipts((prev) => ({ ...prev, [createdReceipt.id]: createdReceipt }));
-			triggerRefresh();
+			void triggerRefresh();
 		} catch (error) {
 			console.error("Failed to create receipt:", error);
 		}
@@ -437,6 +565,8 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				vendorRef: receipt.ref || "",
 				notes: receipt.notes || "",
 				hash: receipt.hash || "",
+				// Rejected with Code.Aborted if someone else saved the receipt since it was loaded
+				expectedVersion: receipt.version || "",
 			});
 
 			const updatedReceipt: Receipt = {
@@ -452,15 +582,23 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				ref: response.vendorRef || "",
 				notes: response.notes || "",
 				hash: response.hash || "",
+				version: response.version || undefined,
 			};
 
 			setReceipts((prev) => ({ ...prev, [updatedReceipt.id]: updatedReceipt }));
-			triggerRefresh();
+			void triggerRefresh();
 		} catch (error) {
 			console.error("Failed to update receipt:", error);
 			// Revert optimistic update
-			if (previousReceipt) {
-				setReceipts((prev) => ({ ...prev, [receipt.id]: previousReceipt }));
+			setReceipts((prev) => {
+				if (previousReceipt) return { ...prev, [receipt.id]: previousReceipt };
+				const { [receipt.id]: _, ...rest } = prev;
+				return rest;
+			});
+			if (ConnectError.from(error).code === Code.Aborted) {
+				// Someone else saved it first; show their version
+				window.alert("This receipt was changed elsewhere. Reloaded the latest version.");
+				void triggerRefresh();
 			}
 		}
 	};
@@ -472,16 +610,22 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				const { [id]: _, ...rest } = prev;
 				return rest;
 			});
-			triggerRefresh();
+			void triggerRefresh();
 		} catch (error) {
 			console.error("Failed to delete receipt:", error);
 		}
 	};
 
-	const getUnallocatedReceipts = useCallback(async (): Promise<Receipt[]> => {
-		// Dashboard handles the refresh which populates unallocatedReceipts
-		return unallocatedReceipts;
-	}, [unallocatedReceipts]);
+	const getUnallocatedReceipts = useCallback(
+		async (startDate: Date, endDate: Date): Promise<Receipt[]> => {
+			return await loadReceiptsForBucket(
+				UNALLOCATED_BUCKET_ID,
+				startDate,
+				endDate,
+			);
+		},
+		[loadReceiptsForBucket],
+	);
 
 	return (
 		<TaxosContext.Provider
@@ -492,7 +636,6 @@ export const TaxosProvider: React.FC<{ children: ReactNode }> = ({
 				receipts,
 				unallocatedReceipts,
 				currentReceiptsList,
-				vendorNames,
 				loading,
 				authenticated,
 				isNameTaken,
@@ -25,6 +25,7 @@ export interface Receipt {
 	notes?: string;
 	file?: string; // filename or stub
 	hash?: string; // SHA-256 hash for duplicate prevention
+	version?: string; // Content digest, to detect edits made elsewhere
 }
 
 export const UNALLOCATED_BUCKET_ID = "unallocated";